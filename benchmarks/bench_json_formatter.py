@@ -0,0 +1,49 @@
+"""
+Per-record cost of JsonFormatter.format versus the fast-path format_bytes.
+
+Run with `python benchmarks/bench_json_formatter.py`.
+"""
+import logging
+import time
+
+from loghelpers import Configuration, JsonFormatter
+from loghelpers.context import LoggingContext
+
+RECORDS = 20000
+REPEATS = 5
+
+
+def make_record() -> logging.LogRecord:
+    return logging.LogRecord(
+        "bench.service", logging.INFO, __file__, 10,
+        "user %s logged in from %s", ("alice", "10.0.0.1"), None
+    )
+
+
+def per_record_ns(fn, record: logging.LogRecord) -> float:
+    for _ in range(1000):
+        fn(record)
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter_ns()
+        for _ in range(RECORDS):
+            fn(record)
+        best = min(best, (time.perf_counter_ns() - start) / RECORDS)
+    return best
+
+
+def main() -> None:
+    config = Configuration(log_format="%(message)s")
+    record = make_record()
+    slow = JsonFormatter(config, fast_path=False)
+    fast = JsonFormatter(config, fast_path=True)
+    with LoggingContext.context(request_id="3f2a", user_id="42", route="/login"):
+        baseline = per_record_ns(lambda r: slow.format(r).encode("utf-8"), record)
+        optimized = per_record_ns(fast.format_bytes, record)
+    print(f"format + encode : {baseline:9.0f} ns/record")
+    print(f"format_bytes    : {optimized:9.0f} ns/record")
+    print(f"speedup         : {baseline / optimized:9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+"""
+Benchmark suite for the logging pipeline, with stdlib baselines and regression checks.
+
+Every loghelpers case names a plain stdlib `logging` case doing the equivalent
+work, and its result includes the ratio to that baseline. For each case the
+suite reports the best and median time per record over several repeats,
+records per second, and two allocation figures measured with tracemalloc:
+the average peak of heap memory allocated while handling one record and the
+number of memory blocks still held per record afterwards. CPython does not
+expose a count of individual allocations, so these stand in for it.
+
+    python benchmarks/suite.py --output baseline.json
+    python benchmarks/suite.py --compare baseline.json --threshold 0.1
+
+With `--compare` every case is compared with the stored result of the same
+name and the exit status is 1 if any case got slower by more than the
+threshold.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loghelpers import Configuration, ColorFormatter, JsonFormatter, get_logger, log_calls
+from loghelpers.context import ContextProviders, LoggingContext
+from loghelpers.handlers import SensitiveDataFilter
+
+Factory = Callable[[contextlib.ExitStack], Callable[[], Any]]
+
+# Cases by name: (name of the stdlib baseline or None, factory of the per-record callable)
+CASES: Dict[str, Tuple[Optional[str], Factory]] = {}
+
+STDLIB_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+PAYLOAD_SIZES = {"small": 4, "medium": 32, "large": 256}
+PROVIDER_COUNTS = (0, 1, 4, 16)
+
+
+def case(name: str, baseline: Optional[str] = None) -> Callable[[Factory], Factory]:
+    def register(factory: Factory) -> Factory:
+        CASES[name] = (baseline, factory)
+        return factory
+    return register
+
+
+class _NullStream:
+    def write(self, data: str) -> int:
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+def make_record(msg: Any = "user %s logged in from %s", args: Any = ("alice", "10.0.0.1")) -> logging.LogRecord:
+    return logging.LogRecord("bench.service", logging.INFO, __file__, 10, msg, args, None)
+
+
+def make_payload(size: int) -> Dict[str, Any]:
+    """
+    Build a nested payload with `size` leaf groups, some under sensitive keys.
+    """
+    return {
+        f"item_{i}": {
+            "id": i,
+            "password": f"secret-{i}",
+            "tags": [f"tag-{i}", {"token": "abc", "note": "ssn 19900101-1234"}],
+            "meta": {"created": "2024-01-01", "owner": {"name": "alice", "api_key": "k"}},
+        }
+        for i in range(size)
+    }
+
+
+def bench_config() -> Configuration:
+    return Configuration(log_format="%(message)s")
+
+
+def with_context(stack: contextlib.ExitStack) -> None:
+    stack.enter_context(LoggingContext.context(request_id="3f2a", user_id="42", route="/login"))
+
+
+@case("stdlib.get_logger")
+def _stdlib_get_logger(stack: contextlib.ExitStack) -> Callable[[], Any]:
+    return lambda: logging.getLogger("bench.get_logger")
+
+
+@case("loghelpers.get_logger", baseline="stdlib.get_logger")
+def _get_logger(stack: contextlib.ExitStack) -> Callable[[], Any]:
+    config = Configuration(log_format=STDLIB_FORMAT, log_file=None)
+    return lambda: get_logger(name="bench.get_logger", config=config)
+
+
+@case("stdlib.format")
+def _stdlib_format(stack: contextlib.ExitStack) -> Callable[[], Any]:
+    formatter = logging.Formatter(STDLIB_FORMAT)
+    record = make_record()
+    return lambda: formatter.format(record)
+
+
+@case("loghelpers.json_format", baseline="stdlib.format")
+def _json_format(stack: contextlib.ExitStack) -> Callable[[], Any]:
+    with_context(stack)
+    formatter = JsonFormatter(bench_config(), fast_path=False)
+    record = make_record()
+    return lambda: formatter.format(record)
+
+
+@case("loghelpers.json_format_bytes", baseline="stdlib.format")
+def _json_format_bytes(stack: contextlib.ExitStack) -> Callable[[], Any]:
+    with_context(stack)
+    formatter = JsonFormatter(bench_config(), fast_path=True)
+    record = make_record()
+    return lambda: formatter.format_bytes(record)
+
+
+@case("loghelpers.color_format", baseline="stdlib.format")
+def _color_format(stack: contextlib.ExitStack) -> Callable[[], Any]:
+    formatter = ColorFormatter(STDLIB_FORMAT)
+    record = make_record()
+    return lambda: formatter.format(record)
+
+
+def _payload_cases() -> None:
+    for label, size in PAYLOAD_SIZES.items():
+        def stdlib_factory(stack: contextlib.ExitStack, size: int = size) -> Callable[[], Any]:
+            formatter = logging.Formatter("%(message)s")
+            record = make_record("%s", (make_payload(size),))
+            return lambda: formatter.format(record)
+
+        def redact_factory(stack: contextlib.ExitStack, size: int = size) -> Callable[[], Any]:
+            redactor = bench_config().redactor
+            payload = make_payload(size)
+            return lambda: redactor.redact(payload)
+
+        case(f"stdlib.format_payload_{label}")(stdlib_factory)
+        case(f"loghelpers.redact_{label}", baseline=f"stdlib.format_payload_{label}")(redact_factory)
+
+
+_payload_cases()
+
+
+@case("stdlib.adapter_process")
+def _stdlib_adapter(stack: contextlib.ExitStack) -> Callable[[], Any]:
+    adapter = logging.LoggerAdapter(logging.getLogger("bench.adapter"), {"request_id": "3f2a"})
+    return lambda: adapter.process("message", {})
+
+
+def _provider_cases() -> None:
+    for count in PROVIDER_COUNTS:
+        def factory(stack: contextlib.ExitStack, count: int = count) -> Callable[[], Any]:
+            with_context(stack)
+            for i in range(count):
+                stack.enter_context(ContextProviders.temporary_provider(
+                    f"bench_{i}", lambda i=i: {f"bench_{i}": str(i)}
+                ))
+            config = bench_config()
+            context = LoggingContext()
+            record = make_record()
+            return lambda: context.resolve_context(config, record)
+
+        case(f"loghelpers.resolve_context_{count}", baseline="stdlib.adapter_process")(factory)
+
+
+_provider_cases()
+
+
+def _calls_logger(stack: contextlib.ExitStack, name: str) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = logging.StreamHandler(_NullStream())
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    stack.callback(logger.removeHandler, handler)
+    return logger
+
+
+@case("stdlib.manual_call_logging")
+def _stdlib_calls(stack: contextlib.ExitStack) -> Callable[[], Any]:
+    logger = _calls_logger(stack, "bench.stdlib_calls")
+
+    def add(a: int, b: int) -> int:
+        logger.info("Calling %s with args=%r kwargs=%r", "add", (a, b), {})
+        result = a + b
+        logger.info("%s returned %r", "add", result)
+        return result
+    return lambda: add(1, 2)
+
+
+@case("loghelpers.log_calls", baseline="stdlib.manual_call_logging")
+def _log_calls(stack: contextlib.ExitStack) -> Callable[[], Any]:
+    logger = _calls_logger(stack, "bench.log_calls")
+
+    @log_calls(logging.INFO, logger)
+    def add(a: int, b: int) -> int:
+        return a + b
+    return lambda: add(1, 2)
+
+
+@case("stdlib.logger_info")
+def _stdlib_pipeline(stack: contextlib.ExitStack) -> Callable[[], Any]:
+    logger = _calls_logger(stack, "bench.stdlib_pipeline")
+    logger.handlers[-1].setFormatter(logging.Formatter(STDLIB_FORMAT))
+    return lambda: logger.info("user %s logged in from %s", "alice", "10.0.0.1")
+
+
+@case("loghelpers.logger_info", baseline="stdlib.logger_info")
+def _pipeline(stack: contextlib.ExitStack) -> Callable[[], Any]:
+    with_context(stack)
+    config = bench_config()
+    logger = _calls_logger(stack, "bench.pipeline")
+    handler = logger.handlers[-1]
+    handler.setFormatter(JsonFormatter(config))
+    handler.addFilter(SensitiveDataFilter(config))
+    return lambda: logger.info("user %s logged in from %s", "alice", "10.0.0.1")
+
+
+def measure(fn: Callable[[], Any], records: int, repeats: int) -> Dict[str, float]:
+    """
+    Time a per-record callable and measure its allocations.
+
+    Args:
+        fn: Callable handling one record.
+        records: Number of calls per timed repeat.
+        repeats: Number of timed repeats.
+
+    Returns:
+        Dict[str, float]: Timing and allocation figures of the case.
+    """
+    for _ in range(min(records, 1000)):
+        fn()
+
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter_ns()
+            for _ in range(records):
+                fn()
+            timings.append((time.perf_counter_ns() - start) / records)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    best = min(timings)
+
+    samples = min(records, 200)
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    try:
+        peak = 0
+        for _ in range(samples):
+            tracemalloc.clear_traces()
+            fn()
+            peak += tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    gc.collect()
+    retained = sys.getallocatedblocks() - blocks
+
+    return {
+        "ns_per_record": round(best, 1),
+        "median_ns_per_record": round(statistics.median(timings), 1),
+        "records_per_sec": round(1e9 / best, 1),
+        "peak_bytes_per_record": round(peak / samples, 1),
+        "retained_blocks_per_record": round(max(retained, 0) / samples, 3),
+    }
+
+
+def run(names: List[str], records: int, repeats: int) -> Dict[str, Any]:
+    """
+    Run cases and their baselines. A case that raises is recorded with its error.
+
+    Args:
+        names: Names of the cases to run; baselines are added as needed.
+        records: Number of calls per timed repeat.
+        repeats: Number of timed repeats.
+
+    Returns:
+        Dict[str, Any]: Environment metadata and results by case name.
+    """
+    selected = []
+    for name in names:
+        baseline = CASES[name][0]
+        for candidate in (baseline, name):
+            if candidate is not None and candidate not in selected:
+                selected.append(candidate)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in selected:
+        baseline, factory = CASES[name]
+        try:
+            with contextlib.ExitStack() as stack:
+                result: Dict[str, Any] = dict(measure(factory(stack), records, repeats))
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+            print(f"{name:40} failed: {results[name]['error']}", file=sys.stderr)
+            continue
+        if baseline is not None:
+            result["baseline"] = baseline
+            if "ns_per_record" in results[baseline]:
+                result["vs_baseline"] = round(result["ns_per_record"] / results[baseline]["ns_per_record"], 3)
+        results[name] = result
+        print(f"{name:40} {result['ns_per_record']:12.0f} ns/record", file=sys.stderr)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "records": records,
+            "repeats": repeats,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], stored: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compare results with a stored run.
+
+    Args:
+        current: Results of this run.
+        stored: Results loaded from a previous `--output`.
+        threshold: Relative slowdown above which a case counts as a regression.
+
+    Returns:
+        List[str]: Names of the cases that regressed.
+    """
+    regressions = []
+    print(f"\n{'case':40} {'stored':>12} {'current':>12} {'change':>8}", file=sys.stderr)
+    for name, result in current["results"].items():
+        previous = stored.get("results", {}).get(name)
+        if previous is None or "ns_per_record" not in previous or "ns_per_record" not in result:
+            continue
+        change = result["ns_per_record"] / previous["ns_per_record"] - 1
+        marker = ""
+        if change > threshold:
+            marker = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            marker = "  improved"
+        print(
+            f"{name:40} {previous['ns_per_record']:12.0f} {result['ns_per_record']:12.0f} "
+            f"{change:+8.1%}{marker}",
+            file=sys.stderr,
+        )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark loghelpers against stdlib logging.")
+    parser.add_argument("--output", help="Write JSON results to this file instead of standard output.")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare with.")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative slowdown reported as a regression (default 0.1).")
+    parser.add_argument("--filter", action="append", default=[],
+                        help="Only run cases whose name contains this text; may be repeated.")
+    parser.add_argument("--records", type=int, default=20000, help="Calls per timed repeat.")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed repeats per case.")
+    parser.add_argument("--list", action="store_true", help="List case names and exit.")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (baseline, _) in CASES.items():
+            print(name if baseline is None else f"{name} (baseline {baseline})")
+        return 0
+
+    names = [name for name in CASES if not args.filter or any(text in name for text in args.filter)]
+    results = run(names, args.records, args.repeats)
+    data = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(data + "\n")
+    else:
+        print(data)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as source:
+            stored = json.load(source)
+        if compare(results, stored, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
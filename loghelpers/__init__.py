@@ -1,19 +1,33 @@
 # loghelpers/__init__.py
+import functools
 import logging
-from typing import Optional
+import threading
+from typing import Dict, List, Optional, Set, Tuple
 
 from .config import Configuration, Feature
 from .decorators import log_calls, temporary_level
 from .formatters import JsonFormatter, ColorFormatter
+from .profiling import log_timing, profile_calls
 
 __all__ = [
     "Configuration",
     "JsonFormatter",
     "ColorFormatter",
+    "get_logger",
     "log_calls",
+    "log_timing",
+    "profile_calls",
+    "reconfigure",
 ]
 
-from .handlers import SensitiveDataFilter
+from .handlers import _flight_recorder_level, create_console_handler, create_file_handler
+
+# (logger name, id(config)) -> logger; the config is kept alive by _handler_sets
+_loggers: Dict[Tuple[str, int], logging.Logger] = {}
+# id(config) -> (config, shared handlers, bound logger names)
+_handler_sets: Dict[int, Tuple[Configuration, List[logging.Handler], Set[str]]] = {}
+_lock = threading.RLock()
+_default_config: Optional[Configuration] = None
 
 
 def get_logger(
@@ -25,41 +39,162 @@ def get_logger(
     """
     Get a logger instance with the specified name.
 
+    Loggers are cached by name and configuration, so repeated calls return the
+    same logger without adding handlers. Every logger created from the same
+    configuration shares one console handler, which formats with
+    `config.log_format`, and, if `config.log_file` is set, one JSON file handler,
+    so each record is formatted and written once per sink.
+    Asking for an existing name with another configuration moves the logger to
+    that configuration's handlers.
+
     Args:
         name (str): Name of the logger. Defaults to the calling module's name.
-        level (int): Logging level to set for the logger. Defaults to INFO.
+        level (int): Logging level to set for the logger. Defaults to `config.log_level`,
+            or DEBUG if a flight recorder is configured.
         config (Configuration): Optional configuration object to use for logger setup.
+            Defaults to a single shared Configuration().
 
     Returns:
         logging.Logger: Configured logger instance.
     """
     if name is None:
         name = __name__
+    if config is None:
+        config = _get_default_config()
 
-    logger = logging.getLogger(name)
+    logger = _loggers.get((name, id(config)))
+    if logger is None:
+        with _lock:
+            logger = _loggers.get((name, id(config)))
+            if logger is None:
+                logger = _bind(name, config)
+    if level is not None:
+        logger.setLevel(level)
+    return logger
+
+
+def reconfigure(config: Optional[Configuration] = None) -> None:
+    """
+    Rebuild the shared handlers of a configuration after its settings changed.
+
+    The new handlers are created first and then swapped into every logger bound
+    to the configuration with a single assignment per logger, so a concurrent
+    record goes either to the old or to the new handlers, never to both. The
+    sampling and rate limit filters shared through the configuration are
+    rebuilt as well. The old handlers are closed once their in-flight emits
+    have finished; records that still reach them afterwards are passed on to
+    their replacements.
+
+    Args:
+        config (Configuration): Configuration whose loggers are updated. Defaults
+            to the configuration used by `get_logger` when none is given.
+    """
+    if config is None:
+        config = _get_default_config()
+    with _lock:
+        entry = _handler_sets.get(id(config))
+        if entry is None:
+            return
+        _, old_handlers, names = entry
+        with config._lock:
+            # Shared filters are memoized on the config; rebuild them from its current settings
+            if config._sampling_filter is not None:
+                config._sampling_filter.close()
+            config._sampling_filter = None
+            config._rate_limit_filter = None
+        new_handlers = _create_handlers(config)
+        _handler_sets[id(config)] = (config, new_handlers, names)
+        for name in names:
+            logger = logging.getLogger(name)
+            logger.setLevel(_logger_level(config))
+            _swap_handlers(logger, old_handlers, new_handlers)
+    _retire(old_handlers, new_handlers)
+
+
+def _get_default_config() -> Configuration:
+    global _default_config
+    if _default_config is None:
+        with _lock:
+            if _default_config is None:
+                _default_config = Configuration()
+    return _default_config
 
-    logger.setLevel(level or config.log_level)
 
-    if not config:
-        config = Configuration()
+def _logger_level(config: Configuration) -> int:
+    level = logging.getLevelName(config.log_level)
+    if config.log_file and config.flight_recorder_size:
+        # Records down to the capture level must reach the flight recorder to be kept as history
+        level = min(level, _flight_recorder_level(config))
+    return level
 
-    # Set up console handler with color formatter
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(config.log_level)
-    console_handler.setFormatter(ColorFormatter(fmt=config.log_format, style="{"))
-    logger.addHandler(console_handler)
 
-    # Set up file handler with JSON formatter
+def _create_handlers(config: Configuration) -> List[logging.Handler]:
+    handlers = [create_console_handler(config, fmt=config.log_format, style="%")]
     if config.log_file:
-        file_handler = logging.FileHandler(config.log_file, mode='a', encoding='utf-8')
-        file_handler.setLevel(config.log_level)
-        file_handler.setFormatter(JsonFormatter(config))
-        logger.addHandler(file_handler)
+        handlers.append(create_file_handler(config))
+    return handlers
 
-    # Add sensitive data filter if configured
-    if Feature.REDACT_SENSITIVE_DATA in config.features:
-        sensitive_filter = SensitiveDataFilter(config)
-        for handler in logger.handlers:
-            handler.addFilter(sensitive_filter)
 
+def _bind(name: str, config: Configuration) -> logging.Logger:
+    """Attach the shared handlers of `config` to a logger. Must hold `_lock`."""
+    entry = _handler_sets.get(id(config))
+    if entry is None:
+        entry = _handler_sets[id(config)] = (config, _create_handlers(config), set())
+    _, handlers, names = entry
+
+    logger = logging.getLogger(name)
+    old_handlers: List[logging.Handler] = []
+    unused: List[logging.Handler] = []
+    for key in [key for key in _loggers if key[0] == name]:
+        del _loggers[key]
+        _, previous, previous_names = _handler_sets[key[1]]
+        previous_names.discard(name)
+        old_handlers.extend(previous)
+        if not previous_names:
+            del _handler_sets[key[1]]
+            unused.extend(previous)
+
+    logger.setLevel(_logger_level(config))
+    _swap_handlers(logger, old_handlers, handlers)
+    names.add(name)
+    _loggers[(name, id(config))] = logger
+    _retire(unused, handlers)
     return logger
+
+
+def _swap_handlers(
+        logger: logging.Logger,
+        old_handlers: List[logging.Handler],
+        new_handlers: List[logging.Handler],
+) -> None:
+    # Logger.callHandlers reads `handlers` once, so assigning a new list is atomic
+    kept = [handler for handler in logger.handlers if handler not in old_handlers and handler not in new_handlers]
+    logger.handlers = kept + new_handlers
+
+
+def _retire(old_handlers: List[logging.Handler], new_handlers: List[logging.Handler]) -> None:
+    """
+    Close replaced handlers without losing or duplicating records of in-flight calls.
+
+    A thread that read `logger.handlers` before the swap may still call `handle`
+    on an old handler, or wait for its lock to `emit`. Both are redirected to the
+    handler at the same position in `new_handlers` (or dropped if there is none)
+    before the old handler is closed under its lock, so a closed file handler is
+    never reopened and a stopped pipeline is never fed.
+    """
+    for position, handler in enumerate(old_handlers):
+        replacement = new_handlers[position] if position < len(new_handlers) else None
+        forward = functools.partial(_forward, replacement)
+        handler.handle = forward  # type: ignore[method-assign]
+        handler.acquire()
+        try:
+            handler.emit = forward  # type: ignore[method-assign]
+            handler.close()
+        finally:
+            handler.release()
+
+
+def _forward(replacement: Optional[logging.Handler], record: logging.LogRecord) -> bool:
+    if replacement is None or record.levelno < replacement.level:
+        return False
+    return bool(replacement.handle(record))
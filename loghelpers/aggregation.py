@@ -0,0 +1,442 @@
+# loghelpers/aggregation.py
+import argparse
+import logging
+import os
+import selectors
+import socket
+import struct
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .config import Configuration
+from .utils import cancel_periodic_flush, flush_periodically, reinit_after_fork
+
+# Frame header: payload length and level number, network byte order
+FRAME_HEADER = struct.Struct("!IB")
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+
+class AggregatingHandler(logging.Handler):
+    """
+    Ships formatted records over a Unix domain socket to a `LogAggregator`.
+
+    Every record is formatted in the worker (with `format_bytes` when the formatter
+    provides it) and appended to a batch as a length-prefixed frame. A batch is sent
+    with a single `sendall` when it reaches `buffer_size`, when a record at or
+    above `flush_level` arrives, or once it is `flush_interval` seconds old, from
+    the shared flush thread if no further record arrives. Only the aggregator
+    touches the log file, so workers never race on rotation or interleave partial
+    lines.
+
+    If the aggregator cannot be reached the batch is dropped and counted in
+    `dropped`; reconnects are attempted at most every `retry_interval` seconds.
+    Forked children open their own connection and discard the parent's batch.
+    """
+
+    terminator = b"\n"
+
+    def __init__(
+            self,
+            address: str,
+            buffer_size: int = 64 * 1024,
+            flush_interval: float = 1.0,
+            flush_level: int = logging.ERROR,
+            retry_interval: float = 1.0,
+            encoding: str = "utf-8",
+    ):
+        """
+        Initialize the aggregating handler. The connection is opened on the first send.
+
+        Args:
+            address: Path of the aggregator's Unix domain socket.
+            buffer_size: Number of batched bytes that triggers a send.
+            flush_interval: Maximum age in seconds of batched records before a send.
+            flush_level: Records at or above this level are sent immediately.
+            retry_interval: Minimum seconds between connection attempts.
+            encoding: Encoding used for formatters without `format_bytes`.
+        """
+        super().__init__()
+        self.address = address
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        self.retry_interval = retry_interval
+        self.encoding = encoding
+        self.dropped = 0
+        self._buffer = bytearray()
+        self._pending = 0
+        self._sock: Optional[socket.socket] = None
+        self._last_flush = time.monotonic()
+        self._last_attempt = -retry_interval
+        reinit_after_fork(self)
+        flush_periodically(self, flush_interval)
+
+    def _after_fork(self) -> None:
+        # The inherited connection and batch belong to the parent
+        self.createLock()
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        self._buffer = bytearray()
+        self._pending = 0
+        self.dropped = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            format_bytes = getattr(self.formatter, "format_bytes", None)
+            if format_bytes is not None:
+                payload = format_bytes(record)
+            else:
+                payload = self.format(record).encode(self.encoding) + self.terminator
+            self._buffer += FRAME_HEADER.pack(len(payload), min(record.levelno, 255))
+            self._buffer += payload
+            self._pending += 1
+            now = time.monotonic()
+            if (
+                    len(self._buffer) >= self.buffer_size
+                    or record.levelno >= self.flush_level
+                    or now - self._last_flush >= self.flush_interval
+            ):
+                self._send(now)
+        except Exception:
+            self.handleError(record)
+
+    def _connect(self, now: float) -> Optional[socket.socket]:
+        if now - self._last_attempt < self.retry_interval:
+            return None
+        self._last_attempt = now
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.address)
+        except OSError:
+            sock.close()
+            return None
+        self._sock = sock
+        return sock
+
+    def _send(self, now: float) -> None:
+        self._last_flush = now
+        if not self._buffer:
+            return
+        try:
+            sock = self._sock if self._sock is not None else self._connect(now)
+            if sock is None:
+                self.dropped += self._pending
+                return
+            try:
+                sock.sendall(self._buffer)
+            except OSError:
+                self.dropped += self._pending
+                self._sock = None
+                sock.close()
+        finally:
+            self._buffer.clear()
+            self._pending = 0
+
+    def _periodic_flush(self) -> None:
+        self.acquire()
+        try:
+            now = time.monotonic()
+            if self._buffer and now - self._last_flush >= self.flush_interval:
+                self._send(now)
+        finally:
+            self.release()
+
+    def flush(self) -> None:
+        """
+        Send any batched records to the aggregator.
+        """
+        self.acquire()
+        try:
+            self._send(time.monotonic())
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        """
+        Send any batched records and close the connection.
+        """
+        cancel_periodic_flush(self)
+        self.acquire()
+        try:
+            try:
+                self._send(time.monotonic())
+                if self._sock is not None:
+                    self._sock.close()
+            finally:
+                self._sock = None
+                super().close()
+        finally:
+            self.release()
+
+
+class RawRecord:
+    """
+    Minimal record carrying an already formatted line received by the aggregator.
+
+    `created` is the time the line was received, which time-based rotation uses.
+    """
+    __slots__ = ("payload", "levelno", "levelname", "msg", "created")
+    name = "loghelpers.aggregation"
+    args = ()
+    exc_info = None
+    exc_text = None
+    stack_info = None
+
+    def __init__(self, payload: bytes, levelno: int):
+        self.payload = payload
+        self.levelno = levelno
+        self.levelname = logging.getLevelName(levelno)
+        self.msg = payload
+        self.created = time.time()
+
+    def getMessage(self) -> str:
+        return self.payload.rstrip(b"\n").decode("utf-8", "replace")
+
+
+class RawFormatter(logging.Formatter):
+    """
+    Formatter that writes the payload of a `RawRecord` unchanged.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        return record.getMessage()
+
+    def format_bytes(self, record: RawRecord) -> bytes:
+        return record.payload
+
+
+class LogAggregator:
+    """
+    Receives frames from `AggregatingHandler` clients and writes them to one sink.
+
+    A single thread multiplexes every worker connection with `selectors`, so the
+    sink (for example a RotatingFileHandler or BufferedFileHandler) has exactly one
+    writer. Payloads are written as received through a `RawFormatter`; the sink is
+    flushed whenever the aggregator has been idle for `flush_interval` seconds.
+    """
+
+    def __init__(self, address: str, handler: logging.Handler, flush_interval: float = 1.0):
+        """
+        Initialize the aggregator and bind its socket.
+
+        Args:
+            address: Path of the Unix domain socket to listen on. A stale socket
+                file is replaced.
+            handler: The sink handler that owns the log file.
+            flush_interval: Seconds of idleness after which the sink is flushed.
+        """
+        self.address = address
+        self.handler = handler
+        self.handler.setFormatter(RawFormatter())
+        self.flush_interval = flush_interval
+        if os.path.exists(address):
+            os.unlink(address)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(address)
+        self._server.listen()
+        self._server.setblocking(False)
+        self._buffers: Dict[socket.socket, bytearray] = {}
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._server, selectors.EVENT_READ)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._serving = False
+        self._closed = False
+
+    def serve_forever(self) -> None:
+        """
+        Accept connections and write received records until `stop` is called.
+        """
+        self._serving = True
+        try:
+            while not self._stop.is_set():
+                events = self._selector.select(timeout=self.flush_interval)
+                if not events:
+                    self.handler.flush()
+                for key, _ in events:
+                    if key.fileobj is self._server:
+                        self._accept()
+                    else:
+                        self._read(key.fileobj)  # type: ignore[arg-type]
+        finally:
+            self._shutdown()
+
+    def start(self) -> None:
+        """
+        Serve on a daemon thread.
+        """
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="loghelpers-aggregator", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop serving, write pending frames, close the sink and remove the socket file.
+
+        Also releases the socket of an aggregator that was never started.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        elif not self._serving:
+            self._shutdown()
+
+    def _accept(self) -> None:
+        try:
+            conn, _ = self._server.accept()
+        except BlockingIOError:
+            return
+        conn.setblocking(False)
+        self._buffers[conn] = bytearray()
+        self._selector.register(conn, selectors.EVENT_READ)
+
+    def _read(self, conn: socket.socket) -> None:
+        try:
+            data = conn.recv(256 * 1024)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._disconnect(conn)
+            return
+        buffer = self._buffers[conn]
+        buffer += data
+        if not self.feed(buffer):
+            self._disconnect(conn)
+
+    def feed(self, buffer: bytearray) -> bool:
+        """
+        Write every complete frame in `buffer` and remove it from the buffer.
+
+        Args:
+            buffer: Received bytes of one connection.
+
+        Returns:
+            bool: False if the buffer holds a malformed frame.
+        """
+        offset = 0
+        size = len(buffer)
+        header_size = FRAME_HEADER.size
+        records: List[RawRecord] = []
+        while size - offset >= header_size:
+            length, levelno = FRAME_HEADER.unpack_from(buffer, offset)
+            if length > MAX_FRAME_SIZE:
+                return False
+            end = offset + header_size + length
+            if end > size:
+                break
+            records.append(RawRecord(bytes(buffer[offset + header_size:end]), levelno))
+            offset = end
+        del buffer[:offset]
+        for record in records:
+            self.handler.handle(record)  # type: ignore[arg-type]
+        return True
+
+    def _disconnect(self, conn: socket.socket) -> None:
+        self._selector.unregister(conn)
+        self._buffers.pop(conn, None)
+        conn.close()
+
+    def _shutdown(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._serving = False
+        try:
+            self._drain()
+        finally:
+            self._selector.close()
+            self._server.close()
+            try:
+                os.unlink(self.address)
+            except FileNotFoundError:
+                pass
+            self.handler.close()
+
+    def _drain(self) -> None:
+        for conn in list(self._buffers):
+            while True:
+                try:
+                    data = conn.recv(256 * 1024)
+                except OSError:
+                    break
+                if not data:
+                    break
+                self._buffers[conn] += data
+            self.feed(self._buffers[conn])
+            self._disconnect(conn)
+
+
+def add_sink_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the options of the file sink owned by a collecting process to a parser.
+
+    Args:
+        parser: The command line parser.
+    """
+    parser.add_argument("--log-file", required=True, help="Log file owned by this process.")
+    parser.add_argument("--sink", choices=("rotating", "buffered", "mmap"), default="rotating")
+    parser.add_argument("--max-bytes", type=int, default=5 * 1024 * 1024,
+                        help="Rotate the log file at this size; 0 disables size-based rotation.")
+    parser.add_argument("--rotation-interval", type=float, help="Also rotate every this many seconds.")
+    parser.add_argument("--backup-count", type=int, default=3,
+                        help="Number of rotated segments kept; 0 keeps all.")
+    parser.add_argument("--compression", choices=("none", "gzip", "bz2", "lzma"), default="none",
+                        help="Compression of rotated segments.")
+    parser.add_argument("--max-total-bytes", type=int, help="Maximum total size of rotated segments.")
+    parser.add_argument("--index-keys", help="Comma separated context keys to index in rotated segments.")
+
+
+def sink_configuration(args: argparse.Namespace) -> Configuration:
+    """
+    Build and validate the Configuration described by the options of `add_sink_arguments`.
+
+    Args:
+        args: The parsed command line.
+
+    Returns:
+        Configuration: The sink configuration.
+    """
+    config = Configuration(
+        log_file=args.log_file,
+        file_sink=args.sink,
+        rotation_max_bytes=args.max_bytes,
+        rotation_interval=args.rotation_interval,
+        rotation_backup_count=args.backup_count,
+        rotation_compression=args.compression,
+        rotation_max_total_bytes=args.max_total_bytes,
+        rotation_index_keys=args.index_keys.split(",") if args.index_keys else None,
+    )
+    config.validate()
+    return config
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Run an aggregator that owns the file sink described by the command line.
+    """
+    from .handlers import create_file_sink
+
+    parser = argparse.ArgumentParser(
+        prog="python -m loghelpers.aggregation",
+        description="Write records shipped by AggregatingHandler workers to a single log file.",
+    )
+    parser.add_argument("--socket", required=True, help="Unix domain socket to listen on.")
+    add_sink_arguments(parser)
+    args = parser.parse_args(argv)
+
+    config = sink_configuration(args)
+    aggregator = LogAggregator(args.socket, create_file_sink(config), config.flush_interval)
+    try:
+        aggregator.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,515 @@
+# loghelpers/binary.py
+"""
+Compact binary log encoding and its decoder.
+
+A stream starts with `MAGIC` and continues with frames. All integers are little
+endian.
+
+    STRING   0x01 u32 id, u32 length, utf-8 bytes
+    CONTEXT  0x02 u16 slot, u16 count, (u32 key id, value) * count
+    RECORD   0x03 i64 time_ns, u32 logger id, u32 level id, u16 static slot,
+             u16 context slot, u8 flags, u8 arg count, value template,
+             value * arg count, [u32 repeat count], [value exception]
+
+    value    0x00 None | 0x01 True | 0x02 False | 0x03 i64 | 0x04 f64
+             | 0x05 u32 string id | 0x06 u32 length, utf-8 bytes
+             | 0x07 u32 length, decimal int | 0x08 u32 length, JSON bytes
+
+Logger names, level names, message templates and context keys are interned as
+STRING frames the first time they are used. A context is written once as a
+CONTEXT frame into one of a fixed number of slots and referenced by records
+until the slot is reused. `MAGIC` may appear again between frames; it resets
+the string table and context slots, which the encoder does when its table is
+full and every time a new stream is started.
+"""
+import argparse
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+
+from .config import Configuration
+from .context import LoggingContext
+from .sinks import BufferedFileHandler
+
+MAGIC = b"LHB\x01"
+
+_STRING = 0x01
+_CONTEXT = 0x02
+_RECORD = 0x03
+
+_NONE, _TRUE, _FALSE, _INT, _FLOAT, _REF, _STR, _BIGINT, _JSON = range(9)
+
+_HAS_REPEAT = 0x01
+_HAS_EXCEPTION = 0x02
+_RENDERED = 0x04
+
+_NO_SLOT = 0xFFFF
+
+_STRING_HEADER = struct.Struct("<BII")
+_CONTEXT_HEADER = struct.Struct("<BHH")
+_RECORD_HEADER = struct.Struct("<BqIIHHBB")
+_TEMPLATE = struct.Struct("<BI")
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+
+
+class BinaryFormatter(logging.Formatter):
+    """
+    Encodes records into the compact binary format described in this module.
+
+    Messages are stored as an interned template plus typed arguments, so the
+    message is only rendered for redaction when the redactor has value patterns;
+    if redaction changes it, the redacted message is stored instead. Contexts are
+    redacted and encoded once per `ContextMap`, and static provider context once
+    per registry version.
+
+    The formatter is stateful: every stream it writes to needs its own instance,
+    written by a single process. Use `format_bytes`; `format` returns the
+    record decoded to JSON for debugging.
+    """
+
+    def __init__(self, config: Configuration, max_strings: int = 65536, context_slots: int = 256):
+        """
+        Initialize the formatter.
+
+        Args:
+            config: The logging configuration.
+            max_strings: Size of the string table; the stream is reset when it is full.
+            context_slots: Number of contexts that can be referenced at once.
+        """
+        super().__init__()
+        if not 0 < context_slots < _NO_SLOT:
+            raise ValueError(f"Context slots must be between 1 and {_NO_SLOT - 1}.")
+        self.config = config
+        self.max_strings = max_strings
+        self.context_slots = context_slots
+        self.context = LoggingContext()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Start a new stream; the next encoded record begins with `MAGIC`.
+        """
+        self._needs_header = True
+        self._strings: Dict[str, int] = {}
+        self._names: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        self._slots: List[Any] = [None] * self.context_slots
+        self._slot_ids: Dict[int, int] = {}
+        self._next_slot = 0
+        self._static: Optional[Tuple[int, Any, int]] = None
+        self._plan = None
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Encode a record on its own and decode it back to a JSON line.
+
+        For debugging only: every call builds a throwaway formatter, so nothing is
+        interned and the output is not the binary format. Handlers must use
+        `format_bytes`.
+
+        Args:
+            record: The log record to format.
+
+        Returns:
+            str: The decoded record as JSON.
+        """
+        formatter = BinaryFormatter(self.config, self.max_strings, self.context_slots)
+        payload = next(decode(formatter.format_bytes(record)))
+        return orjson.dumps(payload, default=str).decode("utf-8")
+
+    def format_bytes(self, record: logging.LogRecord) -> bytes:
+        """
+        Encode a record, preceded by any STRING and CONTEXT frames it needs.
+
+        Args:
+            record: The log record to encode.
+
+        Returns:
+            bytes: The encoded frames.
+        """
+        out = bytearray()
+        plan = self.config.redactor.compile()
+        if self._needs_header or plan is not self._plan or len(self._strings) > self.max_strings - 1024:
+            self.reset()
+            self._needs_header = False
+            self._plan = plan
+            out += MAGIC
+
+        static_slot = self._static_slot(out)
+        context = self.context.resolve_context(self.config, record, include_static=False)
+        context_slot = self._context_slot(out, context, context) if context else _NO_SLOT
+        names = self._names.get((record.name, record.levelname))
+        if names is None:
+            names = self._names[(record.name, record.levelname)] = (
+                self._intern(record.name, out), self._intern(record.levelname, out)
+            )
+
+        body = bytearray()
+        flags = 0
+        msg, args = record.msg, record.args
+        encoded = None
+        if type(msg) is str and args and type(args) is tuple:
+            encoded = _encode_args(args)
+            if encoded is not None and plan.patterns:
+                message = record.getMessage()
+                if plan.redact_string(message) != message:
+                    encoded = None
+        if encoded is not None:
+            template_id = self._strings.get(msg) or self._intern(msg, out)
+            body += _TEMPLATE.pack(_REF, template_id)
+            body += encoded
+        else:
+            if args or type(msg) is not str:
+                flags |= _RENDERED
+            _encode_value(plan.redact_string(record.getMessage()), body)
+            args = ()
+
+        repeat_count = getattr(record, "repeat_count", None)
+        if repeat_count:
+            flags |= _HAS_REPEAT
+            body += _U32.pack(repeat_count)
+        if record.exc_info:
+            flags |= _HAS_EXCEPTION
+            _encode_value(plan.redact_string(self.formatException(record.exc_info)), body)
+
+        out += _RECORD_HEADER.pack(
+            _RECORD, int(record.created * 1_000_000_000), names[0], names[1],
+            static_slot, context_slot, flags, len(args),
+        )
+        out += body
+        return bytes(out)
+
+    def _intern(self, value: str, out: bytearray) -> int:
+        string_id = self._strings.get(value)
+        if string_id is None:
+            string_id = self._strings[value] = len(self._strings) + 1
+            data = value.encode("utf-8", "backslashreplace")
+            out += _STRING_HEADER.pack(_STRING, string_id, len(data))
+            out += data
+        return string_id
+
+    def _static_slot(self, out: bytearray) -> int:
+        version, static_context = self.context.resolve_static_context(self.config)
+        cached = self._static
+        if cached is not None and cached[0] == version and self._slots[cached[2]] is cached[1]:
+            return cached[2]
+        if not static_context:
+            return _NO_SLOT
+        slot = self._context_slot(out, static_context, static_context)
+        self._static = (version, static_context, slot)
+        return slot
+
+    def _context_slot(self, out: bytearray, key: Any, context: Any) -> int:
+        slot = self._slot_ids.get(id(key))
+        if slot is not None and self._slots[slot] is key:
+            return slot
+
+        slot = self._next_slot
+        self._next_slot = (slot + 1) % self.context_slots
+        previous = self._slots[slot]
+        if previous is not None:
+            self._slot_ids.pop(id(previous), None)
+        self._slots[slot] = key
+        self._slot_ids[id(key)] = slot
+
+        redacted = self.config.redactor.redact(dict(context))
+        frame = bytearray(_CONTEXT_HEADER.pack(_CONTEXT, slot, len(redacted)))
+        for name, value in redacted.items():
+            frame += _U32.pack(self._intern(str(name), out))
+            _encode_value(value, frame)
+        out += frame
+        return slot
+
+
+def _encode_value(value: Any, out: bytearray) -> None:
+    kind = type(value)
+    if value is None:
+        out.append(_NONE)
+    elif kind is bool:
+        out.append(_TRUE if value else _FALSE)
+    elif kind is str:
+        data = value.encode("utf-8", "backslashreplace")
+        out.append(_STR)
+        out += _U32.pack(len(data))
+        out += data
+    elif kind is int:
+        if -(1 << 63) <= value < (1 << 63):
+            out.append(_INT)
+            out += _I64.pack(value)
+        else:
+            data = str(value).encode("ascii")
+            out.append(_BIGINT)
+            out += _U32.pack(len(data))
+            out += data
+    elif kind is float:
+        out.append(_FLOAT)
+        out += _F64.pack(value)
+    else:
+        data = orjson.dumps(value, default=str)
+        out.append(_JSON)
+        out += _U32.pack(len(data))
+        out += data
+
+
+def _encode_args(args: tuple) -> Optional[bytearray]:
+    """
+    Encode message arguments, or return None if one is not a primitive value
+    whose rendering the decoder can reproduce.
+    """
+    out = bytearray()
+    for arg in args:
+        kind = type(arg)
+        if kind is str:
+            data = arg.encode("utf-8", "backslashreplace")
+            out += _TEMPLATE.pack(_STR, len(data))
+            out += data
+        elif kind is int or kind is float or kind is bool or arg is None:
+            _encode_value(arg, out)
+        else:
+            return None
+    return out
+
+
+class _Truncated(Exception):
+    pass
+
+
+def _decode_value(data: Any, pos: int, strings: Dict[int, str]) -> Tuple[Any, int]:
+    if pos >= len(data):
+        raise _Truncated
+    tag = data[pos]
+    pos += 1
+    if tag == _NONE:
+        return None, pos
+    if tag == _TRUE:
+        return True, pos
+    if tag == _FALSE:
+        return False, pos
+    if tag == _INT:
+        return _I64.unpack_from(data, pos)[0], pos + 8
+    if tag == _FLOAT:
+        return _F64.unpack_from(data, pos)[0], pos + 8
+    if tag == _REF:
+        return strings[_U32.unpack_from(data, pos)[0]], pos + 4
+    length = _U32.unpack_from(data, pos)[0]
+    start, end = pos + 4, pos + 4 + length
+    if end > len(data):
+        raise _Truncated
+    raw = bytes(data[start:end])
+    if tag == _STR:
+        return raw.decode("utf-8", "replace"), end
+    if tag == _BIGINT:
+        return int(raw), end
+    if tag == _JSON:
+        return orjson.loads(raw), end
+    raise ValueError(f"Unknown value tag {tag} at offset {pos - 1}")
+
+
+def decode(
+        data: Any,
+        epoch_ns: bool = False,
+        date_format: str = "%Y-%m-%d %H:%M:%S",
+        skip_corrupt: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Decode a binary log stream into JsonFormatter-style payloads.
+
+    A truncated frame at the end of the data, as left by a crash, ends decoding.
+    A frame that cannot be decoded, such as one referencing a string id or
+    context slot that was never defined, raises ValueError with its offset. With
+    `skip_corrupt`, decoding resumes at the next `MAGIC` instead, where the
+    string table and context slots start over.
+
+    Args:
+        data: The encoded bytes, or a buffer with `find`, such as an mmap.
+        epoch_ns: If True, timestamps are integer nanoseconds since the epoch.
+        date_format: strftime format of timestamps otherwise, in local time.
+        skip_corrupt: If True, corrupt frames are skipped up to the next stream.
+
+    Yields:
+        Dict[str, Any]: One payload per record.
+
+    Raises:
+        ValueError: If a frame is corrupt and `skip_corrupt` is False.
+    """
+    strings: Dict[int, str] = {}
+    contexts: Dict[int, Dict[str, Any]] = {}
+    size = len(data)
+    pos = 0
+    while pos < size:
+        try:
+            payload, end = _decode_frame(data, pos, strings, contexts, epoch_ns, date_format)
+        except (_Truncated, struct.error):
+            return
+        except (KeyError, ValueError) as e:
+            if not skip_corrupt:
+                raise ValueError(f"Corrupt frame at offset {pos}: {e!r}") from e
+            end = data.find(MAGIC, pos + 1)
+            if end < 0:
+                return
+        pos = end
+        if payload is not None:
+            yield payload
+
+
+def _decode_frame(
+        data: Any,
+        pos: int,
+        strings: Dict[int, str],
+        contexts: Dict[int, Dict[str, Any]],
+        epoch_ns: bool,
+        date_format: str,
+) -> Tuple[Optional[Dict[str, Any]], int]:
+    """
+    Decode the frame at `pos`, updating the string table and context slots.
+
+    Returns the payload of a RECORD frame, or None for other frames, and the
+    offset of the next frame.
+    """
+    if data[pos:pos + 4] == MAGIC:
+        strings.clear()
+        contexts.clear()
+        return None, pos + 4
+    kind = data[pos]
+    if kind == _STRING:
+        _, string_id, length = _STRING_HEADER.unpack_from(data, pos)
+        start = pos + _STRING_HEADER.size
+        if start + length > len(data):
+            raise _Truncated
+        strings[string_id] = bytes(data[start:start + length]).decode("utf-8", "replace")
+        return None, start + length
+    if kind == _CONTEXT:
+        _, slot, count = _CONTEXT_HEADER.unpack_from(data, pos)
+        pos += _CONTEXT_HEADER.size
+        context = {}
+        for _ in range(count):
+            name = strings[_U32.unpack_from(data, pos)[0]]
+            context[name], pos = _decode_value(data, pos + 4, strings)
+        contexts[slot] = context
+        return None, pos
+    if kind != _RECORD:
+        raise ValueError(f"Unknown frame type {kind}")
+
+    (_, time_ns, logger_id, level_id, static_slot, context_slot,
+     flags, arg_count) = _RECORD_HEADER.unpack_from(data, pos)
+    pos += _RECORD_HEADER.size
+    template, pos = _decode_value(data, pos, strings)
+    args = []
+    for _ in range(arg_count):
+        value, pos = _decode_value(data, pos, strings)
+        args.append(value)
+    message = template
+    if args:
+        try:
+            message = template % tuple(args)
+        except (TypeError, ValueError):
+            message = f"{template} {args}"
+
+    if epoch_ns:
+        timestamp: Any = time_ns
+    else:
+        timestamp = time.strftime(date_format, time.localtime(time_ns / 1_000_000_000))
+    payload = {
+        "timestamp": timestamp,
+        "logger": strings[logger_id],
+        "level": strings[level_id],
+        "message": message,
+    }
+    if context_slot != _NO_SLOT:
+        payload.update(contexts[context_slot])
+    if static_slot != _NO_SLOT:
+        payload.update(contexts[static_slot])
+    if flags & _HAS_REPEAT:
+        payload["repeat_count"] = _U32.unpack_from(data, pos)[0]
+        pos += 4
+    if flags & _HAS_EXCEPTION:
+        payload["exception"], pos = _decode_value(data, pos, strings)
+    return payload, pos
+
+
+class BinaryFileHandler(BufferedFileHandler):
+    """
+    Buffered file handler that writes the compact binary encoding.
+
+    The handler owns its BinaryFormatter, so each file gets its own string table.
+    Files are appended to and every handler starts a new stream with `MAGIC`, but
+    only one process may write a file at a time: a handler inherited across
+    `os.fork` switches the child to its own file, named after the log file with
+    the child's pid before the extension (`app.lhb` becomes `app.4242.lhb`), with
+    a new stream. Decode with `python -m loghelpers.binary app.lhb`.
+    """
+
+    def __init__(self, filename: str, config: Configuration, **kwargs: Any):
+        """
+        Initialize the handler.
+
+        Args:
+            filename: Path of the log file.
+            config: The logging configuration, used for context and redaction.
+            **kwargs: Buffering options passed to BufferedFileHandler.
+        """
+        super().__init__(filename, **kwargs)
+        self.setFormatter(BinaryFormatter(config))
+
+    def _after_fork(self) -> None:
+        # The parent keeps writing its stream, whose string ids the child must not reuse
+        super()._after_fork()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        root, ext = os.path.splitext(self.baseFilename)
+        self.baseFilename = f"{root}.{os.getpid()}{ext}"
+        self.formatter.reset()
+
+
+def _convert(
+        source: BinaryIO,
+        output: BinaryIO,
+        epoch_ns: bool,
+        date_format: str,
+        skip_corrupt: bool,
+) -> None:
+    try:
+        data: Any = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError, AttributeError):
+        data = source.read()
+    try:
+        for payload in decode(data, epoch_ns, date_format, skip_corrupt):
+            output.write(orjson.dumps(payload, default=str, option=orjson.OPT_APPEND_NEWLINE))
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Convert binary log files to JSON lines on standard output.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m loghelpers.binary",
+        description="Convert loghelpers binary logs to JSON lines.",
+    )
+    parser.add_argument("files", nargs="+", help="Binary log files to decode.")
+    parser.add_argument("--epoch-ns", action="store_true", help="Write timestamps as epoch nanoseconds.")
+    parser.add_argument("--date-format", default="%Y-%m-%d %H:%M:%S", help="strftime format of timestamps.")
+    parser.add_argument(
+        "--skip-corrupt", action="store_true", help="Skip corrupt frames up to the next stream."
+    )
+    args = parser.parse_args(argv)
+
+    output = sys.stdout.buffer
+    for path in args.files:
+        with open(path, "rb") as source:
+            _convert(source, output, args.epoch_ns, args.date_format, args.skip_corrupt)
+    output.flush()
+
+
+if __name__ == "__main__":
+    main()
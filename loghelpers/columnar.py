@@ -0,0 +1,448 @@
+# loghelpers/columnar.py
+"""
+Columnar export of JsonFormatter logs for analytics.
+
+Log lines are parsed once into a `LogTable`: NumPy arrays of timestamps (epoch
+nanoseconds) and level numbers, and a dictionary-encoded `StringColumn` for the
+logger, level name, message and every context key. Tables are saved as `.npz`
+files without pickled objects, and aggregate queries such as counts per level
+and time bucket run vectorized over the code arrays.
+
+NumPy is an optional dependency: `pip install loghelpers[analytics]`.
+"""
+import argparse
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import orjson
+
+from .query import _data_end, _level_number, _open_data, _TimeParser, log_files
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+# Timestamp of rows whose timestamp could not be parsed
+MISSING_TIME = -(2 ** 63)
+
+_CORE_FIELDS = ("logger", "level", "message")
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("Columnar export requires NumPy: pip install loghelpers[analytics]")
+
+
+def _encode_strings(values: Sequence[str]) -> Tuple[Any, Any]:
+    encoded = [value.encode("utf-8", "surrogatepass") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _decode_strings(blob: Any, offsets: Any) -> List[str]:
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[bounds[i]:bounds[i + 1]].decode("utf-8", "surrogatepass") for i in range(len(bounds) - 1)]
+
+
+class StringColumn:
+    """
+    Dictionary-encoded string column.
+
+    `codes` is an int32 array with one entry per row indexing into `values`;
+    -1 marks rows without a value. Non-string values are stored as their JSON text.
+    """
+
+    def __init__(self, codes: Any, values: List[str]):
+        """
+        Initialize the column.
+
+        Args:
+            codes: Code of every row, or -1 for missing values.
+            values: Distinct values, indexed by code.
+        """
+        self.codes = codes
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, row: int) -> Optional[str]:
+        code = int(self.codes[row])
+        return None if code < 0 else self.values[code]
+
+    def code(self, value: str) -> int:
+        """
+        Get the code of a value.
+
+        Args:
+            value: The value.
+
+        Returns:
+            int: The code, or -1 if no row has the value.
+        """
+        try:
+            return self.values.index(value)
+        except ValueError:
+            return -1
+
+    def equals(self, value: str) -> Any:
+        """
+        Get a boolean mask of the rows with a value.
+
+        Args:
+            value: The value.
+
+        Returns:
+            numpy.ndarray: True for every row whose value equals `value`.
+        """
+        code = self.code(value)
+        if code < 0:
+            return np.zeros(len(self.codes), dtype=bool)
+        return self.codes == code
+
+    def to_list(self) -> List[Optional[str]]:
+        """
+        Decode the column.
+
+        Returns:
+            List[Optional[str]]: The value of every row, or None where it is missing.
+        """
+        values = self.values
+        return [None if code < 0 else values[code] for code in self.codes.tolist()]
+
+
+class LogTable:
+    """
+    Columnar view of log records.
+
+    Attributes:
+        timestamp: int64 array of epoch nanoseconds, `MISSING_TIME` where unknown.
+        levelno: int16 array of level numbers, 0 for unknown level names.
+        columns: String columns by name: "logger", "level", "message" and every context key.
+    """
+
+    def __init__(self, timestamp: Any, levelno: Any, columns: Dict[str, StringColumn]):
+        """
+        Initialize the table.
+
+        Args:
+            timestamp: Timestamps in epoch nanoseconds.
+            levelno: Level numbers.
+            columns: String columns, all as long as `timestamp`.
+        """
+        self.timestamp = timestamp
+        self.levelno = levelno
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __getitem__(self, name: str) -> StringColumn:
+        return self.columns[name]
+
+    def between(self, since: Optional[float] = None, until: Optional[float] = None) -> Any:
+        """
+        Get a boolean mask of the rows within a time range.
+
+        Args:
+            since: Earliest timestamp in epoch seconds, inclusive.
+            until: Latest timestamp in epoch seconds, inclusive.
+
+        Returns:
+            numpy.ndarray: True for every row with a known timestamp in the range.
+        """
+        mask = self.timestamp != MISSING_TIME
+        if since is not None:
+            mask &= self.timestamp >= int(since * 1_000_000_000)
+        if until is not None:
+            mask &= self.timestamp <= int(until * 1_000_000_000)
+        return mask
+
+    def select(self, mask: Any) -> "LogTable":
+        """
+        Get the rows selected by a boolean mask or index array.
+
+        Args:
+            mask: Boolean mask or row indices.
+
+        Returns:
+            LogTable: A table sharing the string dictionaries of this one.
+        """
+        return LogTable(
+            self.timestamp[mask],
+            self.levelno[mask],
+            {name: StringColumn(column.codes[mask], column.values) for name, column in self.columns.items()},
+        )
+
+    def count_by(
+            self, column: str, bucket: Optional[float] = None
+    ) -> List[Tuple[Optional[float], Optional[str], int]]:
+        """
+        Count rows per value of a string column, optionally per time bucket.
+
+        Args:
+            column: Name of the string column, such as "level" or "logger".
+            bucket: Bucket width in seconds, aligned to the epoch, or None to count
+                over all rows. Rows without a timestamp are left out of buckets.
+
+        Returns:
+            List[Tuple[Optional[float], Optional[str], int]]: (bucket start in epoch
+            seconds or None, value or None where missing, count) ordered by bucket,
+            then missing values first and other values in order of first appearance.
+        """
+        strings = self.columns.get(column)
+        if strings is None:
+            codes = np.full(len(self), -1, dtype=np.int64)
+            values: List[str] = []
+        else:
+            codes = strings.codes.astype(np.int64)
+            values = strings.values
+        size = len(values) + 1
+        codes += 1
+
+        if bucket is None:
+            counts = np.bincount(codes, minlength=size)
+            return [
+                (None, values[code - 1] if code else None, int(counts[code]))
+                for code in np.flatnonzero(counts).tolist()
+            ]
+
+        width = int(bucket * 1_000_000_000)
+        known = self.timestamp != MISSING_TIME
+        buckets = self.timestamp[known] // width
+        if not len(buckets):
+            return []
+        first = int(buckets.min())
+        keys = (buckets - first) * size + codes[known]
+        unique, counts = np.unique(keys, return_counts=True)
+        return [
+            ((first + key // size) * width / 1_000_000_000,
+             values[key % size - 1] if key % size else None,
+             count)
+            for key, count in zip(unique.tolist(), counts.tolist())
+        ]
+
+    @classmethod
+    def concat(cls, tables: Sequence["LogTable"]) -> "LogTable":
+        """
+        Concatenate tables, merging their string dictionaries.
+
+        Args:
+            tables: Tables in row order.
+
+        Returns:
+            LogTable: The combined table.
+        """
+        _require_numpy()
+        names: List[str] = []
+        for table in tables:
+            names.extend(name for name in table.columns if name not in names)
+        columns = {}
+        for name in names:
+            merged: Dict[str, int] = {}
+            parts = []
+            for table in tables:
+                column = table.columns.get(name)
+                if column is None:
+                    parts.append(np.full(len(table), -1, dtype=np.int32))
+                    continue
+                remap = np.array(
+                    [merged.setdefault(value, len(merged)) for value in column.values] + [-1],
+                    dtype=np.int32,
+                )
+                parts.append(remap[column.codes])
+            columns[name] = StringColumn(
+                np.concatenate(parts) if parts else np.zeros(0, dtype=np.int32), list(merged)
+            )
+        return cls(
+            np.concatenate([t.timestamp for t in tables]) if tables else np.zeros(0, dtype=np.int64),
+            np.concatenate([t.levelno for t in tables]) if tables else np.zeros(0, dtype=np.int16),
+            columns,
+        )
+
+    def save(self, path: str) -> None:
+        """
+        Save the table as an uncompressed `.npz` file that loads without pickle.
+
+        Args:
+            path: Destination path.
+        """
+        names = list(self.columns)
+        arrays = {"timestamp": self.timestamp, "levelno": self.levelno}
+        arrays["names"], arrays["name_offsets"] = _encode_strings(names)
+        for number, name in enumerate(names):
+            column = self.columns[name]
+            arrays[f"codes_{number}"] = column.codes
+            arrays[f"values_{number}"], arrays[f"offsets_{number}"] = _encode_strings(column.values)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "LogTable":
+        """
+        Load a table saved with `save`.
+
+        Args:
+            path: Path of the `.npz` file.
+
+        Returns:
+            LogTable: The table.
+        """
+        _require_numpy()
+        with np.load(path, allow_pickle=False) as arrays:
+            names = _decode_strings(arrays["names"], arrays["name_offsets"])
+            columns = {
+                name: StringColumn(
+                    arrays[f"codes_{number}"],
+                    _decode_strings(arrays[f"values_{number}"], arrays[f"offsets_{number}"]),
+                )
+                for number, name in enumerate(names)
+            }
+            return cls(arrays["timestamp"], arrays["levelno"], columns)
+
+
+class _ColumnBuilder:
+    __slots__ = ("ids", "rows", "codes")
+
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+        self.rows = array("q")
+        self.codes = array("i")
+
+
+def read_file(path: str, date_format: str = "%Y-%m-%d %H:%M:%S") -> LogTable:
+    """
+    Parse a JsonFormatter log file or segment into a table.
+
+    Lines that are not JSON objects are skipped, as is a trailing partial line.
+
+    Args:
+        path: Path of the log file; gzip, bz2 and xz segments are decompressed.
+        date_format: strftime format of string timestamps.
+
+    Returns:
+        LogTable: The records of the file.
+    """
+    _require_numpy()
+    parse = _TimeParser(date_format)
+    timestamps = array("q")
+    levelnos = array("h")
+    builders: Dict[str, _ColumnBuilder] = {}
+    levels: Dict[str, int] = {}
+    row = 0
+    with _open_data(path) as data:
+        end = _data_end(data, 0)
+        pos = 0
+        while pos < end:
+            line_end = data.find(b"\n", pos, end)
+            try:
+                payload = orjson.loads(data[pos:line_end])
+            except orjson.JSONDecodeError:
+                payload = None
+            pos = line_end + 1
+            if not isinstance(payload, dict):
+                continue
+
+            timestamp = parse.nanoseconds(payload.get("timestamp"))
+            timestamps.append(MISSING_TIME if timestamp is None else timestamp)
+            level = payload.get("level")
+            levelno = levels.get(level) if isinstance(level, str) else None
+            if levelno is None:
+                levelno = _level_number(level)
+                if isinstance(level, str):
+                    levels[level] = levelno
+            levelnos.append(levelno)
+            for name, value in payload.items():
+                if name == "timestamp" or value is None:
+                    continue
+                builder = builders.get(name)
+                if builder is None:
+                    builder = builders[name] = _ColumnBuilder()
+                if type(value) is not str:
+                    value = orjson.dumps(value).decode("utf-8")
+                code = builder.ids.get(value)
+                if code is None:
+                    code = builder.ids[value] = len(builder.ids)
+                builder.rows.append(row)
+                builder.codes.append(code)
+            row += 1
+
+    columns = {}
+    for name in _CORE_FIELDS + tuple(name for name in builders if name not in _CORE_FIELDS):
+        builder = builders.get(name) or _ColumnBuilder()
+        codes = np.full(row, -1, dtype=np.int32)
+        codes[np.frombuffer(builder.rows, dtype=np.int64)] = np.frombuffer(builder.codes, dtype=np.int32)
+        columns[name] = StringColumn(codes, list(builder.ids))
+    return LogTable(
+        np.frombuffer(timestamps, dtype=np.int64).copy(),
+        np.frombuffer(levelnos, dtype=np.int16).copy(),
+        columns,
+    )
+
+
+def export(
+        paths: Iterable[str],
+        date_format: str = "%Y-%m-%d %H:%M:%S",
+        processes: Optional[int] = None,
+) -> LogTable:
+    """
+    Parse log files into one table, in parallel across a process pool.
+
+    Args:
+        paths: Log files and segments in row order, typically from `log_files`.
+        date_format: strftime format of string timestamps.
+        processes: Number of worker processes; 1 parses in this process and None
+            uses one per CPU.
+
+    Returns:
+        LogTable: The records of all files.
+    """
+    _require_numpy()
+    paths = list(paths)
+    if processes == 1 or len(paths) <= 1:
+        tables = [read_file(path, date_format) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            tables = list(executor.map(read_file, paths, repeat(date_format)))
+    return LogTable.concat(tables)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Export JSON logs to a columnar `.npz` file and/or print counts per value and time bucket.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m loghelpers.columnar",
+        description="Export loghelpers JSON logs to columnar arrays and aggregate them.",
+    )
+    parser.add_argument("files", nargs="+",
+                        help="Log files, including their rotated segments, or a single saved .npz table.")
+    parser.add_argument("--output", help="Save the table to this .npz file.")
+    parser.add_argument("--count-by", help="String column to count, such as level or logger.")
+    parser.add_argument("--bucket", type=float, help="Time bucket width in seconds for --count-by.")
+    parser.add_argument("--date-format", default="%Y-%m-%d %H:%M:%S", help="strftime format of timestamps.")
+    parser.add_argument("--processes", type=int, help="Number of worker processes.")
+    args = parser.parse_args(argv)
+    if not args.output and not args.count_by:
+        parser.error("Pass --output, --count-by or both.")
+
+    if len(args.files) == 1 and args.files[0].endswith(".npz"):
+        table = LogTable.load(args.files[0])
+    else:
+        table = export(log_files(args.files), args.date_format, args.processes)
+    if args.output:
+        table.save(args.output)
+    if args.count_by:
+        for start, value, count in table.count_by(args.count_by, args.bucket):
+            row = {"bucket": start, args.count_by: value, "count": count}
+            sys.stdout.buffer.write(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE))
+        sys.stdout.buffer.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ import logging
 from dataclasses import dataclass, field
 from pathlib import Path
 from threading import RLock
-from typing import Optional, Any, Set
+from typing import Optional, Any, Dict, List, Set
 
 from .exceptions import (
     InvalidConfigurationKeyException,
@@ -139,12 +139,46 @@ class Configuration:
     log_file: str = str(Path(get_root_path()) / "app.log")
     log_format: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     date_format: str = "%Y-%m-%d %H:%M:%S"
+    timestamp_format: str = "string"
+    timestamp_msecs: bool = False
+    json_fast_path: bool = False
     sample_rate: float = 1.0
+    sample_mode: str = "uniform"
+    sample_key: str = "request_id"
+    sample_level_rates: Dict[str, float] = field(default_factory=dict)
+    sample_keep_level: str = "ERROR"
+    target_lines_per_second: Optional[float] = None
+    rate_limit: Optional[float] = None
+    rate_limit_burst: int = 10
+    rate_limit_max_keys: int = 10000
+    async_logging: bool = False
+    queue_size: int = 10000
+    overflow_policy: str = "block"
+    file_sink: str = "rotating"
+    mmap_segment_size: int = 64 * 1024 * 1024
+    rotation_max_bytes: int = 5 * 1024 * 1024
+    rotation_interval: Optional[float] = None
+    rotation_backup_count: int = 3
+    rotation_compression: str = "none"
+    rotation_max_total_bytes: Optional[int] = None
+    rotation_index_keys: Optional[List[str]] = None
+    buffer_size: int = 64 * 1024
+    flush_interval: float = 1.0
+    flush_level: str = "ERROR"
+    fsync_policy: str = "never"
+    fsync_interval: float = 1.0
+    aggregator_socket: Optional[str] = None
+    flight_recorder_size: int = 0
+    flight_recorder_key: str = "request_id"
+    flight_recorder_max_contexts: int = 1000
+    flight_recorder_level: str = "TRACE"
     redactor: Redactor = field(default_factory=lambda: Redactor(
         sensitive_keys=SENSITIVE_KEYS,
         redact_value_patterns=SENSITIVE_PATTERNS
     ))
     _lock: RLock = field(default_factory=RLock, init=False, repr=False)
+    _sampling_filter: Any = field(default=None, init=False, repr=False)
+    _rate_limit_filter: Any = field(default=None, init=False, repr=False)
 
     def __post_init__(self):
         """
@@ -176,7 +210,7 @@ class Configuration:
         with self._lock:
             if not isinstance(key, str):
                 raise ValueError("Sensitive key must be a string.")
-            self.redactor.sensitive_keys.add(key)
+            self.redactor.add_sensitive_key(key)
 
     def update_log_level(self, level: str) -> None:
         with self._lock:
@@ -257,7 +291,64 @@ class Configuration:
         if self.sample_rate < 0.0 or self.sample_rate > 1.0:
             raise ValueError("Sample rate must be between 0.0 and 1.0.")
 
-        if not isinstance(self._sensitive_keys, set):
+        if self.timestamp_format not in ("string", "epoch_ns"):
+            raise ValueError(f"Invalid timestamp format: {self.timestamp_format}")
+
+        if self.sample_mode not in ("uniform", "context_key"):
+            raise ValueError(f"Invalid sample mode: {self.sample_mode}")
+
+        if any(rate < 0.0 or rate > 1.0 for rate in self.sample_level_rates.values()):
+            raise ValueError("Per-level sample rates must be between 0.0 and 1.0.")
+
+        if self.target_lines_per_second is not None and self.target_lines_per_second <= 0:
+            raise ValueError("Target lines per second must be positive.")
+
+        if self.rate_limit is not None and self.rate_limit <= 0:
+            raise ValueError("Rate limit must be positive.")
+
+        if self.queue_size <= 0:
+            raise ValueError("Queue size must be a positive integer.")
+
+        if self.overflow_policy not in ("block", "drop_oldest", "drop_newest", "sample"):
+            raise ValueError(f"Invalid overflow policy: {self.overflow_policy}")
+
+        if self.file_sink not in ("rotating", "buffered", "mmap", "binary"):
+            raise ValueError(f"Invalid file sink: {self.file_sink}")
+
+        if not isinstance(logging.getLevelName(str(self.flush_level).upper()), int):
+            raise ValueError(f"Invalid flush level: {self.flush_level}")
+
+        if self.fsync_policy not in ("never", "batch", "interval"):
+            raise ValueError(f"Invalid fsync policy: {self.fsync_policy}")
+
+        if self.mmap_segment_size <= 0:
+            raise ValueError("Mmap segment size must be a positive integer.")
+
+        if self.rotation_compression not in ("none", "gzip", "bz2", "lzma"):
+            raise ValueError(f"Invalid rotation compression: {self.rotation_compression}")
+
+        if self.rotation_max_bytes < 0 or self.rotation_backup_count < 0:
+            raise ValueError("Rotation size and backup count must not be negative.")
+
+        if self.rotation_interval is not None and self.rotation_interval <= 0:
+            raise ValueError("Rotation interval must be positive.")
+
+        if self.rotation_max_total_bytes is not None and self.rotation_max_total_bytes <= 0:
+            raise ValueError("Rotation retention size must be positive.")
+
+        if self.rotation_index_keys is not None and (
+                not isinstance(self.rotation_index_keys, list)
+                or not all(isinstance(key, str) for key in self.rotation_index_keys)
+        ):
+            raise ValueError("Rotation index keys must be a list of strings.")
+
+        if self.flight_recorder_size < 0 or self.flight_recorder_max_contexts <= 0:
+            raise ValueError("Flight recorder size and max contexts must be positive.")
+
+        if not isinstance(logging.getLevelName(str(self.flight_recorder_level).upper()), int):
+            raise ValueError(f"Invalid flight recorder level: {self.flight_recorder_level}")
+
+        if not isinstance(self.sensitive_keys, set):
             raise ValueError("Sensitive keys must be a set.")
 
         if not isinstance(self.log_level, str):
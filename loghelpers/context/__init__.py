@@ -1,11 +1,15 @@
 # loghelpers/context/__init__.py
 import contextvars
+import logging
 from contextlib import contextmanager
-from typing import Dict, Generator
+from typing import Dict, Generator, Mapping, Optional, Tuple
 
 from ..config import Feature, Configuration
+from ..context.cache import ProviderCache
+from ..context.context_map import EMPTY_CONTEXT, ContextMap
 from ..context.default_provider import DefaultProvider
-from ..context.registry import ContextProviders
+from ..context.protocols import CachePolicy, cache_policy
+from ..context.registry import ContextProviders, ProviderSnapshot
 from ..exceptions import ProviderExecutionException, DuplicateProviderKeyException
 
 ContextProviders.register("default", DefaultProvider())
@@ -28,9 +32,14 @@ class LoggingContext:
     A context-local storage for managing contextual data in logs.
 
     Uses `contextvars` to ensure proper behavior in both threaded and async environments.
+    The active context is an immutable `ContextMap`, so setting values layers them on
+    top of the current map instead of copying it.
     """
 
-    _context_var: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar("log_context")
+    _context_var: contextvars.ContextVar[ContextMap] = contextvars.ContextVar("log_context")
+    RECORD_ATTRIBUTE = "_loghelpers_context"
+    _provider_cache = ProviderCache()
+    _static_context: Optional[Tuple[int, Dict[str, str]]] = None
 
     @classmethod
     def set_context(cls, **kwargs: str) -> None:
@@ -40,9 +49,7 @@ class LoggingContext:
         Args:
             **kwargs: Key-value pairs to set in the logging context.
         """
-        context = cls.get_context().copy()
-        context.update(kwargs)
-        cls._context_var.set(context)
+        cls._context_var.set(cls._active().new_child(kwargs))
 
     @classmethod
     def get_context(cls) -> Dict[str, str]:
@@ -50,19 +57,35 @@ class LoggingContext:
         Get the current context.
 
         Returns:
-            A dictionary representing the current logging context.
+            A dictionary with a copy of the current logging context. Changing it
+            does not change the context.
         """
-        try:
-            return cls._context_var.get()
-        except LookupError:
-            return {}
+        return cls._active().copy()
+
+    @classmethod
+    def _active(cls) -> ContextMap:
+        return cls._context_var.get(EMPTY_CONTEXT)
+
+    @classmethod
+    def bind(cls, record: logging.LogRecord) -> None:
+        """
+        Attach the current context to a log record.
+
+        Records that are formatted on another thread (for example by a queue-backed
+        handler) carry the producer's context with them instead of the writer's.
+
+        Args:
+            record: The log record to bind the current context to.
+        """
+        if not hasattr(record, cls.RECORD_ATTRIBUTE):
+            setattr(record, cls.RECORD_ATTRIBUTE, cls._active())
 
     @classmethod
     def clear_context(cls) -> None:
         """
         Clear all context variables.
         """
-        cls._context_var.set({})
+        cls._context_var.set(EMPTY_CONTEXT)
 
     @classmethod
     @contextmanager
@@ -76,42 +99,100 @@ class LoggingContext:
         Yields:
             None
         """
-        token = cls._context_var.set({**cls._context_var.get(), **kwargs})
+        token = cls._context_var.set(cls._active().new_child(kwargs))
         try:
             yield
         finally:
             cls._context_var.reset(token)
 
-    def resolve_context(self, config: Configuration) -> Dict[str, str]:
+    def resolve_context(
+            self,
+            config: Configuration,
+            record: Optional[logging.LogRecord] = None,
+            include_static: bool = True
+    ) -> Mapping[str, str]:
         """
         Return the merged context from current values and registered providers.
 
-        Does not mutate the active context.
+        Does not mutate the active context. Provider results are layered on top of
+        the active `ContextMap`, so the context values themselves are not copied.
+        While the registry and the provider results stay the same, every record
+        logged with the same active map gets the same merged map, so its merged
+        view is only built once.
 
         Args:
             config: The logging configuration.
+            record: Optional record whose bound context is used instead of the active one.
+            include_static: If False, providers declared `CachePolicy.STATIC` are skipped;
+                see `resolve_static_context`.
 
         Returns:
-            A merged context dictionary.
+            A merged, read-only context mapping.
         """
-        base_context = self.get_context().copy()
-        providers = ContextProviders.gather()
-
-        print(providers, config.features)
-
-        for name, provider in providers.items():
+        bound = getattr(record, self.RECORD_ATTRIBUTE, None) if record is not None else None
+        active = self._context_var.get(None) if bound is None else bound
+        base_context = active if active is not None else EMPTY_CONTEXT
+        provided: Dict[str, str] = {}
+        snapshot = ContextProviders.snapshot()
+        cache = self._provider_cache
+
+        for name, provider, policy, ttl in snapshot.entries:
+            if not include_static and policy is CachePolicy.STATIC:
+                continue
             try:
-                result = provider()
+                result = cache.resolve(snapshot.version, name, provider, policy, ttl, active)
             except Exception as e:
                 raise ProviderExecutionException(name, e)
+            self._merge(config, name, provided, result, base_context)
 
-            for key, value in result.items():
-                if key not in base_context:
-                    base_context[key] = value
-                elif config.features.is_enabled(Feature.MUTABLE_PROVIDER_KEYS):
-                    base_context[key] = value
-                else:
-                    raise DuplicateProviderKeyException(name, key)
+        return base_context.overlay(snapshot.version, provided)
 
-        return base_context
+    def resolve_static_context(self, config: Configuration) -> Tuple[int, Dict[str, str]]:
+        """
+        Return the merged results of providers declared `CachePolicy.STATIC`.
+
+        The result only changes when the provider registry does, so callers can
+        cache anything derived from it (such as serialized output) per version.
+
+        Args:
+            config: The logging configuration.
+
+        Returns:
+            Tuple[int, Dict[str, str]]: The registry snapshot version and the merged context.
+        """
+        snapshot = ContextProviders.snapshot()
+        cached = LoggingContext._static_context
+        if cached is not None and cached[0] == snapshot.version:
+            return cached
+
+        merged: Dict[str, str] = {}
+        for name, provider, policy, ttl in snapshot.entries:
+            if policy is not CachePolicy.STATIC:
+                continue
+            try:
+                result = self._provider_cache.resolve(
+                    snapshot.version, name, provider, policy, ttl, None
+                )
+            except Exception as e:
+                raise ProviderExecutionException(name, e)
+            self._merge(config, name, merged, result)
+
+        LoggingContext._static_context = (snapshot.version, merged)
+        return snapshot.version, merged
+
+    @staticmethod
+    def _merge(
+            config: Configuration,
+            name: str,
+            context: Dict[str, str],
+            result: Dict[str, str],
+            base: Mapping[str, str] = EMPTY_CONTEXT
+    ) -> None:
+        for key, value in result.items():
+            if key not in context and key not in base:
+                context[key] = value
+            elif config.features.is_enabled(Feature.MUTABLE_PROVIDER_KEYS):
+                context[key] = value
+            else:
+                raise DuplicateProviderKeyException(name, key)
 
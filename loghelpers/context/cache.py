@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from .protocols import CachePolicy, ProviderProtocol
+
+
+class _Entry(NamedTuple):
+    value: Dict[str, str]
+    context: Any
+    expires: float
+
+
+class ProviderCache:
+    """
+    Caches context provider results according to their declared `CachePolicy`.
+
+    Entries are tied to a registry snapshot version, so registering or removing a
+    provider invalidates everything that was cached for the previous registry.
+    `CachePolicy.PER_CONTEXT` results are kept for the `CONTEXT_CACHE_SIZE` most
+    recently used contexts of each provider, keyed by context identity, so
+    threads and tasks that alternate between contexts keep their hits.
+
+    Providers are invoked outside the lock; if two threads miss at the same time
+    both invoke the provider and the later result is kept.
+    """
+
+    CONTEXT_CACHE_SIZE = 64
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = -1
+        self._entries: Dict[str, _Entry] = {}
+        self._contexts: Dict[str, "OrderedDict[int, _Entry]"] = {}
+
+    def clear(self) -> None:
+        """
+        Drop all cached provider results.
+        """
+        with self._lock:
+            self._entries = {}
+            self._contexts = {}
+
+    def resolve(
+            self,
+            version: int,
+            name: str,
+            provider: ProviderProtocol,
+            policy: CachePolicy,
+            ttl: float,
+            context: Optional[Any],
+    ) -> Dict[str, str]:
+        """
+        Return the provider result, invoking the provider only when the cache misses.
+
+        Args:
+            version: The registry snapshot version the provider belongs to.
+            name: The registered provider name.
+            provider: The provider to invoke on a miss.
+            policy: The cache policy of the provider.
+            ttl: Seconds a result stays valid for `CachePolicy.TTL`.
+            context: The active context mapping, used by `CachePolicy.PER_CONTEXT`.
+
+        Returns:
+            Dict[str, str]: The provider result.
+        """
+        if policy is CachePolicy.NONE:
+            return provider()
+        if policy is CachePolicy.PER_CONTEXT:
+            return self._resolve_per_context(version, name, provider, context)
+
+        now = 0.0
+        if policy is CachePolicy.TTL:
+            now = time.monotonic()
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(name)
+        if entry is not None:
+            if policy is CachePolicy.STATIC:
+                return entry.value
+            if policy is CachePolicy.TTL and now < entry.expires:
+                return entry.value
+
+        value = provider()
+        with self._lock:
+            if self._version == version:
+                self._entries[name] = _Entry(value, None, now + ttl)
+        return value
+
+    def _resolve_per_context(
+            self,
+            version: int,
+            name: str,
+            provider: ProviderProtocol,
+            context: Optional[Any],
+    ) -> Dict[str, str]:
+        key = id(context)
+        with self._lock:
+            self._check_version(version)
+            entries = self._contexts.get(name)
+            if entries is None:
+                entries = self._contexts[name] = OrderedDict()
+            entry = entries.get(key)
+            # id() values are reused once a context is collected, so check identity
+            if entry is not None and entry.context is context:
+                entries.move_to_end(key)
+                return entry.value
+
+        value = provider()
+        with self._lock:
+            if self._version == version:
+                entries[key] = _Entry(value, context, 0.0)
+                entries.move_to_end(key)
+                if len(entries) > self.CONTEXT_CACHE_SIZE:
+                    entries.popitem(last=False)
+        return value
+
+    def _check_version(self, version: int) -> None:
+        if version != self._version:
+            self._entries = {}
+            self._contexts = {}
+            self._version = version
+
+
+def describe_provider(provider: ProviderProtocol) -> Tuple[CachePolicy, float]:
+    """
+    Read the cache declaration of a provider.
+
+    Args:
+        provider: The context provider.
+
+    Returns:
+        Tuple[CachePolicy, float]: The declared cache policy and TTL.
+    """
+    policy = CachePolicy(getattr(provider, "cache_policy", CachePolicy.NONE))
+    return policy, float(getattr(provider, "cache_ttl", 0.0) or 0.0)
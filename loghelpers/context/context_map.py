@@ -0,0 +1,156 @@
+from typing import Any, Dict, Hashable, Iterator, Mapping, Optional, Tuple
+
+# Chains deeper than this are collapsed into a single layer when extended, which
+# bounds lookups while keeping nested `context()` blocks O(1) in the common case.
+MAX_DEPTH = 32
+
+
+class ContextMap(Mapping[str, str]):
+    """
+    Immutable mapping of context values built from chained layers.
+
+    `new_child` adds a layer on top of an existing map without copying it, so
+    setting context costs O(number of new keys) regardless of how much context
+    is already active. Lookups walk the layers from newest to oldest. The merged
+    view is materialized at most once per map and reused by every record that
+    is logged with it, which is safe because maps are never mutated.
+    """
+    __slots__ = ("_layer", "_parent", "_depth", "_flat", "_overlay")
+
+    def __init__(self, layer: Optional[Dict[str, str]] = None, parent: Optional["ContextMap"] = None):
+        """
+        Initialize the map.
+
+        Args:
+            layer: Values of this layer. The dictionary is owned by the map afterwards.
+            parent: Map whose values are visible unless shadowed by `layer`.
+        """
+        self._layer: Dict[str, str] = layer if layer is not None else {}
+        self._parent = parent
+        self._depth = parent._depth + 1 if parent is not None else 0
+        self._flat: Optional[Dict[str, str]] = None if parent is not None else self._layer
+        self._overlay: Optional[Tuple[Hashable, Dict[str, str], "ContextMap"]] = None
+
+    def new_child(self, values: Dict[str, str]) -> "ContextMap":
+        """
+        Return a new map with `values` layered on top of this one.
+
+        Args:
+            values: Key-value pairs overriding the values of this map.
+
+        Returns:
+            ContextMap: The extended map. This map is returned unchanged if `values` is empty.
+        """
+        if not values:
+            return self
+        if self._depth >= MAX_DEPTH:
+            flat = dict(self.flatten())
+            flat.update(values)
+            return ContextMap(flat)
+        return ContextMap(dict(values), self)
+
+    def overlay(self, key: Hashable, values: Dict[str, str]) -> "ContextMap":
+        """
+        Return `new_child(values)`, reusing the previous result for the same key and values.
+
+        Used for values that are layered on top of the map for every record, such
+        as provider results, so the merged view of the result is built once and
+        not once per record.
+
+        Args:
+            key: Identifies where the values came from, for example a registry version.
+            values: Key-value pairs overriding the values of this map.
+
+        Returns:
+            ContextMap: The extended map.
+        """
+        if not values:
+            return self
+        cached = self._overlay
+        if cached is not None and cached[0] == key and cached[1] == values:
+            return cached[2]
+        child = self.new_child(values)
+        self._overlay = (key, values, child)
+        return child
+
+    def flatten(self) -> Mapping[str, str]:
+        """
+        Get the merged view of all layers.
+
+        Returns:
+            Mapping[str, str]: A dictionary that must not be modified.
+        """
+        flat = self._flat
+        if flat is None:
+            layers = []
+            node: Optional[ContextMap] = self
+            while node is not None and node._flat is None:
+                layers.append(node._layer)
+                node = node._parent
+            flat = dict(node._flat) if node is not None else {}
+            for layer in reversed(layers):
+                flat.update(layer)
+            self._flat = flat
+        return flat
+
+    def copy(self) -> Dict[str, str]:
+        """
+        Get a mutable copy of the merged values.
+
+        Returns:
+            Dict[str, str]: The merged values.
+        """
+        return dict(self.flatten())
+
+    def __getitem__(self, key: str) -> str:
+        flat = self._flat
+        if flat is not None:
+            return flat[key]
+        node: Optional[ContextMap] = self
+        while node is not None:
+            layer = node._layer
+            if key in layer:
+                return layer[key]
+            node = node._parent
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: object) -> bool:
+        try:
+            self[key]  # type: ignore[index]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.flatten())
+
+    def __len__(self) -> int:
+        return len(self.flatten())
+
+    def keys(self):
+        return self.flatten().keys()
+
+    def items(self):
+        return self.flatten().items()
+
+    def values(self):
+        return self.flatten().values()
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ContextMap):
+            other = other.flatten()
+        return self.flatten() == other
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"ContextMap({dict(self.flatten())!r})"
+
+
+EMPTY_CONTEXT = ContextMap()
@@ -4,12 +4,18 @@ import os
 import sys
 from typing import Dict
 
+from .protocols import CachePolicy
+
 
 class DefaultProvider:
     """
     Default context provider that returns an empty dictionary.
     This can be used when no specific context is needed.
+
+    Its values do not change during the lifetime of the process, so it is
+    declared static and only invoked once per registry version.
     """
+    cache_policy = CachePolicy.STATIC
 
     def __call__(self) -> Dict[str, str]:
         """
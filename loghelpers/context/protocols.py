@@ -1,7 +1,21 @@
 # loghelpers/context/protocols.py
+import enum
 from typing import runtime_checkable, Protocol, Dict
 
 
+class CachePolicy(enum.Enum):
+    """
+    Enum describing how long the result of a context provider may be reused.
+
+    Providers declare a policy through a `cache_policy` attribute (and `cache_ttl`
+    in seconds for `TTL`). Providers without the attribute are called for every record.
+    """
+    NONE = "none"
+    STATIC = "static"
+    PER_CONTEXT = "per_context"
+    TTL = "ttl"
+
+
 @runtime_checkable
 class ProviderProtocol(Protocol):
     """
@@ -17,3 +31,24 @@ class ProviderProtocol(Protocol):
             Dict[str, str]: A dictionary containing context data.
         """
         raise NotImplementedError("Context providers must implement the __call__ method.")
+
+
+def cache_policy(policy: CachePolicy, ttl: float = 0.0):
+    """
+    Decorator declaring the cache policy of a context provider.
+
+    Args:
+        policy (CachePolicy): The cache policy of the provider.
+        ttl (float): Seconds a result stays valid when using `CachePolicy.TTL`.
+
+    Returns:
+        Callable: A decorator that sets `cache_policy` and `cache_ttl` on the provider.
+    """
+    if policy is CachePolicy.TTL and ttl <= 0:
+        raise ValueError("TTL cached providers need a positive ttl.")
+
+    def decorator(provider):
+        provider.cache_policy = policy
+        provider.cache_ttl = ttl
+        return provider
+    return decorator
@@ -1,16 +1,30 @@
 # loghelpers/context/registry.py
 from contextlib import contextmanager
 from threading import RLock
-from typing import Dict
+from types import MappingProxyType
+from typing import Dict, Mapping, NamedTuple, Tuple
 
 from . import DefaultProvider
-from .protocols import ProviderProtocol
+from .cache import describe_provider
+from .protocols import CachePolicy, ProviderProtocol
 from ..exceptions import (
     InvalidProviderNameException, InvalidProviderException, DuplicateProviderException,
     ProviderNotFoundException
 )
 
 
+class ProviderSnapshot(NamedTuple):
+    """
+    Immutable view of the registry at a given version.
+
+    `entries` holds `(name, provider, cache_policy, cache_ttl)` tuples in
+    registration order so the hot path does not need to inspect providers.
+    """
+    version: int
+    providers: Mapping[str, ProviderProtocol]
+    entries: Tuple[Tuple[str, ProviderProtocol, CachePolicy, float], ...]
+
+
 class ContextProviders:
     """
     A class to manage context providers for logging.
@@ -18,6 +32,35 @@ class ContextProviders:
     """
     _lock = RLock()
     _providers = {}
+    _snapshot = ProviderSnapshot(0, MappingProxyType({}), ())
+
+    @classmethod
+    def _publish(cls) -> None:
+        """
+        Rebuild the immutable snapshot. Must be called with the lock held.
+        """
+        providers = dict(cls._providers)
+        cls._snapshot = ProviderSnapshot(
+            cls._snapshot.version + 1,
+            MappingProxyType(providers),
+            tuple(
+                (name, provider) + describe_provider(provider)
+                for name, provider in providers.items()
+            ),
+        )
+
+    @classmethod
+    def snapshot(cls) -> ProviderSnapshot:
+        """
+        Get the current immutable, versioned snapshot of the registry.
+
+        Reading the snapshot takes no lock and copies nothing; every mutation of
+        the registry publishes a new snapshot with a higher version.
+
+        Returns:
+            ProviderSnapshot: The current registry snapshot.
+        """
+        return cls._snapshot
 
     @classmethod
     def register(cls, name: str, provider: ProviderProtocol, override: bool = False) -> None:
@@ -40,6 +83,7 @@ class ContextProviders:
 
         with cls._lock:
             cls._providers[name] = provider
+            cls._publish()
 
     @classmethod
     def unregister(cls, name: str) -> None:
@@ -51,6 +95,7 @@ class ContextProviders:
         with cls._lock:
             if name in cls._providers:
                 del cls._providers[name]
+                cls._publish()
             else:
                 raise ProviderNotFoundException(name)
 
@@ -91,6 +136,7 @@ class ContextProviders:
         """
         with cls._lock:
             cls._providers.clear()
+            cls._publish()
 
     @classmethod
     def reset(cls) -> None:
@@ -101,6 +147,7 @@ class ContextProviders:
             cls._providers = {
                 "default": DefaultProvider(),
             }
+            cls._publish()
 
     @classmethod
     def has(cls, name: str) -> bool:
@@ -121,11 +168,12 @@ class ContextProviders:
         """
         Gather all registered context providers and return them as a dictionary.
 
+        Prefer `snapshot()` on hot paths; it avoids building a new dictionary.
+
         Returns:
             Dict[str, ProviderProtocol]: A dictionary of all registered context providers.
         """
-        with cls._lock:
-            return cls._providers.copy()
+        return dict(cls._snapshot.providers)
 
     @classmethod
     @contextmanager
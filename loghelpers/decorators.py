@@ -1,46 +1,262 @@
 # loghelpers/decorators.py
+import copy
 import logging
 import functools
+import inspect
+import reprlib
+import threading
+import time
 from contextlib import ContextDecorator
-from typing import Optional
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+
+_LEVEL_OVERRIDES: "ContextVar[Optional[Dict[str, int]]]" = ContextVar(
+    "loghelpers_level_overrides", default=None
+)
+LEVEL_OVERRIDE_ATTRIBUTE = "_loghelpers_level_override"
+
+
+def _override_for(name: str, overrides: Dict[str, int]) -> Optional[Tuple[str, int]]:
+    """
+    Find the override for a logger name, falling back to its ancestors.
+
+    Returns:
+        The name of the overridden logger and its level, or None.
+    """
+    if name == "root":
+        name = ""
+    while True:
+        level = overrides.get(name)
+        if level is not None:
+            return name, level
+        if not name:
+            return None
+        name = name.rpartition(".")[0]
+
+
+_original_is_enabled_for = logging.Logger.isEnabledFor
+_original_call_handlers = logging.Logger.callHandlers
+_patch_lock = threading.Lock()
+_active_overrides = 0
+
+
+def _is_enabled_for(self: logging.Logger, level: int) -> bool:
+    overrides = _LEVEL_OVERRIDES.get()
+    if overrides is not None:
+        match = _override_for(self.name, overrides)
+        if match is not None:
+            if self.disabled or self.manager.disable >= level:
+                return False
+            return level >= match[1]
+    return _original_is_enabled_for(self, level)
+
+
+def _call_handlers(self: logging.Logger, record: logging.LogRecord) -> None:
+    overrides = _LEVEL_OVERRIDES.get()
+    match = _override_for(self.name, overrides) if overrides is not None else None
+    if match is None:
+        return _original_call_handlers(self, record)
+
+    # Same walk as logging.Logger.callHandlers, with the levels of handlers on the
+    # overridden logger and its descendants capped by the override. Handlers of
+    # ancestors keep their own levels. The override is stored on the record for
+    # handlers that dispatch on another thread, and removed from the copy that
+    # ancestors receive.
+    scope, override = match
+    prefix = scope + "."
+    record.__dict__[LEVEL_OVERRIDE_ATTRIBUTE] = override
+    logger: Optional[logging.Logger] = self
+    in_scope = True
+    found = 0
+    while logger:
+        if in_scope and scope and logger.name != scope and not logger.name.startswith(prefix):
+            in_scope = False
+        for handler in logger.handlers:
+            found += 1
+            if in_scope:
+                if record.levelno >= min(handler.level, override):
+                    handler.handle(record)
+            elif record.levelno >= handler.level:
+                if LEVEL_OVERRIDE_ATTRIBUTE in record.__dict__:
+                    record = copy.copy(record)
+                    del record.__dict__[LEVEL_OVERRIDE_ATTRIBUTE]
+                handler.handle(record)
+        logger = logger.parent if logger.propagate else None
+    if not found:
+        _original_call_handlers(self, record)
+
+
+def _install_patch() -> None:
+    global _active_overrides
+    with _patch_lock:
+        _active_overrides += 1
+        if _active_overrides == 1:
+            logging.Logger.isEnabledFor = _is_enabled_for
+            logging.Logger.callHandlers = _call_handlers
+
+
+def _remove_patch() -> None:
+    global _active_overrides
+    with _patch_lock:
+        _active_overrides -= 1
+        if _active_overrides == 0:
+            logging.Logger.isEnabledFor = _original_is_enabled_for
+            logging.Logger.callHandlers = _original_call_handlers
 
 
 class temporary_level(ContextDecorator):
-    """Temporarily set logging level for a logger or handlers."""
+    """
+    Temporarily override the logging level in the current context only.
+
+    The override lives in a `ContextVar`, so it applies to the current thread or
+    asyncio task and the loggers below `logger_name` (all loggers if omitted),
+    without touching shared logger or handler levels. Handlers of those loggers
+    accept records down to the override; handlers of their ancestors keep their
+    own levels.
+
+    `logging.Logger.isEnabledFor` and `callHandlers` are only patched while at
+    least one override is active anywhere in the process. During that time every
+    logger pays a context variable lookup; otherwise logging is untouched. Tasks
+    that outlive the block that created them lose its override when it exits.
+    """
     def __init__(self, level: int, logger_name: Optional[str] = None):
         self.level = level
-        self.logger = logging.getLogger(logger_name) if logger_name else logging.getLogger()
-        self.old_level = self.logger.level if hasattr(self.logger, 'level') else logging.NOTSET
+        self.logger_name = logger_name or ""
+        self._token = None
+
+    def _recreate_cm(self):
+        return temporary_level(self.level, self.logger_name)
 
     def __enter__(self):
-        self.old_levels = [h.level for h in self.logger.handlers]
-        self.logger.setLevel(self.level)
-        for h in self.logger.handlers:
-            h.setLevel(self.level)
+        overrides = dict(_LEVEL_OVERRIDES.get() or {})
+        overrides[self.logger_name] = self.level
+        self._token = _LEVEL_OVERRIDES.set(overrides)
+        _install_patch()
+        return self
 
     def __exit__(self, exc_type, exc, tb):
-        for handler, old in zip(self.logger.handlers, self.old_levels):
-            handler.setLevel(old)
-        if hasattr(self.logger, 'level'):
-            self.logger.setLevel(self.old_level)
+        _remove_patch()
+        _LEVEL_OVERRIDES.reset(self._token)
+        self._token = None
+
+
+class LazyMessage:
+    """
+    Log message that is rendered on first use.
+
+    `logging.LogRecord.getMessage` calls `str()` on the message, so rendering is
+    deferred until a handler actually formats the record.
+    """
+    __slots__ = ("_render", "_args", "_text")
+
+    def __init__(self, render: Callable[..., str], *args: Any):
+        self._render = render
+        self._args = args
+        self._text: Optional[str] = None
+
+    @property
+    def key(self) -> Callable[..., str]:
+        """
+        Get the render function, which identifies the call site that created the message.
+        """
+        return self._render
+
+    def __str__(self) -> str:
+        if self._text is None:
+            self._text = self._render(*self._args)
+            self._args = ()
+        return self._text
+
+    def __repr__(self) -> str:
+        return str(self)
+
 
+def _make_repr(max_repr: Optional[int]) -> Callable[[Any], str]:
+    if max_repr is None:
+        return repr
+    limited = reprlib.Repr()
+    limited.maxstring = limited.maxother = limited.maxlong = max_repr
+
+    def short_repr(value: Any) -> str:
+        text = limited.repr(value)
+        return text if len(text) <= max_repr else text[:max_repr - 3] + "..."
+    return short_repr
+
+
+def log_calls(
+        level: int = None,
+        injected_logger: logging.Logger = None,
+        *,
+        max_repr: Optional[int] = None,
+        include_args: Optional[Iterable[str]] = None,
+        timing: bool = False
+):
+    """
+    Decorator to log function calls with entry and exit messages.
+
+    Nothing is rendered unless the logger is enabled for `level`, and messages
+    are rendered lazily when a handler formats them.
+
+    Args:
+        level: Level to log entry and exit at. Defaults to the logger's level.
+        injected_logger: Logger to use. Defaults to the logger of the function's module.
+        max_repr: Maximum length of the repr of each argument and the return value.
+        include_args: Names of the parameters to log. All arguments are logged if None.
+        timing: If True, the exit message includes the call duration.
+    """
+    allowed = None if include_args is None else frozenset(include_args)
+    short_repr = _make_repr(max_repr)
 
-def log_calls(level: int = None, injected_logger: logging.Logger = None):
-    """Decorator to log function calls with entry and exit messages."""
     def decorator(fn):
         logger = injected_logger or logging.getLogger(fn.__module__)
         lvl = level or logger.level
+        name = fn.__name__
+        signature = inspect.signature(fn) if allowed is not None else None
+
+        def render_enter(args: tuple, kwargs: dict) -> str:
+            if signature is not None:
+                try:
+                    arguments = signature.bind_partial(*args, **kwargs).arguments
+                except TypeError:
+                    arguments = {}
+                shown = ", ".join(
+                    f"{key}={short_repr(value)}"
+                    for key, value in arguments.items() if key in allowed
+                )
+                return f"→ Enter {name} {shown}"
+            if max_repr is None:
+                return f"→ Enter {name} args={args} kwargs={kwargs}"
+            shown_args = ", ".join(short_repr(arg) for arg in args)
+            shown_kwargs = ", ".join(f"{key!r}: {short_repr(value)}" for key, value in kwargs.items())
+            return f"→ Enter {name} args=({shown_args}) kwargs={{{shown_kwargs}}}"
+
+        def render_exit(result: Any, elapsed: Optional[float]) -> str:
+            message = f"← Exit {name} returned={short_repr(result)}"
+            if elapsed is not None:
+                message += f" in {elapsed * 1000:.3f}ms"
+            return message
 
         @functools.wraps(fn)
         def wrapper(*args, **kwargs):
-            logger.log(lvl, f"→ Enter {fn.__name__} args={args} kwargs={kwargs}")
+            if not logger.isEnabledFor(lvl):
+                # Entry and exit are skipped, but exceptions are still logged
+                try:
+                    return fn(*args, **kwargs)
+                except Exception:
+                    logger.exception(f"‼ Exception in {name}")
+                    raise
+
+            logger.log(lvl, LazyMessage(render_enter, args, kwargs))
+            start = time.perf_counter() if timing else None
             try:
                 result = fn(*args, **kwargs)
             except Exception as e:
-                logger.exception(f"‼ Exception in {fn.__name__}")
+                logger.exception(f"‼ Exception in {name}")
                 raise
             else:
-                logger.log(lvl, f"← Exit {fn.__name__} returned={result!r}")
+                elapsed = time.perf_counter() - start if start is not None else None
+                logger.log(lvl, LazyMessage(render_exit, result, elapsed))
                 return result
 
         return wrapper
@@ -1,5 +1,7 @@
 # loghelpers/formatters.py
 import logging
+import time
+from typing import Any, Dict, FrozenSet, Optional, Tuple, Union
 
 import orjson
 
@@ -8,32 +10,182 @@ from .context import LoggingContext
 from .utils import BatchForegroundColors, BatchBackgroundColors
 
 
-class JsonFormatter(logging.Formatter):
-    """Formats LogRecord into a JSON string."""
-    def __init__(self, config: Configuration):
+# Fields the fast path writes from pre-serialized fragments without redaction
+_SAFE_FIELDS = frozenset(("timestamp", "logger", "level"))
+_DYNAMIC_FIELDS = frozenset(("message", "repeat_count", "exception"))
+_FRAGMENT_CACHE_SIZE = 1024
+
+
+class CachedTimeMixin:
+    """
+    Formatter mixin that caches the strftime output for the current second.
+
+    `formatTime` produces the same output as `logging.Formatter.formatTime`, but
+    only calls strftime when the second or the date format changes; milliseconds
+    are appended to the cached prefix with a single string format.
+    """
+    _time_cache: Optional[Tuple[int, Optional[str], str]] = None
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        seconds = int(record.created)
+        cached = self._time_cache
+        if cached is None or cached[0] != seconds or cached[1] != datefmt:
+            ct = self.converter(seconds)
+            prefix = time.strftime(datefmt or self.default_time_format, ct)
+            cached = self._time_cache = (seconds, datefmt, prefix)
+        if datefmt or not self.default_msec_format:
+            return cached[2]
+        return self.default_msec_format % (cached[2], record.msecs)
+
+
+class JsonFormatter(CachedTimeMixin, logging.Formatter):
+    """
+    Formats LogRecord into a JSON string.
+
+    In fast-path mode the timestamp, logger and level fields are written from
+    pre-serialized fragments and skip redaction, and the context of static
+    providers is redacted and serialized once per registry version. Only the
+    message, the remaining context and the exception are redacted per record.
+    `format_bytes` returns newline terminated bytes for sinks that write bytes
+    directly.
+
+    With `Configuration.timestamp_format` set to "epoch_ns" the timestamp is
+    written as integer nanoseconds since the epoch instead of a formatted string.
+    """
+    def __init__(self, config: Configuration, fast_path: Optional[bool] = None):
         super().__init__(
             fmt=config.log_format,
             datefmt=config.date_format
         )
         self.config = config
         self.context = LoggingContext()
+        self.fast_path = config.json_fast_path if fast_path is None else fast_path
+        self.epoch_ns = config.timestamp_format == "epoch_ns"
+        self._logger_fragments: Dict[str, bytes] = {}
+        self._level_fragments: Dict[int, bytes] = {}
+        self._static_cache: Optional[Tuple[int, Any, Optional[FrozenSet[str]], bytes]] = None
 
     def format(self, record: logging.LogRecord) -> str:
+        if self.fast_path:
+            return self._serialize_fast(record, 0).decode()
+        return orjson.dumps(self._redacted_payload(record)).decode()
+
+    def format_bytes(self, record: logging.LogRecord) -> bytes:
+        """
+        Format a record as newline terminated UTF-8 JSON.
+
+        Sinks that write bytes use this to skip the decode/encode round trip of `format`.
+
+        Args:
+            record: The log record to format.
+
+        Returns:
+            bytes: The serialized record followed by a newline.
+        """
+        if self.fast_path:
+            return self._serialize_fast(record, orjson.OPT_APPEND_NEWLINE)
+        return orjson.dumps(self._redacted_payload(record), option=orjson.OPT_APPEND_NEWLINE)
+
+    def _serialize_fast(self, record: logging.LogRecord, option: int) -> bytes:
+        static_keys, static_fragment = self._static_fragment()
+        context = self.context.resolve_context(self.config, record, include_static=False)
+        if static_keys is None or not (
+                _SAFE_FIELDS.isdisjoint(context) and static_keys.isdisjoint(context)
+        ):
+            return orjson.dumps(self._redacted_payload(record), option=option)
+
+        dynamic: Dict[str, Any] = {"message": record.getMessage()}
+        dynamic.update(context)
+        repeat_count = getattr(record, "repeat_count", None)
+        if repeat_count:
+            dynamic["repeat_count"] = repeat_count
+        if record.exc_info:
+            dynamic["exception"] = self.formatException(record.exc_info)
+        body = orjson.dumps(self.config.redactor.redact(dynamic))
+
+        logger_fragment = self._logger_fragments.get(record.name)
+        if logger_fragment is None:
+            if len(self._logger_fragments) >= _FRAGMENT_CACHE_SIZE:
+                self._logger_fragments.clear()
+            logger_fragment = self._logger_fragments[record.name] = (
+                b',"logger":' + orjson.dumps(record.name)
+            )
+        level_fragment = self._level_fragments.get(record.levelno)
+        if level_fragment is None:
+            level_fragment = self._level_fragments[record.levelno] = (
+                b',"level":' + orjson.dumps(record.levelname) + b","
+            )
+
+        return b"".join((
+            b'{"timestamp":',
+            orjson.dumps(self.timestamp(record)),
+            logger_fragment,
+            level_fragment,
+            memoryview(body)[1:-1],
+            static_fragment,
+            b"}\n" if option & orjson.OPT_APPEND_NEWLINE else b"}",
+        ))
+
+    def _static_fragment(self) -> Tuple[Optional[FrozenSet[str]], bytes]:
+        """
+        Get the redacted, pre-serialized context of static providers.
+
+        The fragment is rebuilt only when the provider registry or the redaction
+        plan changes. Returns None as keys if static keys collide with fields
+        the fast path writes itself, which forces the regular path.
+        """
+        version, static_context = self.context.resolve_static_context(self.config)
+        plan = self.config.redactor.compile()
+        cached = self._static_cache
+        if cached is not None and cached[0] == version and cached[1] is plan:
+            return cached[2], cached[3]
+
+        keys: Optional[FrozenSet[str]] = frozenset(static_context)
+        fragment = b""
+        if not keys.isdisjoint(_SAFE_FIELDS | _DYNAMIC_FIELDS):
+            keys = None
+        elif static_context:
+            fragment = b"," + orjson.dumps(self.config.redactor.redact(static_context))[1:-1]
+        self._static_cache = (version, plan, keys, fragment)
+        return keys, fragment
+
+    def timestamp(self, record: logging.LogRecord) -> Union[str, int]:
+        """
+        Get the timestamp field of a record.
+
+        Args:
+            record: The log record.
+
+        Returns:
+            Union[str, int]: Epoch nanoseconds in "epoch_ns" mode, otherwise the
+            formatted time, with milliseconds if `Configuration.timestamp_msecs` is set.
+        """
+        if self.epoch_ns:
+            return int(record.created * 1_000_000_000)
+        formatted = self.formatTime(record, self.datefmt)
+        if self.config.timestamp_msecs:
+            return "%s.%03d" % (formatted, record.msecs)
+        return formatted
+
+    def _redacted_payload(self, record: logging.LogRecord) -> Dict[str, Any]:
         payload = {
-            "timestamp": self.formatTime(record, self.datefmt),
+            "timestamp": self.timestamp(record),
             "logger": record.name,
             "level": record.levelname,
             "message": record.getMessage(),
         }
         payload.update(
-            self.context.resolve_context(self.config)
+            self.context.resolve_context(self.config, record)
         )
+        repeat_count = getattr(record, "repeat_count", None)
+        if repeat_count:
+            payload["repeat_count"] = repeat_count
         if record.exc_info:
             payload["exception"] = self.formatException(record.exc_info)
-        return orjson.dumps(self.config.redactor.redact(payload)).decode()
+        return self.config.redactor.redact(payload)
 
 
-class ColorFormatter(logging.Formatter):
+class ColorFormatter(CachedTimeMixin, logging.Formatter):
     """Adds ANSI color codes based on level."""
     COLORS = {
         logging.DEBUG: BatchForegroundColors.BLUE.value,
@@ -1,11 +1,24 @@
+import functools
 import importlib
 import logging
 import os
 from logging import Handler, StreamHandler
+from typing import Optional
 from logging.handlers import RotatingFileHandler
 
+from .aggregation import AggregatingHandler
+from .binary import BinaryFileHandler
 from .config import Configuration
+from .decorators import LazyMessage
 from .formatters import ColorFormatter, JsonFormatter
+from .pipeline import AsyncPipelineHandler, OverflowPolicy
+from .query import build_index
+from .ratelimit import RateLimitFilter
+from .rotation import Compression, SegmentRotatingFileHandler
+from .recorder import FlightRecorderHandler
+from .sampling import AdaptiveSamplingFilter, SamplingFilter, SamplingMode
+from .shm import SharedMemoryHandler
+from .sinks import BufferedFileHandler, FsyncPolicy, MmapSegmentHandler
 from .utils import get_root_path
 
 
@@ -17,50 +30,286 @@ class SensitiveDataFilter(logging.Filter):
     def filter(self, record: logging.LogRecord) -> bool:
         if isinstance(record.msg, str):
             record.msg = self.redactor.redact(record.msg)
+        elif isinstance(record.msg, LazyMessage):
+            record.msg = self.redactor.redact(str(record.msg))
         return True
 
 
-def create_console_handler(config: Configuration) -> Handler:
+def create_console_handler(
+        config: Configuration,
+        fmt: str = "[{levelname}] {message}",
+        style: str = "{",
+) -> Handler:
     """
     Create and configure a console log handler.
 
     Args:
         config (Configuration): Configuration object with log level and format settings.
+        fmt (str): Format string of the ColorFormatter.
+        style (str): Style of `fmt`, one of "%", "{" or "$".
 
     Returns:
-        Handler: Configured StreamHandler with ColorFormatter.
+        Handler: Configured StreamHandler with ColorFormatter, wrapped in an
+        AsyncPipelineHandler when `config.async_logging` is enabled.
     """
     handler = StreamHandler()
     handler.setLevel(config.log_level)
-    handler.setFormatter(ColorFormatter(fmt="[{levelname}] {message}", style="{"))
+    handler.setFormatter(ColorFormatter(fmt=fmt, datefmt=config.date_format, style=style))
     handler.addFilter(SensitiveDataFilter(config))
-    return handler
+    return _finalize_handler(config, handler)
 
 
 def create_file_handler(config: Configuration) -> Handler:
     """
     Create and configure a file log handler with rotation support and JSON formatting.
 
+    `config.file_sink` selects the sink: "rotating" for a RotatingFileHandler,
+    "buffered" for a write-coalescing BufferedFileHandler, "mmap" for a
+    MmapSegmentHandler writing preallocated, memory-mapped segments or "binary"
+    for a BinaryFileHandler writing the compact binary encoding instead of JSON. When
+    `config.aggregator_socket` is set, records are shipped to a LogAggregator
+    process that owns the file instead. A positive `config.flight_recorder_size`
+    keeps records below `config.log_level` in a FlightRecorderHandler and writes
+    them only when an error occurs in the same context.
+
     Args:
         config (Configuration): Configuration object with log file path and log level.
 
     Returns:
-        Handler: Configured FileHandler or RotatingFileHandler with JsonFormatter.
+        Handler: Configured file sink (see `create_file_sink`) or AggregatingHandler
+        with JsonFormatter, optionally behind a FlightRecorderHandler, and wrapped in an
+        AsyncPipelineHandler when `config.async_logging` is enabled.
+    """
+    handler: Handler
+    if config.aggregator_socket:
+        handler = AggregatingHandler(
+            config.aggregator_socket,
+            buffer_size=config.buffer_size,
+            flush_interval=config.flush_interval,
+            flush_level=_flush_level(config),
+        )
+    else:
+        handler = create_file_sink(config)
+    handler.setLevel(config.log_level)
+    if not isinstance(handler, BinaryFileHandler):
+        handler.setFormatter(JsonFormatter(config))
+    handler.addFilter(SensitiveDataFilter(config))
+    if config.flight_recorder_size:
+        handler = FlightRecorderHandler(
+            handler,
+            capacity=config.flight_recorder_size,
+            key=config.flight_recorder_key,
+            max_contexts=config.flight_recorder_max_contexts,
+            pass_level=handler.level,
+        )
+        # The sink keeps its level; the recorder admits the history it exists to keep
+        handler.setLevel(min(_flight_recorder_level(config), handler.pass_level))
+    return _finalize_handler(config, handler)
+
+
+def create_file_sink(config: Configuration) -> Handler:
+    """
+    Create the bare file sink selected by `config.file_sink`, without formatter or filters.
+
+    The "rotating" sink is a RotatingFileHandler unless time-based rotation,
+    compression, a total size limit or indexing is configured, in which case a
+    SegmentRotatingFileHandler rotates with a single rename and compresses and
+    prunes segments on a background thread. The "mmap" sink applies the same
+    compression and retention settings to its sealed segments. With
+    `config.rotation_index_keys` set, finished segments also get a sidecar index
+    for `loghelpers.query`.
+
+    Args:
+        config (Configuration): Configuration object with log file and sink settings.
+
+    Returns:
+        Handler: A RotatingFileHandler, SegmentRotatingFileHandler, BufferedFileHandler,
+        MmapSegmentHandler or BinaryFileHandler.
     """
     log_path = config.log_file or os.path.join(get_root_path(), "app.log")
     os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    on_segment = None
+    if config.rotation_index_keys is not None:
+        on_segment = functools.partial(
+            build_index, keys=config.rotation_index_keys, date_format=config.date_format
+        )
 
-    handler: Handler = RotatingFileHandler(
+    if config.file_sink == "binary":
+        return BinaryFileHandler(
+            log_path,
+            config,
+            buffer_size=config.buffer_size,
+            flush_interval=config.flush_interval,
+            flush_level=_flush_level(config),
+            fsync_policy=FsyncPolicy(config.fsync_policy),
+            fsync_interval=config.fsync_interval,
+        )
+    if config.file_sink == "buffered":
+        return BufferedFileHandler(
+            filename=log_path,
+            buffer_size=config.buffer_size,
+            flush_interval=config.flush_interval,
+            flush_level=_flush_level(config),
+            fsync_policy=FsyncPolicy(config.fsync_policy),
+            fsync_interval=config.fsync_interval,
+            encoding="utf-8",
+            delay=True,
+        )
+    if config.file_sink == "mmap":
+        return MmapSegmentHandler(
+            filename=log_path,
+            segment_size=config.mmap_segment_size,
+            backup_count=config.rotation_backup_count,
+            compression=Compression(config.rotation_compression),
+            max_total_bytes=config.rotation_max_total_bytes,
+            encoding="utf-8",
+            on_segment=on_segment,
+        )
+    if (
+            config.rotation_interval is not None
+            or config.rotation_compression != "none"
+            or config.rotation_max_total_bytes is not None
+            or on_segment is not None
+    ):
+        return SegmentRotatingFileHandler(
+            filename=log_path,
+            max_bytes=config.rotation_max_bytes,
+            interval=config.rotation_interval,
+            backup_count=config.rotation_backup_count,
+            compression=Compression(config.rotation_compression),
+            max_total_bytes=config.rotation_max_total_bytes,
+            encoding="utf-8",
+            delay=True,
+            on_segment=on_segment,
+        )
+    return RotatingFileHandler(
         filename=log_path,
         mode="a",
-        maxBytes=5 * 1024 * 1024,  # 5 MB
-        backupCount=3,
+        maxBytes=config.rotation_max_bytes,
+        backupCount=config.rotation_backup_count,
         encoding="utf-8",
         delay=True,
     )
-    handler.setLevel(config.log_level)
-    handler.setFormatter(JsonFormatter(config))
-    handler.addFilter(SensitiveDataFilter(config))
+
+
+def create_async_handler(config: Configuration, *handlers: Handler) -> Handler:
+    """
+    Create a queue-backed handler that runs the given sinks on a writer thread.
+
+    Producers only enqueue records; filtering, redaction, formatting and I/O of
+    every sink happen on a single dedicated thread. The pipeline admits every
+    level accepted by at least one sink.
+
+    Args:
+        config (Configuration): Configuration object with queue settings.
+        *handlers (Handler): Sink handlers to run on the writer thread.
+
+    Returns:
+        Handler: Configured AsyncPipelineHandler.
+    """
+    handler = AsyncPipelineHandler(
+        handlers,
+        queue_size=config.queue_size,
+        overflow_policy=OverflowPolicy(config.overflow_policy),
+        flush_interval=config.flush_interval,
+    )
+    handler.setLevel(min((h.level for h in handlers), default=logging.getLevelName(config.log_level)))
+    return handler
+
+
+def create_sampling_filter(config: Configuration) -> SamplingFilter:
+    """
+    Create a sampling filter from the sampling settings of a configuration.
+
+    When `config.target_lines_per_second` is set, an AdaptiveSamplingFilter is
+    returned instead. It is shared by every handler created from the same
+    configuration so a single controller scales `config.sample_rate` for all of them.
+
+    Args:
+        config (Configuration): Configuration object with sampling settings.
+
+    Returns:
+        SamplingFilter: Filter that drops records according to `config.sample_rate`.
+    """
+    with config._lock:
+        if config.target_lines_per_second is None:
+            return SamplingFilter(config, **_sampling_options(config))
+        if config._sampling_filter is None:
+            config._sampling_filter = AdaptiveSamplingFilter(
+                config, config.target_lines_per_second, **_sampling_options(config)
+            )
+        return config._sampling_filter
+
+
+def create_rate_limit_filter(config: Configuration) -> Optional[RateLimitFilter]:
+    """
+    Create the per-call-site rate limit filter of a configuration.
+
+    The filter is shared by every handler created from the same configuration,
+    so call-site bookkeeping is kept once.
+
+    Args:
+        config (Configuration): Configuration object with rate limit settings.
+
+    Returns:
+        Optional[RateLimitFilter]: The shared filter, or None if `config.rate_limit` is unset.
+    """
+    with config._lock:
+        if config.rate_limit is None:
+            return None
+        if config._rate_limit_filter is None:
+            config._rate_limit_filter = RateLimitFilter(
+                config.rate_limit,
+                burst=config.rate_limit_burst,
+                max_keys=config.rate_limit_max_keys,
+                flush_interval=config.flush_interval,
+            )
+        return config._rate_limit_filter
+
+
+def _flush_level(config: Configuration) -> int:
+    level = logging.getLevelName(config.flush_level.upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Invalid flush level: {config.flush_level}")
+    return level
+
+
+def _flight_recorder_level(config: Configuration) -> int:
+    level = logging.getLevelName(config.flight_recorder_level.upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Invalid flight recorder level: {config.flight_recorder_level}")
+    return level
+
+
+def _sampling_options(config: Configuration) -> dict:
+    return dict(
+        mode=SamplingMode(config.sample_mode),
+        key=config.sample_key,
+        level_rates={
+            logging.getLevelName(name.upper()): rate
+            for name, rate in config.sample_level_rates.items()
+        },
+        keep_level=logging.getLevelName(config.sample_keep_level.upper()),
+    )
+
+
+def _finalize_handler(config: Configuration, handler: Handler) -> Handler:
+    """
+    Wrap a sink in the async pipeline if configured and put sampling first.
+
+    Sampling and rate limiting run ahead of every other filter, and on the
+    producer side of an async pipeline, so dropped records are never redacted,
+    queued or formatted.
+    """
+    if config.async_logging:
+        handler = create_async_handler(config, handler)
+    sampling_filter = create_sampling_filter(config)
+    if isinstance(sampling_filter, AdaptiveSamplingFilter):
+        sampling_filter.watch(handler)
+    handler.filters.insert(0, sampling_filter)
+    rate_limit_filter = create_rate_limit_filter(config)
+    if rate_limit_filter is not None:
+        handler.filters.insert(1, rate_limit_filter)
     return handler
 
 
@@ -0,0 +1,385 @@
+# loghelpers/metrics.py
+"""
+Opt-in self-instrumentation of the logging pipeline.
+
+`enable_metrics` wraps the pipeline stages in place; until then nothing is
+measured and the stages run unwrapped. Measurements go to per-thread shards of
+counters and `Histogram`s that are only merged by `MetricsRegistry.snapshot`,
+so recording threads never wait for each other. Metrics, all prefixed with `loghelpers_`:
+
+    record_seconds               histogram  time in Logger.handle per record
+    filter_seconds               histogram  time in loghelpers filters, by filter
+    records_filtered_total       counter    records rejected by loghelpers filters, by filter
+    redaction_seconds            histogram  time in Redactor.redact
+    context_seconds              histogram  time resolving context
+    serialization_seconds        histogram  time in formatters, by formatter
+    io_seconds                   histogram  time in a handler outside the above, by handler
+    records_emitted_total        counter    records passed to a handler's emit, by handler
+    records_dropped_total        counter    records rejected by a handler's filters, by handler
+    bytes_written_total          counter    encoded size of formatted records, by handler
+    queue_depth                  gauge      queued records of async pipelines, by handler
+    handler_dropped_records_total
+                                 counter    records a handler dropped itself, such as on
+                                            queue overflow, by handler
+
+Handlers are labelled with their name, or their class name if they have none.
+`render_prometheus` formats a snapshot in the Prometheus text exposition format
+and `start_metrics_server` serves it over HTTP.
+"""
+import functools
+import http.server
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .profiling import Histogram, _collect_shards, _Shard
+
+PREFIX = "loghelpers_"
+
+# Upper bounds in seconds of the exported histogram buckets
+BUCKET_BOUNDS = [
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0,
+]
+
+_HELP = {
+    "record_seconds": ("histogram", "Time spent in Logger.handle per record."),
+    "filter_seconds": ("histogram", "Time spent in loghelpers filters."),
+    "records_filtered_total": ("counter", "Records rejected by loghelpers filters."),
+    "redaction_seconds": ("histogram", "Time spent redacting."),
+    "context_seconds": ("histogram", "Time spent resolving context."),
+    "serialization_seconds": ("histogram", "Time spent formatting records."),
+    "io_seconds": ("histogram", "Time spent in handlers outside filters, redaction, context and formatting."),
+    "records_emitted_total": ("counter", "Records emitted by handlers."),
+    "records_dropped_total": ("counter", "Records rejected by handler filters."),
+    "bytes_written_total": ("counter", "Encoded size in bytes of records formatted by handlers."),
+    "queue_depth": ("gauge", "Records waiting in async pipeline queues."),
+    "handler_dropped_records_total": ("counter", "Records dropped by handlers on overflow or failure."),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _handler_label(handler: logging.Handler) -> str:
+    return handler.name or type(handler).__name__
+
+
+class MetricsRegistry:
+    """
+    Sharded counters and histograms of the logging pipeline.
+
+    Every thread records into its own shard under a lock that only merges
+    contend for.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._frames = threading.local()
+        self._handlers: "weakref.WeakSet[logging.Handler]" = weakref.WeakSet()
+        self._patched: List[Tuple[type, str, Any]] = []
+
+    def _shard(self) -> _Shard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def increment(self, name: str, value: int = 1, labels: Labels = ()) -> None:
+        """
+        Add to a counter.
+
+        Args:
+            name: Metric name without prefix.
+            value: Amount to add.
+            labels: Label name and value pairs.
+        """
+        shard = self._shard()
+        key = (name, labels)
+        with shard.lock:
+            shard.data[key] = shard.data.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        """
+        Record a value in a histogram.
+
+        Args:
+            name: Metric name without prefix.
+            value: The value, usually seconds.
+            labels: Label name and value pairs.
+        """
+        shard = self._shard()
+        key = (name, labels)
+        with shard.lock:
+            histogram = shard.data.get(key)
+            if histogram is None:
+                histogram = shard.data[key] = Histogram()
+            histogram.record(value)
+
+    def _merge(self, reset: bool) -> Dict[Tuple[str, Labels], Any]:
+        merged: Dict[Tuple[str, Labels], Any] = {}
+        for shard in _collect_shards(self, reset):
+            with shard.lock:
+                for key, value in shard.data.items():
+                    if isinstance(value, Histogram):
+                        target = merged.get(key)
+                        if target is None:
+                            target = merged[key] = Histogram()
+                        target.merge(value)
+                    else:
+                        merged[key] = merged.get(key, 0) + value
+                if reset:
+                    shard.data = {}
+
+        for handler in list(self._handlers):
+            labels = (("handler", _handler_label(handler)),)
+            queue = getattr(handler, "queue", None)
+            if hasattr(queue, "qsize"):
+                try:
+                    depth = queue.qsize()
+                except (NotImplementedError, OSError):
+                    depth = 0
+                key = ("queue_depth", labels)
+                merged[key] = merged.get(key, 0) + depth
+            dropped = getattr(handler, "dropped", None)
+            if isinstance(dropped, int):
+                key = ("handler_dropped_records_total", labels)
+                merged[key] = merged.get(key, 0) + dropped
+        return merged
+
+    def snapshot(self, reset: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Merge all shards.
+
+        Args:
+            reset: If True, counters and histograms are cleared after merging.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Per metric name, one entry per label
+            set with its "labels" and either its "value" or the histogram summary.
+        """
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        for (name, labels), value in sorted(self._merge(reset).items(), key=lambda item: item[0]):
+            entry: Dict[str, Any] = {"labels": dict(labels)}
+            if isinstance(value, Histogram):
+                entry.update(value.summary())
+            else:
+                entry["value"] = value
+            result.setdefault(name, []).append(entry)
+        return result
+
+    def render_prometheus(self) -> str:
+        """
+        Format the current metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text.
+        """
+        lines: List[str] = []
+        declared = set()
+        for (name, labels), value in sorted(self._merge(False).items(), key=lambda item: item[0]):
+            metric = PREFIX + name
+            if name not in declared:
+                declared.add(name)
+                kind, text = _HELP.get(name, ("untyped", name))
+                lines.append(f"# HELP {metric} {text}")
+                lines.append(f"# TYPE {metric} {kind}")
+            if isinstance(value, Histogram):
+                for bound, count in zip(BUCKET_BOUNDS, value.cumulative(BUCKET_BOUNDS)):
+                    lines.append(f"{metric}_bucket{_format_labels(labels + (('le', repr(bound)),))} {count}")
+                lines.append(f"{metric}_bucket{_format_labels(labels + (('le', '+Inf'),))} {value.count}")
+                lines.append(f"{metric}_sum{_format_labels(labels)} {value.total!r}")
+                lines.append(f"{metric}_count{_format_labels(labels)} {value.count}")
+            else:
+                lines.append(f"{metric}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """
+        Discard all recorded counters and histograms.
+        """
+        self._merge(True)
+
+    def enable(self) -> None:
+        """
+        Start measuring by wrapping the pipeline stages. Does nothing if already enabled.
+        """
+        from .binary import BinaryFormatter
+        from .context import LoggingContext
+        from .formatters import ColorFormatter, JsonFormatter
+        from .handlers import SensitiveDataFilter
+        from .pipeline import AsyncPipelineHandler
+        from .ratelimit import RateLimitFilter
+        from .redaction import Redactor
+        from .sampling import SamplingFilter
+
+        with self._lock:
+            if self.enabled:
+                return
+            self._wrap(logging.Logger, "handle", "record", self._finish_record)
+            for cls in (SensitiveDataFilter, SamplingFilter, RateLimitFilter):
+                self._wrap(cls, "filter", "filter", self._finish_filter)
+            self._wrap(Redactor, "redact", "redaction", self._finish_redaction)
+            self._wrap(LoggingContext, "resolve_context", "context", self._finish_context)
+            for cls, attribute in (
+                    (JsonFormatter, "format"), (JsonFormatter, "format_bytes"),
+                    (ColorFormatter, "format"), (BinaryFormatter, "format_bytes"),
+            ):
+                self._wrap(cls, attribute, "serialization", self._finish_serialization)
+            for cls in (logging.Handler, AsyncPipelineHandler):
+                self._wrap(cls, "handle", "handler", self._finish_handler)
+            self.enabled = True
+
+    def disable(self) -> None:
+        """
+        Stop measuring and restore the unwrapped pipeline stages. Recorded data is kept.
+        """
+        with self._lock:
+            for owner, attribute, original in reversed(self._patched):
+                setattr(owner, attribute, original)
+            self._patched = []
+            self.enabled = False
+
+    def _wrap(self, owner: type, attribute: str, kind: str, finish: Callable[..., None]) -> None:
+        original = owner.__dict__[attribute]
+        frames = self._frames
+        perf_counter = time.perf_counter
+
+        @functools.wraps(original)
+        def wrapper(instance, *args, **kwargs):
+            # Frames hold [kind, instance, seconds spent in nested measured calls]
+            stack = getattr(frames, "stack", None)
+            if stack is None:
+                stack = frames.stack = []
+            elif stack and stack[-1][0] == kind and kind != "handler":
+                # Nested calls of the same stage, such as format calling format_bytes
+                return original(instance, *args, **kwargs)
+            frame = [kind, instance, 0.0]
+            stack.append(frame)
+            start = perf_counter()
+            try:
+                result = original(instance, *args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                stack.pop()
+                if stack:
+                    stack[-1][2] += elapsed
+            finish(instance, result, elapsed, elapsed - frame[2], stack)
+            return result
+
+        setattr(owner, attribute, wrapper)
+        self._patched.append((owner, attribute, original))
+
+    def _finish_record(self, instance, result, elapsed, own, stack) -> None:
+        self.observe("record_seconds", elapsed)
+
+    def _finish_redaction(self, instance, result, elapsed, own, stack) -> None:
+        self.observe("redaction_seconds", elapsed)
+
+    def _finish_context(self, instance, result, elapsed, own, stack) -> None:
+        self.observe("context_seconds", elapsed)
+
+    def _finish_filter(self, instance, result, elapsed, own, stack) -> None:
+        labels = (("filter", type(instance).__name__),)
+        self.observe("filter_seconds", elapsed, labels)
+        if not result:
+            self.increment("records_filtered_total", 1, labels)
+
+    def _finish_serialization(self, instance, result, elapsed, own, stack) -> None:
+        self.observe("serialization_seconds", elapsed, (("formatter", type(instance).__name__),))
+        for frame in reversed(stack):
+            if frame[0] == "handler":
+                handler = frame[1]
+                if isinstance(result, str):
+                    encoding = getattr(handler, "encoding", None) or "utf-8"
+                    size = len(result.encode(encoding, "replace")) + 1
+                else:
+                    size = len(result)
+                self.increment("bytes_written_total", size, (("handler", _handler_label(handler)),))
+                break
+
+    def _finish_handler(self, instance, result, elapsed, own, stack) -> None:
+        self._handlers.add(instance)
+        labels = (("handler", _handler_label(instance)),)
+        self.observe("io_seconds", own, labels)
+        self.increment("records_emitted_total" if result else "records_dropped_total", 1, labels)
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = (
+        name + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in labels
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+METRICS = MetricsRegistry()
+
+
+def enable_metrics() -> MetricsRegistry:
+    """
+    Start measuring the logging pipeline in this process.
+
+    Returns:
+        MetricsRegistry: The process-wide registry.
+    """
+    METRICS.enable()
+    return METRICS
+
+
+def disable_metrics() -> None:
+    """
+    Stop measuring the logging pipeline. Recorded data is kept.
+    """
+    METRICS.disable()
+
+
+class _MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+    registry: MetricsRegistry = METRICS
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Scrapes must not feed back into the pipeline being measured
+        pass
+
+
+def start_metrics_server(
+        port: int = 9464, address: str = "127.0.0.1", registry: Optional[MetricsRegistry] = None
+) -> http.server.ThreadingHTTPServer:
+    """
+    Serve the metrics in the Prometheus text format on a daemon thread.
+
+    Metrics are only recorded once `enable_metrics` has been called.
+
+    Args:
+        port: TCP port to listen on, or 0 for any free port.
+        address: Address to bind; the default only accepts local connections.
+        registry: Registry to serve. Defaults to the process-wide registry.
+
+    Returns:
+        ThreadingHTTPServer: The running server; call `shutdown` to stop it.
+    """
+    handler = type("MetricsRequestHandler", (_MetricsRequestHandler,), {"registry": registry or METRICS})
+    server = http.server.ThreadingHTTPServer((address, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="loghelpers-metrics", daemon=True).start()
+    return server
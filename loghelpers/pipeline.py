@@ -0,0 +1,223 @@
+import enum
+import logging
+import queue
+import random
+import threading
+from typing import Iterable, List, Optional
+
+from .context import LoggingContext
+from .decorators import LEVEL_OVERRIDE_ATTRIBUTE
+from .utils import reinit_after_fork
+
+_SENTINEL = None
+
+
+class OverflowPolicy(enum.Enum):
+    """
+    Enum describing what a full pipeline queue does with incoming records.
+    """
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    SAMPLE = "sample"
+
+
+class AsyncPipelineHandler(logging.Handler):
+    """
+    Hands records to a bounded queue that is drained by a dedicated writer thread.
+
+    Producers only bind the current logging context to the record and enqueue it.
+    Filtering (including redaction), formatting and I/O run on the writer thread
+    through the wrapped sink handlers, so callers never wait on disk latency unless
+    the `BLOCK` policy is selected and the queue is full.
+
+    Records at or above `priority_level` are never dropped by the `DROP_NEWEST` and
+    `SAMPLE` policies; they evict the oldest queued record instead.
+
+    The pipeline is fork-safe: a forked child gets a fresh queue and writer thread,
+    and records queued in the parent are left to the parent.
+    """
+
+    def __init__(
+            self,
+            handlers: Iterable[logging.Handler],
+            queue_size: int = 10000,
+            overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+            sample_rate: float = 0.1,
+            high_watermark: float = 0.8,
+            priority_level: int = logging.ERROR,
+            flush_interval: float = 1.0,
+    ):
+        """
+        Initialize the pipeline and start its writer thread.
+
+        Args:
+            handlers: Sink handlers run on the writer thread.
+            queue_size: Maximum number of queued records.
+            overflow_policy: What to do with records when the queue is full.
+            sample_rate: Fraction of records admitted above the high watermark
+                when using the `SAMPLE` policy.
+            high_watermark: Queue fill ratio at which the `SAMPLE` policy kicks in.
+            priority_level: Records at or above this level are never sampled away.
+            flush_interval: Seconds of idleness after which the sinks are flushed.
+        """
+        super().__init__()
+        if queue_size <= 0:
+            raise ValueError("Queue size must be a positive integer.")
+        self.handlers: List[logging.Handler] = list(handlers)
+        self.queue_size = queue_size
+        self.overflow_policy = OverflowPolicy(overflow_policy)
+        self.sample_rate = sample_rate
+        self.high_watermark = int(queue_size * high_watermark)
+        self.priority_level = priority_level
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._drop_lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[logging.LogRecord]]" = queue.Queue(queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self.start()
+        reinit_after_fork(self)
+
+    @property
+    def queue(self) -> "queue.Queue[Optional[logging.LogRecord]]":
+        """
+        Get the queue feeding the writer thread.
+
+        Returns:
+            queue.Queue: The bounded record queue.
+        """
+        return self._queue
+
+    def start(self) -> None:
+        """
+        Start the writer thread if it is not already running.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="loghelpers-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _after_fork(self) -> None:
+        self.createLock()
+        self.dropped = 0
+        self._drop_lock = threading.Lock()
+        self._queue = queue.Queue(self.queue_size)
+        self._thread = None
+        self.start()
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        """
+        Filter and enqueue a record without taking the handler lock.
+
+        The queue is thread-safe on its own, so producers do not serialize on
+        the handler lock the way synchronous handlers do.
+        """
+        rv = self.filter(record)
+        if rv:
+            self.emit(record)
+        return rv
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            LoggingContext.bind(record)
+            self._offer(record)
+        except Exception:
+            self.handleError(record)
+
+    def _offer(self, record: logging.LogRecord) -> None:
+        policy = self.overflow_policy
+        if policy is OverflowPolicy.BLOCK:
+            self._queue.put(record)
+            return
+
+        priority = record.levelno >= self.priority_level
+        if (
+                policy is OverflowPolicy.SAMPLE
+                and not priority
+                and self._queue.qsize() >= self.high_watermark
+                and random.random() >= self.sample_rate
+        ):
+            self._count_drop()
+            return
+
+        try:
+            self._queue.put_nowait(record)
+            return
+        except queue.Full:
+            if policy is not OverflowPolicy.DROP_OLDEST and not priority:
+                self._count_drop()
+                return
+
+        self._put_evicting(record)
+
+    def _put_evicting(self, record: logging.LogRecord) -> None:
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            else:
+                self._queue.task_done()
+                self._count_drop()
+            try:
+                self._queue.put_nowait(record)
+                return
+            except queue.Full:
+                continue
+
+    def _count_drop(self) -> None:
+        with self._drop_lock:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        q = self._queue
+        while True:
+            try:
+                record = q.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._flush_sinks()
+                continue
+            try:
+                if record is _SENTINEL:
+                    self._flush_sinks()
+                    return
+                self._dispatch(record)
+            finally:
+                q.task_done()
+
+    def _dispatch(self, record: logging.LogRecord) -> None:
+        override = record.__dict__.get(LEVEL_OVERRIDE_ATTRIBUTE)
+        for handler in self.handlers:
+            level = handler.level if override is None else min(handler.level, override)
+            if record.levelno >= level:
+                handler.handle(record)
+
+    def _flush_sinks(self) -> None:
+        for handler in self.handlers:
+            try:
+                handler.flush()
+            except Exception:
+                pass
+
+    def flush(self) -> None:
+        """
+        Block until every queued record has been written, then flush the sinks.
+        """
+        thread = self._thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            self._queue.join()
+        self._flush_sinks()
+
+    def close(self) -> None:
+        """
+        Drain the queue, stop the writer thread and close the sinks.
+        """
+        thread = self._thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            self._queue.put(_SENTINEL)
+            thread.join()
+        for handler in self.handlers:
+            handler.close()
+        super().close()
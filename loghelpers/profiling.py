@@ -0,0 +1,381 @@
+import functools
+import logging
+import math
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+# Bucket layout shared by every histogram: 1µs up to ~10 minutes in 10% steps.
+_MIN_VALUE = 1e-6
+_GROWTH = 1.1
+_LOG_GROWTH = math.log(_GROWTH)
+_BUCKETS = int(math.log(600 / _MIN_VALUE) / _LOG_GROWTH) + 2
+_INV_MIN_VALUE = 1 / _MIN_VALUE
+_INV_LOG_GROWTH = 1 / _LOG_GROWTH
+_log = math.log
+
+
+class Histogram:
+    """
+    Log-bucketed histogram of non-negative values, such as durations in seconds.
+
+    Values are counted in buckets that grow by 10%, so percentiles are accurate
+    to within one bucket while recording stays O(1). A histogram is not thread
+    safe on its own; `ProfileRegistry` keeps one per thread and merges them.
+    """
+    __slots__ = ("counts", "count", "total", "minimum", "maximum")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = 0.0
+
+    def record(self, value: float) -> None:
+        """
+        Add a value to the histogram.
+
+        Args:
+            value: The value to record.
+        """
+        if value <= _MIN_VALUE:
+            index = 0
+        else:
+            index = int(_log(value * _INV_MIN_VALUE) * _INV_LOG_GROWTH) + 1
+            if index >= _BUCKETS:
+                index = _BUCKETS - 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    def merge(self, other: "Histogram") -> None:
+        """
+        Add the values of another histogram to this one.
+
+        Args:
+            other: The histogram to merge.
+        """
+        for index, value in enumerate(other.counts):
+            if value:
+                self.counts[index] += value
+        self.count += other.count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    def percentile(self, q: float) -> float:
+        """
+        Get an approximate percentile.
+
+        Args:
+            q: The percentile between 0 and 100.
+
+        Returns:
+            float: The upper bound of the bucket holding the percentile, clamped to
+            the observed minimum and maximum. 0.0 for an empty histogram.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q / 100.0))
+        seen = 0
+        for index, value in enumerate(self.counts):
+            seen += value
+            if seen >= rank:
+                bound = _MIN_VALUE * _GROWTH ** index
+                return min(self.maximum, max(self.minimum, bound))
+        return self.maximum
+
+    def cumulative(self, bounds: List[float]) -> List[int]:
+        """
+        Count the values at or below each bound, as in a Prometheus histogram.
+
+        Values are attributed to the upper bound of their bucket, so counts are
+        accurate to within one bucket.
+
+        Args:
+            bounds: Increasing upper bounds.
+
+        Returns:
+            List[int]: The number of values at or below each bound.
+        """
+        counts = []
+        seen = 0
+        index = 0
+        for bound in bounds:
+            while index < _BUCKETS and _MIN_VALUE * _GROWTH ** index <= bound * (1 + 1e-9):
+                seen += self.counts[index]
+                index += 1
+            counts.append(seen)
+        return counts
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Get count, mean, max and the p50/p95/p99 percentiles.
+
+        Returns:
+            Dict[str, float]: The summary statistics.
+        """
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.maximum,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class _CallStats:
+    __slots__ = ("wall", "cpu", "allocated")
+
+    def __init__(self):
+        self.wall = Histogram()
+        self.cpu = Histogram()
+        self.allocated = 0
+
+
+class _Shard:
+    """
+    Data recorded by one thread.
+
+    The lock is only contended while the shard is merged, so it costs an
+    uncontended acquire per record; it keeps merges from reading histograms
+    mid-update and resets from losing records made concurrently.
+    """
+    __slots__ = ("data", "lock", "thread")
+
+    def __init__(self):
+        self.data: Dict[Any, Any] = {}
+        self.lock = threading.Lock()
+        self.thread = threading.current_thread()
+
+
+def _collect_shards(registry: Any, reset: bool) -> List[_Shard]:
+    # Shards of exited threads can no longer change, so a reset drops them after they are merged
+    with registry._lock:
+        shards = registry._shards
+        if reset:
+            registry._shards = [shard for shard in shards if shard.thread.is_alive()]
+    return list(shards)
+
+
+class ProfileRegistry:
+    """
+    In-process registry of call timings.
+
+    Every thread records into its own shard under a lock that only `snapshot`
+    contends for, so threads never wait for each other while recording.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def record(self, name: str, wall: float, cpu: float, allocated: Optional[int] = None) -> None:
+        """
+        Record one call.
+
+        Args:
+            name: Name of the profiled function or block.
+            wall: Wall time in seconds.
+            cpu: CPU time of the calling thread in seconds.
+            allocated: Optional net bytes allocated during the call.
+        """
+        shard = self._shard()
+        with shard.lock:
+            stats = shard.data.get(name)
+            if stats is None:
+                stats = shard.data[name] = _CallStats()
+            stats.wall.record(wall)
+            stats.cpu.record(cpu)
+            if allocated is not None:
+                stats.allocated += allocated
+
+    def snapshot(self, reset: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Merge all shards into per-name summaries.
+
+        Args:
+            reset: If True, the recorded data is discarded after merging. Every
+                record is counted in exactly one snapshot.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Wall and CPU summaries and allocated bytes per name.
+        """
+        merged: Dict[str, _CallStats] = {}
+        for shard in _collect_shards(self, reset):
+            with shard.lock:
+                for name, stats in shard.data.items():
+                    target = merged.get(name)
+                    if target is None:
+                        target = merged[name] = _CallStats()
+                    target.wall.merge(stats.wall)
+                    target.cpu.merge(stats.cpu)
+                    target.allocated += stats.allocated
+                if reset:
+                    shard.data = {}
+        return {
+            name: {
+                "wall": stats.wall.summary(),
+                "cpu": stats.cpu.summary(),
+                "allocated": stats.allocated,
+            }
+            for name, stats in merged.items()
+        }
+
+    def reset(self) -> None:
+        """
+        Discard all recorded data.
+        """
+        self.snapshot(reset=True)
+
+
+PROFILE_REGISTRY = ProfileRegistry()
+
+
+class profile_calls:
+    """
+    Record wall time, CPU time and optionally allocations of a function or block.
+
+    Use as a decorator (`@profile_calls()`) or as a context manager
+    (`with profile_calls("name"):`). One instance can be entered from several
+    threads and nested in itself.
+
+    With `trace_allocations`, the net allocated bytes are recorded as well while
+    tracemalloc is tracing. Tracing is never started here, since it slows down
+    every allocation in the process: call `tracemalloc.start()` before and
+    `tracemalloc.stop()` after the measurement. The numbers are process-wide
+    deltas, so allocations made by other threads during a call are included.
+    """
+
+    def __init__(
+            self,
+            name: Optional[str] = None,
+            registry: Optional[ProfileRegistry] = None,
+            trace_allocations: bool = False
+    ):
+        self.name = name
+        self.registry = registry or PROFILE_REGISTRY
+        self.trace_allocations = trace_allocations
+        self._local = threading.local()
+
+    def _begin(self) -> tuple:
+        allocated = None
+        if self.trace_allocations and tracemalloc.is_tracing():
+            allocated = tracemalloc.get_traced_memory()[0]
+        return time.perf_counter(), time.thread_time(), allocated
+
+    def _end(self, name: str, start: tuple) -> None:
+        wall = time.perf_counter() - start[0]
+        cpu = time.thread_time() - start[1]
+        allocated = None
+        if start[2] is not None and tracemalloc.is_tracing():
+            allocated = tracemalloc.get_traced_memory()[0] - start[2]
+        self.registry.record(name, wall, cpu, allocated)
+
+    def __call__(self, fn: Callable) -> Callable:
+        name = self.name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = self._begin()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._end(name, start)
+
+        return wrapper
+
+    def __enter__(self):
+        if self.name is None:
+            raise ValueError("profile_calls needs a name when used as a context manager.")
+        stack = self._local.__dict__.setdefault("starts", [])
+        stack.append(self._begin())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._end(self.name, self._local.starts.pop())
+
+
+log_timing = profile_calls
+
+
+class ProfileReporter:
+    """
+    Periodically logs one summary record per profiled name.
+
+    Summaries go through a regular logger, so they are filtered, formatted and
+    written like any other record. By default every report covers only the calls
+    since the previous one.
+    """
+
+    def __init__(
+            self,
+            registry: Optional[ProfileRegistry] = None,
+            logger: Optional[logging.Logger] = None,
+            interval: float = 60.0,
+            level: int = logging.INFO,
+            reset: bool = True
+    ):
+        self.registry = registry or PROFILE_REGISTRY
+        self.logger = logger or logging.getLogger("loghelpers.profiling")
+        self.interval = interval
+        self.level = level
+        self.reset = reset
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def report(self) -> None:
+        """
+        Log a summary record for every profiled name.
+        """
+        if not self.logger.isEnabledFor(self.level):
+            return
+        for name, stats in sorted(self.registry.snapshot(reset=self.reset).items()):
+            wall, cpu = stats["wall"], stats["cpu"]
+            self.logger.log(
+                self.level,
+                "profile %s count=%d wall_p50=%.3fms wall_p95=%.3fms wall_p99=%.3fms "
+                "wall_max=%.3fms cpu_p50=%.3fms cpu_p99=%.3fms allocated=%dB",
+                name, wall["count"], wall["p50"] * 1e3, wall["p95"] * 1e3, wall["p99"] * 1e3,
+                wall["max"] * 1e3, cpu["p50"] * 1e3, cpu["p99"] * 1e3, stats["allocated"],
+            )
+
+    def start(self) -> None:
+        """
+        Start reporting on a daemon thread every `interval` seconds.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="loghelpers-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the reporting thread after emitting a final report.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.report()
+        self.report()
@@ -0,0 +1,477 @@
+# loghelpers/query.py
+"""
+Indexed queries over JsonFormatter log files.
+
+Every log file or rotated segment can have a sidecar index, stored next to it
+with the suffix `INDEX_SUFFIX`. The index splits the file into blocks of about
+`block_size` bytes, each with its byte range, time range and the level names it
+contains, and maps every value of selected context keys (such as `request_id`)
+to the blocks containing it. A query first selects candidate blocks from the
+index and then scans only those through `mmap`, using a substring search for the
+queried values before decoding any line.
+
+Indexes are built on first use and extended incrementally while the active log
+file grows; sealed segments can be indexed as they are rotated by passing
+`functools.partial(build_index, keys=...)` as `on_segment` to the rotating
+handlers, which `create_file_sink` does when `Configuration.rotation_index_keys`
+is set. Compressed segments are decompressed in memory when they are indexed or
+scanned.
+"""
+import argparse
+import logging
+import mmap
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import repeat
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import orjson
+
+from .rotation import _OPENERS, INDEX_SUFFIX, SegmentCompressor
+
+DEFAULT_INDEX_KEYS = ("request_id", "trace_id")
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+INDEX_VERSION = 1
+
+_SUFFIXES = {suffix: opener for opener, suffix in _OPENERS.values()}
+
+
+@dataclass(frozen=True)
+class Query:
+    """
+    Criteria a log line must meet to be returned by `search`.
+
+    Attributes:
+        where: Context keys and the string form of the values they must have.
+        since: Earliest timestamp as seconds since the epoch, inclusive.
+        until: Latest timestamp as seconds since the epoch, inclusive.
+        level: Minimum level number.
+        date_format: strftime format of string timestamps in the logs.
+    """
+    where: Dict[str, str] = field(default_factory=dict)
+    since: Optional[float] = None
+    until: Optional[float] = None
+    level: int = logging.NOTSET
+    date_format: str = "%Y-%m-%d %H:%M:%S"
+
+
+class _TimeParser:
+    """
+    Converts timestamp fields to epoch seconds, caching the last string seen.
+
+    Parsing is done in integer nanoseconds, so `nanoseconds` returns epoch_ns
+    timestamps unchanged instead of rounding them through a float.
+    """
+
+    def __init__(self, date_format: str):
+        self.date_format = date_format
+        self._last: Any = None
+        self._last_value: Optional[int] = None
+
+    def __call__(self, value: Any) -> Optional[float]:
+        parsed = self.nanoseconds(value)
+        return None if parsed is None else parsed / 1_000_000_000
+
+    def nanoseconds(self, value: Any) -> Optional[int]:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if not isinstance(value, str):
+            return None
+        if value == self._last:
+            return self._last_value
+        try:
+            parsed: Optional[int] = self._seconds(value) * 1_000_000_000
+        except ValueError:
+            head, _, fraction = value.rpartition(".")
+            try:
+                parsed = self._seconds(head) * 1_000_000_000 + int(fraction) * 1_000_000
+            except ValueError:
+                parsed = None
+        self._last, self._last_value = value, parsed
+        return parsed
+
+    def _seconds(self, value: str) -> int:
+        return int(time.mktime(time.strptime(value, self.date_format)))
+
+
+def _level_number(name: Any) -> int:
+    level = logging.getLevelName(name) if isinstance(name, str) else name
+    return level if isinstance(level, int) else logging.NOTSET
+
+
+@contextmanager
+def _open_data(path: str) -> Iterator[Any]:
+    opener = _SUFFIXES.get(os.path.splitext(path)[1])
+    if opener is not None:
+        with opener(path, "rb") as source:
+            yield source.read()
+        return
+    with open(path, "rb") as source:
+        if os.fstat(source.fileno()).st_size == 0:
+            yield b""
+            return
+        data = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield data
+        finally:
+            data.close()
+
+
+def _data_end(data: Any, start: int) -> int:
+    # Preallocated segments are padded with NUL bytes, which JSON lines never contain
+    padding = data.find(b"\0", start)
+    end = len(data) if padding < 0 else padding
+    return data.rfind(b"\n", start, end) + 1 or start
+
+
+def load_index(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Load the sidecar index of a log file if it exists and is readable.
+
+    Args:
+        path: Path of the log file or segment.
+
+    Returns:
+        Optional[Dict[str, Any]]: The index, or None.
+    """
+    try:
+        with open(path + INDEX_SUFFIX, "rb") as source:
+            index = orjson.loads(source.read())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+    return index if isinstance(index, dict) and index.get("version") == INDEX_VERSION else None
+
+
+def build_index(
+        path: str,
+        keys: Optional[Sequence[str]] = None,
+        date_format: str = "%Y-%m-%d %H:%M:%S",
+        block_size: int = DEFAULT_BLOCK_SIZE,
+) -> Dict[str, Any]:
+    """
+    Build or extend the sidecar index of a log file and write it next to the file.
+
+    An existing index for the same file, keys and date format is reused, and if
+    the file has grown only the new lines are indexed. A trailing line without a
+    newline is left for the next update. If the index cannot be written, it is
+    still returned.
+
+    Args:
+        path: Path of the log file or segment.
+        keys: Context keys whose values are indexed, or None to keep the keys of
+            an existing index and use `DEFAULT_INDEX_KEYS` otherwise.
+        date_format: strftime format of string timestamps in the file.
+        block_size: Approximate number of bytes per block.
+
+    Returns:
+        Dict[str, Any]: The index.
+    """
+    stat = os.stat(path)
+    index = load_index(path)
+    if keys is None:
+        keys = index["keys"] if index is not None else DEFAULT_INDEX_KEYS
+    keys = list(keys)
+    if (
+            index is None
+            or index["keys"] != keys
+            or index["date_format"] != date_format
+            or index["inode"] != stat.st_ino
+            or index["file_size"] > stat.st_size
+    ):
+        index = {
+            "version": INDEX_VERSION, "keys": keys, "date_format": date_format,
+            "inode": stat.st_ino, "file_size": 0, "size": 0, "blocks": [],
+            "values": {key: {} for key in keys},
+        }
+    elif os.path.splitext(path)[1] in _SUFFIXES and index["file_size"] == stat.st_size:
+        return index
+
+    # Preallocated segments keep their size while they fill, so uncompressed files
+    # are always checked for new lines
+    with _open_data(path) as data:
+        start = index["size"]
+        end = _data_end(data, start)
+        if end == start and index["file_size"] == stat.st_size:
+            return index
+        _index_range(index, data, start, end, _TimeParser(date_format), block_size)
+    index["file_size"] = stat.st_size
+
+    temporary = f"{path}{INDEX_SUFFIX}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as output:
+            output.write(orjson.dumps(index))
+        os.replace(temporary, path + INDEX_SUFFIX)
+    except OSError:
+        pass
+    return index
+
+
+def _index_range(
+        index: Dict[str, Any], data: Any, start: int, end: int, parse: _TimeParser, block_size: int
+) -> None:
+    keys = index["keys"]
+    values = index["values"]
+    blocks = index["blocks"]
+    pos = start
+    while pos < end:
+        block_end = data.find(b"\n", min(pos + block_size, end) - 1, end) + 1 or end
+        number = len(blocks)
+        first: Optional[float] = None
+        last: Optional[float] = None
+        levels = set()
+        line_start = pos
+        while line_start < block_end:
+            line_end = data.find(b"\n", line_start, block_end)
+            if line_end < 0:
+                line_end = block_end
+            try:
+                payload = orjson.loads(data[line_start:line_end])
+            except orjson.JSONDecodeError:
+                payload = None
+            line_start = line_end + 1
+            if not isinstance(payload, dict):
+                continue
+            timestamp = parse(payload.get("timestamp"))
+            if timestamp is not None:
+                first = timestamp if first is None else min(first, timestamp)
+                last = timestamp if last is None else max(last, timestamp)
+            level = payload.get("level")
+            if isinstance(level, str):
+                levels.add(level)
+            for key in keys:
+                value = payload.get(key)
+                if value is not None:
+                    numbers = values[key].setdefault(str(value), [])
+                    if not numbers or numbers[-1] != number:
+                        numbers.append(number)
+        blocks.append({"start": pos, "end": block_end, "min": first, "max": last, "levels": sorted(levels)})
+        pos = block_end
+    index["size"] = end
+
+
+def _candidate_blocks(index: Dict[str, Any], query: Query) -> List[Dict[str, Any]]:
+    blocks = index["blocks"]
+    selected = None
+    for key, value in query.where.items():
+        if key in index["keys"]:
+            numbers = set(index["values"].get(key, {}).get(value, ()))
+            selected = numbers if selected is None else selected & numbers
+    candidates = []
+    for number, block in enumerate(blocks):
+        if selected is not None and number not in selected:
+            continue
+        if query.since is not None and block["max"] is not None and block["max"] < query.since:
+            continue
+        if query.until is not None and block["min"] is not None and block["min"] > query.until:
+            continue
+        if query.level and block["levels"] and all(
+                _level_number(level) < query.level for level in block["levels"]
+        ):
+            continue
+        candidates.append(block)
+    return candidates
+
+
+def _matches(payload: Any, query: Query, parse: _TimeParser) -> bool:
+    if not isinstance(payload, dict):
+        return False
+    for key, value in query.where.items():
+        if key not in payload or str(payload[key]) != value:
+            return False
+    if query.level and _level_number(payload.get("level")) < query.level:
+        return False
+    if query.since is not None or query.until is not None:
+        timestamp = parse(payload.get("timestamp"))
+        if timestamp is None:
+            return False
+        if query.since is not None and timestamp < query.since:
+            return False
+        if query.until is not None and timestamp > query.until:
+            return False
+    return True
+
+
+def _scan_range(data: Any, start: int, end: int, query: Query, parse: _TimeParser) -> Iterator[bytes]:
+    # The longest value as it appears inside a JSON string is searched for first
+    needle = max((orjson.dumps(value)[1:-1] for value in query.where.values()), key=len, default=b"")
+    pos = start
+    while pos < end:
+        if needle:
+            hit = data.find(needle, pos, end)
+            if hit < 0:
+                return
+            line_start = data.rfind(b"\n", pos, hit) + 1 or pos
+        else:
+            hit = line_start = pos
+        line_end = data.find(b"\n", hit, end)
+        if line_end < 0:
+            line_end = end
+        line = data[line_start:line_end]
+        pos = line_end + 1
+        try:
+            payload = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            continue
+        if _matches(payload, query, parse):
+            yield bytes(line)
+
+
+def search_file(path: str, query: Query, index_keys: Optional[Sequence[str]] = None) -> List[bytes]:
+    """
+    Find the lines of one log file that match a query, updating its index first.
+
+    Args:
+        path: Path of the log file or segment.
+        query: The query.
+        index_keys: Keys to index if the index has to be rebuilt, or None for the
+            keys of the existing index.
+
+    Returns:
+        List[bytes]: Matching lines without newlines, in file order.
+    """
+    index = build_index(path, index_keys, query.date_format)
+    parse = _TimeParser(query.date_format)
+    matches: List[bytes] = []
+    with _open_data(path) as data:
+        for block in _candidate_blocks(index, query):
+            matches.extend(_scan_range(data, block["start"], block["end"], query, parse))
+    return matches
+
+
+def _numbered_backups(path: str) -> List[str]:
+    """
+    List the `.N` backups `logging.handlers.RotatingFileHandler` keeps of a file, oldest first.
+    """
+    directory, name = os.path.split(path)
+    suffixes = "|".join(map(re.escape, _SUFFIXES))
+    pattern = re.compile(re.escape(name) + r"\.(\d+)(?:" + suffixes + r")?$")
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    backups = []
+    for entry in names:
+        match = pattern.match(entry)
+        if match is not None:
+            backups.append((-int(match.group(1)), os.path.join(directory, entry)))
+    return [backup for _, backup in sorted(backups)]
+
+
+def log_files(paths: Iterable[str]) -> List[str]:
+    """
+    Expand log file paths to their rotated segments, oldest first, followed by the file itself.
+
+    Both timestamped segments written by the rotating handlers of this package
+    and numbered backups of `RotatingFileHandler` (`app.log.2`, `app.log.1`,
+    where a higher number is older) are included.
+
+    Args:
+        paths: Paths of active log files or individual segments.
+
+    Returns:
+        List[str]: Existing files to search.
+    """
+    files: List[str] = []
+    for path in paths:
+        path = os.path.abspath(path)
+        segments = _numbered_backups(path) + SegmentCompressor(path).segments()
+        for candidate in segments + [path]:
+            if os.path.isfile(candidate) and candidate not in files:
+                files.append(candidate)
+    return files
+
+
+def search(
+        paths: Iterable[str],
+        query: Query,
+        processes: Optional[int] = None,
+        index_keys: Optional[Sequence[str]] = None,
+) -> Iterator[bytes]:
+    """
+    Find the lines of several log files that match a query.
+
+    Files are indexed and scanned in parallel across a process pool; results are
+    yielded in the order of `paths` as soon as each file is done.
+
+    Args:
+        paths: Paths of log files and segments, typically from `log_files`.
+        query: The query.
+        processes: Number of worker processes; 1 scans in this process and None
+            uses one per CPU.
+        index_keys: Keys to index if an index has to be rebuilt.
+
+    Yields:
+        bytes: Matching lines without newlines.
+    """
+    paths = list(paths)
+    if processes == 1 or len(paths) <= 1:
+        for path in paths:
+            yield from search_file(path, query, index_keys)
+        return
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for matches in executor.map(search_file, paths, repeat(query), repeat(index_keys)):
+            yield from matches
+
+
+def _parse_bound(value: Optional[str], date_format: str) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parsed = _TimeParser(date_format)(value)
+    if parsed is None:
+        raise argparse.ArgumentTypeError(f"Invalid time: {value}")
+    return parsed
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Search JSON log files and their rotated segments and write matching lines to standard output.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m loghelpers.query",
+        description="Search loghelpers JSON logs using sidecar indexes.",
+    )
+    parser.add_argument("files", nargs="+", help="Log files; their rotated segments are included.")
+    parser.add_argument("--where", action="append", default=[], metavar="KEY=VALUE",
+                        help="Context key and value that must match; may be repeated.")
+    parser.add_argument("--since", help="Earliest timestamp, as epoch seconds or in --date-format.")
+    parser.add_argument("--until", help="Latest timestamp, as epoch seconds or in --date-format.")
+    parser.add_argument("--level", help="Minimum level name.")
+    parser.add_argument("--date-format", default="%Y-%m-%d %H:%M:%S", help="strftime format of timestamps.")
+    parser.add_argument("--index-keys", help="Comma separated keys to index when an index is (re)built.")
+    parser.add_argument("--processes", type=int, help="Number of worker processes.")
+    args = parser.parse_args(argv)
+
+    where = {}
+    for condition in args.where:
+        key, separator, value = condition.partition("=")
+        if not separator:
+            parser.error(f"Invalid condition: {condition}")
+        where[key] = value
+    try:
+        query = Query(
+            where=where,
+            since=_parse_bound(args.since, args.date_format),
+            until=_parse_bound(args.until, args.date_format),
+            level=_level_number(args.level.upper()) if args.level else logging.NOTSET,
+            date_format=args.date_format,
+        )
+    except argparse.ArgumentTypeError as error:
+        parser.error(str(error))
+    index_keys = args.index_keys.split(",") if args.index_keys else None
+
+    output = sys.stdout.buffer
+    for line in search(log_files(args.files), query, args.processes, index_keys):
+        output.write(line + b"\n")
+    output.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Tuple
+
+from .context import LoggingContext
+from .decorators import LazyMessage
+from .utils import flush_periodically
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Rate limits records per call site with a token bucket.
+
+    Records are keyed on (logger name, pathname, lineno, msg template). Each key
+    may emit `burst` records at once and `rate` records per second after that.
+    Suppressed repeats are counted and reported as `repeat_count` on the next
+    record of the same key that gets through. If none arrives, the last suppressed
+    record is emitted on its logger with the remaining count once the bucket has
+    refilled (checked every `flush_interval` seconds) or when its key is evicted,
+    so a storm that simply stops still ends in one summarizing record.
+
+    Buckets live in a bounded LRU of `max_keys` entries, so memory stays flat no
+    matter how many distinct call sites log. The decision is stored on the record,
+    so a record passing through several handlers only spends one token.
+    """
+
+    RECORD_ATTRIBUTE = "_loghelpers_rate_limited"
+
+    def __init__(self, rate: float, burst: int = 10, max_keys: int = 10000, flush_interval: float = 1.0):
+        """
+        Initialize the rate limit filter.
+
+        Args:
+            rate: Records per second allowed per call site once the burst is spent.
+            burst: Number of records a call site may emit back to back.
+            max_keys: Maximum number of call sites tracked at once.
+            flush_interval: Seconds between checks for pending repeat counts.
+        """
+        super().__init__()
+        if rate <= 0:
+            raise ValueError("Rate must be positive.")
+        if burst < 1:
+            raise ValueError("Burst must be at least 1.")
+        if max_keys < 1:
+            raise ValueError("Max keys must be at least 1.")
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # Each bucket is [tokens, last refill time, suppressed repeats, last suppressed record]
+        self._buckets: "OrderedDict[Hashable, List[Any]]" = OrderedDict()
+        # Buckets with suppressed repeats that have not been reported yet
+        self._pending: Dict[Hashable, List[Any]] = {}
+        flush_periodically(self, flush_interval)
+
+    @staticmethod
+    def key_for(record: logging.LogRecord) -> Tuple[Hashable, ...]:
+        """
+        Get the call-site key of a record.
+
+        Args:
+            record: The log record.
+
+        Returns:
+            tuple: The (name, pathname, lineno, msg template) key. For a
+            `LazyMessage`, which shares its logging call with every function
+            decorated by `log_calls`, its render function takes the place of the template.
+        """
+        msg = record.msg
+        if isinstance(msg, LazyMessage):
+            msg = msg.key
+        elif not isinstance(msg, str):
+            msg = None
+        return record.name, record.pathname, record.lineno, msg
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        decision = record.__dict__.get(self.RECORD_ATTRIBUTE)
+        if decision is None:
+            decision = self._decide(record)
+            record.__dict__[self.RECORD_ATTRIBUTE] = decision
+        return decision
+
+    def _decide(self, record: logging.LogRecord) -> bool:
+        key = self.key_for(record)
+        now = time.monotonic()
+        evicted = None
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now, 0, None]
+                if len(self._buckets) > self.max_keys:
+                    evicted_key, evicted = self._buckets.popitem(last=False)
+                    if self._pending.pop(evicted_key, None) is None:
+                        evicted = None
+            else:
+                self._buckets.move_to_end(key)
+                self._refill(bucket, now)
+
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                # The record may be reported later from another thread
+                LoggingContext.bind(record)
+                bucket[3] = record
+                self._pending[key] = bucket
+                suppressed = True
+            else:
+                bucket[0] -= 1.0
+                repeats = bucket[2]
+                bucket[2] = 0
+                bucket[3] = None
+                if repeats:
+                    del self._pending[key]
+                suppressed = False
+
+        if evicted is not None:
+            self._emit_summary(evicted)
+        if suppressed:
+            return False
+        if repeats:
+            record.repeat_count = int(repeats)
+        return True
+
+    def _refill(self, bucket: List[Any], now: float) -> None:
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+
+    def _periodic_flush(self) -> None:
+        """
+        Report the suppressed repeats of call sites that went quiet and have tokens again.
+        """
+        now = time.monotonic()
+        ready = []
+        with self._lock:
+            for key, bucket in list(self._pending.items()):
+                self._refill(bucket, now)
+                if bucket[0] >= 1.0:
+                    bucket[0] -= 1.0
+                    ready.append(list(bucket))
+                    bucket[2] = 0
+                    bucket[3] = None
+                    del self._pending[key]
+        for bucket in ready:
+            self._emit_summary(bucket)
+
+    def _emit_summary(self, bucket: List[Any]) -> None:
+        record = bucket[3]
+        record.__dict__[self.RECORD_ATTRIBUTE] = True
+        if bucket[2] > 1:
+            record.repeat_count = int(bucket[2]) - 1
+        logging.getLogger(record.name).handle(record)
@@ -0,0 +1,138 @@
+# loghelpers/recorder.py
+import logging
+from collections import OrderedDict
+from typing import Any, List, Optional
+
+from .context import LoggingContext
+
+
+class _Ring:
+    __slots__ = ("records", "next", "size")
+
+    def __init__(self, capacity: int):
+        self.records: List[Optional[logging.LogRecord]] = [None] * capacity
+        self.next = 0
+        self.size = 0
+
+    def append(self, record: logging.LogRecord) -> None:
+        capacity = len(self.records)
+        self.records[self.next] = record
+        self.next = (self.next + 1) % capacity
+        if self.size < capacity:
+            self.size += 1
+
+    def drain(self) -> List[logging.LogRecord]:
+        capacity = len(self.records)
+        start = (self.next - self.size) % capacity
+        drained = [self.records[(start + i) % capacity] for i in range(self.size)]
+        self.records = [None] * capacity
+        self.next = self.size = 0
+        return drained  # type: ignore[return-value]
+
+
+class FlightRecorderHandler(logging.Handler):
+    """
+    Keeps recent low-level records in memory and writes them only when something fails.
+
+    Records below `pass_level` are kept, unformatted, in a preallocated ring of
+    `capacity` records per value of the context key `key` (records without the key
+    share one ring). Records at or above `pass_level` go straight to `target`. When a
+    record at or above `trigger_level` or with exception info arrives, the history of
+    its context is written to `target` oldest first, followed by the record itself.
+
+    At most `max_contexts` rings are kept; the least recently used one is discarded,
+    so memory is bounded by `capacity * max_contexts` records. Formatting, redaction
+    and I/O only happen for records that are actually written.
+    """
+
+    def __init__(
+            self,
+            target: logging.Handler,
+            capacity: int = 100,
+            key: str = "request_id",
+            max_contexts: int = 1000,
+            trigger_level: int = logging.ERROR,
+            pass_level: int = logging.INFO,
+    ):
+        """
+        Initialize the flight recorder.
+
+        Args:
+            target: Handler that writes passed-through and dumped records.
+            capacity: Number of records kept per context.
+            key: Context key whose value selects the ring of a record.
+            max_contexts: Maximum number of rings kept at once.
+            trigger_level: Records at or above this level dump the history of their context.
+            pass_level: Records at or above this level are written immediately instead of kept.
+        """
+        super().__init__()
+        if capacity <= 0 or max_contexts <= 0:
+            raise ValueError("Capacity and max contexts must be positive integers.")
+        self.target = target
+        self.capacity = capacity
+        self.key = key
+        self.max_contexts = max_contexts
+        self.trigger_level = trigger_level
+        self.pass_level = pass_level
+        self._rings: "OrderedDict[Any, _Ring]" = OrderedDict()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            LoggingContext.bind(record)
+            context_key = getattr(record, LoggingContext.RECORD_ATTRIBUTE).get(self.key)
+            if record.levelno >= self.trigger_level or record.exc_info:
+                self._dump(context_key)
+                self.target.handle(record)
+            elif record.levelno >= self.pass_level:
+                self.target.handle(record)
+            else:
+                self._ring(context_key).append(record)
+        except Exception:
+            self.handleError(record)
+
+    def _ring(self, context_key: Any) -> _Ring:
+        ring = self._rings.get(context_key)
+        if ring is None:
+            if len(self._rings) >= self.max_contexts:
+                self._rings.popitem(last=False)
+            ring = self._rings[context_key] = _Ring(self.capacity)
+        else:
+            self._rings.move_to_end(context_key)
+        return ring
+
+    def _dump(self, context_key: Any) -> None:
+        ring = self._rings.pop(context_key, None)
+        if ring is not None:
+            for record in ring.drain():
+                self.target.handle(record)
+
+    def dump(self, context_key: Any = None) -> None:
+        """
+        Write the kept history of a context to the target.
+
+        Args:
+            context_key: Value of the context key, or None for records without it.
+        """
+        self.acquire()
+        try:
+            self._dump(context_key)
+        finally:
+            self.release()
+
+    def flush(self) -> None:
+        """
+        Flush the target. Kept records are not written.
+        """
+        self.target.flush()
+
+    def close(self) -> None:
+        """
+        Discard kept records and close the target.
+        """
+        self.acquire()
+        try:
+            self._rings.clear()
+            self.target.close()
+            super().close()
+        finally:
+            self.release()
@@ -1,11 +1,31 @@
 import re
-from typing import Any, List, Protocol, runtime_checkable, Set, Iterable
+import sys
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Protocol, Set, \
+    Tuple, runtime_checkable
+
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse as _sre_parse
+
+_DIGIT = re.compile(r"\d")
+_DIGIT_CHARS = range(ord("0"), ord("9") + 1)
+_REPEATS = tuple(
+    op for op in (
+        _sre_parse.MAX_REPEAT,
+        _sre_parse.MIN_REPEAT,
+        getattr(_sre_parse, "POSSESSIVE_REPEAT", None),
+    ) if op is not None
+)
 
 
 @runtime_checkable
 class Redactable(Protocol):
     """
     Protocol for objects that can define their own redacted representation.
+
+    Redactor dispatches on the presence of `__redact__` on the type rather than
+    on this protocol; it is kept for type annotations.
     """
     def __redact__(self) -> Any:
         ...
@@ -28,10 +48,238 @@ class Sensitive:
         return "<redacted>"
 
 
+def _requires_digit(parsed) -> bool:
+    """
+    Check whether every match of a parsed pattern must contain a digit.
+    """
+    for op, av in parsed:
+        if op is _sre_parse.LITERAL and av in _DIGIT_CHARS:
+            return True
+        if op is _sre_parse.IN and av and all(
+                (item_op is _sre_parse.LITERAL and item_av in _DIGIT_CHARS)
+                or (item_op is _sre_parse.CATEGORY and item_av is _sre_parse.CATEGORY_DIGIT)
+                or (item_op is _sre_parse.RANGE and item_av[0] >= 48 and item_av[1] <= 57)
+                for item_op, item_av in av
+        ):
+            return True
+        if op in _REPEATS and av[0] >= 1 and _requires_digit(av[2]):
+            return True
+        if op is _sre_parse.SUBPATTERN and _requires_digit(av[-1]):
+            return True
+        if op is _sre_parse.BRANCH and all(_requires_digit(branch) for branch in av[1]):
+            return True
+    return False
+
+
+def _has_backreference(parsed) -> bool:
+    for op, av in parsed:
+        if op in (_sre_parse.GROUPREF, _sre_parse.GROUPREF_EXISTS):
+            return True
+        if isinstance(av, (list, tuple)):
+            for item in av:
+                if isinstance(item, _sre_parse.SubPattern) and _has_backreference(item):
+                    return True
+                if isinstance(item, list) and any(
+                        isinstance(branch, _sre_parse.SubPattern) and _has_backreference(branch)
+                        for branch in item
+                ):
+                    return True
+    return False
+
+
+class _KeySet(set):
+    """
+    Set of sensitive keys that counts in-place changes.
+
+    `Redactor.sensitive_keys` hands out the live set, so its plan compares the
+    version instead of the contents to find out whether it is stale.
+    """
+
+    version = 0
+
+    def _changed(self) -> None:
+        self.version += 1
+
+
+def _counting(name: str) -> Callable:
+    method = getattr(set, name)
+
+    def mutate(self, *args):
+        result = method(self, *args)
+        self._changed()
+        return result
+
+    mutate.__name__ = name
+    return mutate
+
+
+for _name in (
+        "add", "discard", "remove", "pop", "clear", "update", "difference_update",
+        "intersection_update", "symmetric_difference_update",
+        "__ior__", "__iand__", "__isub__", "__ixor__",
+):
+    setattr(_KeySet, _name, _counting(_name))
+del _name
+
+
+class RedactionPlan:
+    """
+    Compiled form of a Redactor's keys and value patterns.
+
+    All value patterns are merged into a single alternation so each string is
+    scanned once, strings that cannot match are rejected by length or by the
+    absence of digits, and sensitive key decisions are memoized per key.
+    Short strings found to contain nothing to redact are remembered, since
+    context values repeat on every record; strings that matched are never kept,
+    so the plan does not hold on to sensitive values. Patterns anchored at the
+    start are only tried there.
+    """
+
+    KEY_CACHE_SIZE = 4096
+    STRING_CACHE_SIZE = 4096
+    STRING_CACHE_MAX_LENGTH = 256
+
+    def __init__(
+            self,
+            sensitive_keys: Iterable[str],
+            patterns: Iterable[re.Pattern],
+            redaction_token: str
+    ):
+        """
+        Compile a redaction plan.
+
+        Args:
+            sensitive_keys: Lowercased keys to redact from dict-like structures.
+            patterns: Compiled regex patterns to redact from strings.
+            redaction_token: The token to use when redacting.
+        """
+        self.sensitive_keys: FrozenSet[str] = frozenset(sensitive_keys)
+        self.redaction_token = redaction_token
+        self.patterns: Tuple[re.Pattern, ...] = tuple(patterns)
+        self.scanner: Optional[re.Pattern] = None
+        self.min_length = sys.maxsize
+        self.needs_digit = False
+        self.anchored = False
+        self._key_cache: Dict[Any, bool] = {}
+        self._clean_strings: Set[str] = set()
+
+        if not self.patterns:
+            return
+
+        parsed = [_sre_parse.parse(p.pattern, p.flags) for p in self.patterns]
+        self.min_length = min(tree.getwidth()[0] for tree in parsed)
+        self.needs_digit = all(_requires_digit(tree) for tree in parsed)
+        self.anchored = all(
+            len(tree) and tree[0] == (_sre_parse.AT, _sre_parse.AT_BEGINNING)
+            and not p.flags & re.MULTILINE
+            for p, tree in zip(self.patterns, parsed)
+        )
+
+        flags = {p.flags for p in self.patterns}
+        if len(self.patterns) == 1:
+            self.scanner = self.patterns[0]
+        elif len(flags) == 1 and not any(_has_backreference(tree) for tree in parsed):
+            try:
+                self.scanner = re.compile(
+                    "|".join(f"(?:{p.pattern})" for p in self.patterns),
+                    flags.pop(),
+                )
+            except re.error:
+                self.scanner = None
+
+    def is_sensitive_key(self, key: Any) -> bool:
+        """
+        Check whether a dictionary key must be redacted.
+
+        Args:
+            key: The dictionary key.
+
+        Returns:
+            bool: True if the key is sensitive.
+        """
+        cached = self._key_cache.get(key)
+        if cached is None:
+            cached = isinstance(key, str) and key.lower() in self.sensitive_keys
+            if len(self._key_cache) >= self.KEY_CACHE_SIZE:
+                self._key_cache.clear()
+            self._key_cache[key] = cached
+        return cached
+
+    def redact_string(self, value: str) -> str:
+        """
+        Replace every pattern match in a string with the redaction token.
+
+        Args:
+            value: The string to redact.
+
+        Returns:
+            str: The redacted string.
+        """
+        if len(value) < self.min_length or value in self._clean_strings:
+            return value
+
+        result = value
+        matches = 0
+        if self.needs_digit and _DIGIT.search(value) is None:
+            pass
+        elif self.scanner is not None:
+            if not self.anchored or self.scanner.match(value) is not None:
+                result, matches = self.scanner.subn(self.redaction_token, value)
+        else:
+            for pattern in self.patterns:
+                result, count = pattern.subn(self.redaction_token, result)
+                matches += count
+
+        if not matches and len(value) <= self.STRING_CACHE_MAX_LENGTH:
+            if len(self._clean_strings) >= self.STRING_CACHE_SIZE:
+                self._clean_strings.clear()
+            self._clean_strings.add(value)
+        return result
+
+
+RedactionHandler = Callable[["Redactor", Any], Any]
+_Dispatch = Callable[["Redactor", Any, RedactionPlan], Any]
+
+
+def _passthrough(redactor: "Redactor", value: Any, plan: RedactionPlan) -> Any:
+    return value
+
+
+def _redact_redactable(redactor: "Redactor", value: Any, plan: RedactionPlan) -> Any:
+    return value.__redact__()
+
+
+def _redact_sensitive(redactor: "Redactor", value: Any, plan: RedactionPlan) -> Any:
+    return plan.redaction_token
+
+
+def _redact_str(redactor: "Redactor", value: str, plan: RedactionPlan) -> str:
+    return plan.redact_string(value)
+
+
+_DEFAULT_HANDLERS: Dict[type, _Dispatch] = {
+    int: _passthrough,
+    float: _passthrough,
+    bool: _passthrough,
+    complex: _passthrough,
+    bytes: _passthrough,
+    type(None): _passthrough,
+    str: _redact_str,
+    Sensitive: _redact_sensitive,
+    dict: lambda redactor, value, plan: redactor._redact_dict(value, plan),
+    list: lambda redactor, value, plan: redactor._redact_list(value, plan),
+    tuple: lambda redactor, value, plan: redactor._redact_tuple(value, plan),
+}
+
+
 class Redactor:
     """
     Redacts sensitive data from structured and unstructured objects.
     Supports recursive redaction, regex matches, and custom object handling.
+
+    Values are dispatched on their concrete type through a per-instance table
+    that is resolved once per type and cached, so builtin scalars cost a single
+    dictionary lookup. Custom types can be added with `register`.
     """
 
     def __init__(
@@ -48,15 +296,22 @@ class Redactor:
             redact_value_patterns: Optional list of regex patterns to redact from strings.
             redaction_token: The token to use when redacting.
         """
-        self._sensitive_keys = set(k.lower() for k in sensitive_keys)
+        self._sensitive_keys = _KeySet(k.lower() for k in sensitive_keys)
         self._redact_patterns = [re.compile(p, re.IGNORECASE) for p in (redact_value_patterns or [])]
         self._redaction_token = redaction_token
+        self._plan: Optional[RedactionPlan] = None
+        self._plan_version = 0
+        self._handlers: Dict[type, _Dispatch] = dict(_DEFAULT_HANDLERS)
+        self._dispatch_cache: Dict[type, _Dispatch] = {}
 
     @property
     def sensitive_keys(self) -> Set[str]:
         """
         Get the set of sensitive keys.
 
+        The set is live: changing it in place takes effect on the next redaction.
+        Keys added this way must be lowercase.
+
         Returns:
             Set[str]: The set of sensitive keys.
         """
@@ -92,7 +347,8 @@ class Redactor:
         """
         if not isinstance(keys, set):
             raise ValueError("Sensitive keys must be a set.")
-        self._sensitive_keys = set(k.lower() for k in keys)
+        self._sensitive_keys = _KeySet(k.lower() for k in keys)
+        self._plan = None
 
     @redact_patterns.setter
     def redact_patterns(self, patterns: List[str]) -> None:
@@ -105,6 +361,7 @@ class Redactor:
         if not isinstance(patterns, list):
             raise ValueError("Redact patterns must be a list.")
         self._redact_patterns = [re.compile(p, re.IGNORECASE) for p in patterns]
+        self._plan = None
 
     @redaction_token.setter
     def redaction_token(self, token: str) -> None:
@@ -117,6 +374,41 @@ class Redactor:
         if not isinstance(token, str):
             raise ValueError("Redaction token must be a string.")
         self._redaction_token = token
+        self._plan = None
+
+    def add_sensitive_key(self, key: str) -> None:
+        """
+        Add a single sensitive key.
+
+        Args:
+            key: The key to be considered sensitive.
+        """
+        self._sensitive_keys.add(key.lower())
+
+    def remove_sensitive_key(self, key: str) -> None:
+        """
+        Remove a single sensitive key if present.
+
+        Args:
+            key: The key to no longer consider sensitive.
+        """
+        self._sensitive_keys.discard(key.lower())
+
+    def compile(self) -> RedactionPlan:
+        """
+        Get the compiled redaction plan, building it if the configuration changed.
+
+        Returns:
+            RedactionPlan: The compiled plan.
+        """
+        plan = self._plan
+        version = self._sensitive_keys.version
+        if plan is None or self._plan_version != version:
+            plan = self._plan = RedactionPlan(
+                self._sensitive_keys, self._redact_patterns, self._redaction_token
+            )
+            self._plan_version = version
+        return plan
 
     def redact(self, value: Any) -> Any:
         """
@@ -128,27 +420,80 @@ class Redactor:
         Returns:
             The redacted value.
         """
-        if isinstance(value, Redactable):
-            return value.__redact__()
-
-        elif isinstance(value, Sensitive):
-            return self.redaction_token
+        return self._redact(value, self.compile())
 
-        elif isinstance(value, dict):
-            return {
-                k: self.redaction_token if k.lower() in self.sensitive_keys else self.redact(v)
-                for k, v in value.items()
-            }
+    def register(self, cls: type, handler: Optional[RedactionHandler] = None):
+        """
+        Register a redaction handler for a type and its subclasses.
 
-        elif isinstance(value, list):
-            return [self.redact(item) for item in value]
+        Handlers are called as `handler(redactor, value)` and return the redacted
+        value; call `redactor.redact` for nested values. Can be used as a decorator
+        when `handler` is omitted.
 
-        elif isinstance(value, tuple):
-            return tuple(self.redact(item) for item in value)
+        Args:
+            cls: The type to handle.
+            handler: The handler to register.
 
-        elif isinstance(value, str):
-            for pattern in self.redact_patterns:
-                value = pattern.sub(self.redaction_token, value)
-            return value
+        Returns:
+            The handler, so the method can be used as a decorator.
+        """
+        if handler is None:
+            return lambda fn: self.register(cls, fn)
+        if not isinstance(cls, type):
+            raise ValueError("Redaction handlers must be registered for a type.")
+        self._handlers[cls] = lambda redactor, value, plan: handler(redactor, value)
+        self._dispatch_cache = {}
+        return handler
+
+    def _dispatch(self, cls: type) -> _Dispatch:
+        """
+        Resolve and cache the handler for a concrete type.
 
-        return value
+        Exact registrations win, then objects defining `__redact__`, then the
+        closest registered base class along the MRO. Unknown types pass through.
+        """
+        handler = self._handlers.get(cls)
+        if handler is None:
+            if hasattr(cls, "__redact__"):
+                handler = _redact_redactable
+            else:
+                handler = next(
+                    (self._handlers[base] for base in cls.__mro__[1:] if base in self._handlers),
+                    _passthrough,
+                )
+        self._dispatch_cache[cls] = handler
+        return handler
+
+    def _redact(self, value: Any, plan: RedactionPlan) -> Any:
+        handler = self._dispatch_cache.get(type(value))
+        if handler is None:
+            handler = self._dispatch(type(value))
+        return handler(self, value, plan)
+
+    def _redact_dict(self, value: dict, plan: RedactionPlan) -> dict:
+        # Hot loop: the key cache and clean strings are consulted inline to avoid
+        # a method call per entry.
+        token = plan.redaction_token
+        key_cache = plan._key_cache
+        clean_strings = plan._clean_strings
+        redact = self._redact
+        result = {}
+        for k, v in value.items():
+            sensitive = key_cache.get(k)
+            if sensitive is None:
+                sensitive = plan.is_sensitive_key(k)
+            if sensitive:
+                result[k] = token
+            elif type(v) is str:
+                result[k] = v if v in clean_strings else plan.redact_string(v)
+            else:
+                result[k] = redact(v, plan)
+        return result
+
+    def _redact_list(self, value: list, plan: RedactionPlan) -> list:
+        redact = self._redact
+        return [redact(item, plan) for item in value]
+
+    def _redact_tuple(self, value: tuple, plan: RedactionPlan) -> tuple:
+        redact = self._redact
+        return tuple(redact(item, plan) for item in value)
@@ -0,0 +1,333 @@
+# loghelpers/rotation.py
+import bz2
+import datetime
+import enum
+import gzip
+import logging
+import lzma
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+import traceback
+from typing import IO, Callable, List, Optional
+
+from .utils import reinit_after_fork
+
+
+class Compression(enum.Enum):
+    """
+    Enum describing how rotated log segments are compressed.
+    """
+    NONE = "none"
+    GZIP = "gzip"
+    BZ2 = "bz2"
+    LZMA = "lzma"
+
+
+# Suffix of the sidecar index that loghelpers.query keeps next to a segment
+INDEX_SUFFIX = ".idx"
+
+_OPENERS = {
+    Compression.GZIP: (gzip.open, ".gz"),
+    Compression.BZ2: (bz2.open, ".bz2"),
+    Compression.LZMA: (lzma.open, ".xz"),
+}
+
+
+class SegmentCompressor:
+    """
+    Background worker that compresses rotated segments and enforces retention.
+
+    Segments are named `<base>.<YYYYmmdd-HHMMSS-ffffff>` and compressed to a
+    temporary file that is renamed into place, so a crash never leaves a
+    truncated archive under the final name. After every segment the oldest
+    segments are deleted until at most `backup_count` remain and, if set, their
+    total size is at most `max_total_bytes`. Sidecar indexes of deleted segments
+    are deleted with them.
+    """
+
+    def __init__(
+            self,
+            base_filename: str,
+            compression: Compression = Compression.NONE,
+            backup_count: int = 3,
+            max_total_bytes: Optional[int] = None,
+            on_segment: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        Initialize the compressor. The worker thread is started on the first segment.
+
+        Args:
+            base_filename: Absolute path of the active log file.
+            compression: Compression applied to rotated segments.
+            backup_count: Maximum number of segments kept, or 0 for no limit.
+            max_total_bytes: Maximum total size of kept segments, or None for no limit.
+            on_segment: Called on the worker thread with the final path of every
+                segment once it is compressed, for example to index it.
+        """
+        self.base_filename = base_filename
+        self.compression = Compression(compression)
+        self.backup_count = backup_count
+        self.max_total_bytes = max_total_bytes
+        self.on_segment = on_segment
+        self._pattern = re.compile(
+            re.escape(os.path.basename(base_filename))
+            + r"\.\d{8}-\d{6}-\d{6}(?:-\d+)?(?P<suffix>\.gz|\.bz2|\.xz)?$"
+        )
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        reinit_after_fork(self)
+
+    def _after_fork(self) -> None:
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, segment: str) -> None:
+        """
+        Queue a rotated segment for compression and retention.
+
+        Args:
+            segment: Path of the rotated segment.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="loghelpers-rotation", daemon=True
+                )
+                self._thread.start()
+        self._queue.put(segment)
+
+    def seal(self) -> str:
+        """
+        Rename the active log file to a new timestamped segment and queue it.
+
+        Returns:
+            str: Path of the new segment.
+        """
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        segment = f"{self.base_filename}.{stamp}"
+        counter = 0
+        while any(os.path.exists(segment + suffix) for suffix in ("", ".gz", ".bz2", ".xz")):
+            counter += 1
+            segment = f"{self.base_filename}.{stamp}-{counter}"
+        os.rename(self.base_filename, segment)
+        self.submit(segment)
+        return segment
+
+    def segments(self) -> List[str]:
+        """
+        List the rotated segments of the log file, oldest first.
+
+        Returns:
+            List[str]: Paths of compressed and uncompressed segments.
+        """
+        directory = os.path.dirname(self.base_filename)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(directory, name) for name in sorted(names) if self._pattern.match(name)]
+
+    def pending(self) -> List[str]:
+        """
+        List segments that still need to be compressed, such as those left by a crash.
+
+        Returns:
+            List[str]: Paths of uncompressed segments, oldest first.
+        """
+        if self.compression is Compression.NONE:
+            return []
+        return [
+            path for path in self.segments()
+            if self._pattern.match(os.path.basename(path)).group("suffix") is None
+        ]
+
+    def join(self) -> None:
+        """
+        Block until every queued segment has been processed.
+        """
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            segment = self._queue.get()
+            try:
+                segment = self._compress(segment)
+                if self.on_segment is not None and os.path.exists(segment):
+                    self.on_segment(segment)
+                self._enforce_retention()
+            except Exception:
+                if logging.raiseExceptions:
+                    traceback.print_exc()
+            finally:
+                self._queue.task_done()
+
+    def _compress(self, segment: str) -> str:
+        if self.compression is Compression.NONE or not os.path.exists(segment):
+            return segment
+        opener, suffix = _OPENERS[self.compression]
+        target = segment + suffix
+        temporary = target + ".tmp"
+        with open(segment, "rb") as source, opener(temporary, "wb") as destination:
+            shutil.copyfileobj(source, destination, 1024 * 1024)
+        os.replace(temporary, target)
+        os.remove(segment)
+        return target
+
+    def _enforce_retention(self) -> None:
+        segments = self.segments()
+        sizes = []
+        for path in segments:
+            try:
+                sizes.append(os.path.getsize(path))
+            except FileNotFoundError:
+                sizes.append(0)
+        total = sum(sizes)
+        index = 0
+        while index < len(segments) and (
+                (self.backup_count and len(segments) - index > self.backup_count)
+                or (self.max_total_bytes is not None and total > self.max_total_bytes)
+        ):
+            for path in (segments[index], segments[index] + INDEX_SUFFIX):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= sizes[index]
+            index += 1
+
+
+class SegmentRotatingFileHandler(logging.Handler):
+    """
+    File handler with size- and time-based rotation that never compresses inline.
+
+    Rotation is a single rename of the active file to a timestamped segment, so it
+    costs the same no matter how many segments are kept, unlike the rename cascade
+    of RotatingFileHandler. Compression and retention run on a `SegmentCompressor`
+    thread. The size of the active file is tracked in memory, so records are
+    formatted once and no seek is needed to decide on rotation.
+    """
+
+    terminator = b"\n"
+
+    def __init__(
+            self,
+            filename: str,
+            max_bytes: int = 5 * 1024 * 1024,
+            interval: Optional[float] = None,
+            backup_count: int = 3,
+            compression: Compression = Compression.NONE,
+            max_total_bytes: Optional[int] = None,
+            encoding: str = "utf-8",
+            delay: bool = True,
+            on_segment: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        Initialize the rotating handler.
+
+        Args:
+            filename: Path of the active log file.
+            max_bytes: Size that triggers rotation, or 0 to rotate on time only.
+            interval: Seconds between time-based rotations, aligned to multiples of
+                the interval since the epoch, or None to rotate on size only.
+            backup_count: Maximum number of rotated segments kept, or 0 for no limit.
+            compression: Compression applied to rotated segments in the background.
+            max_total_bytes: Maximum total size of rotated segments, or None for no limit.
+            encoding: Encoding used for formatters without `format_bytes`.
+            delay: If True, the file is opened on the first write.
+            on_segment: Called in the background with every finished segment.
+        """
+        super().__init__()
+        self.baseFilename = os.path.abspath(filename)
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.encoding = encoding
+        self.compressor = SegmentCompressor(
+            self.baseFilename, compression, backup_count, max_total_bytes, on_segment
+        )
+        self._stream: Optional[IO[bytes]] = None
+        self._size = 0
+        self._rollover_at = self._next_rollover(time.time())
+        for segment in self.compressor.pending():
+            self.compressor.submit(segment)
+        if not delay:
+            self._open()
+
+    def _next_rollover(self, now: float) -> float:
+        if not self.interval:
+            return float("inf")
+        return (now // self.interval + 1) * self.interval
+
+    def _open(self) -> IO[bytes]:
+        self._stream = open(self.baseFilename, "ab")
+        self._size = self._stream.tell()
+        return self._stream
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            format_bytes = getattr(self.formatter, "format_bytes", None)
+            if format_bytes is not None:
+                data = format_bytes(record)
+            else:
+                data = self.format(record).encode(self.encoding) + self.terminator
+            stream = self._stream if self._stream is not None else self._open()
+            if (
+                    (self.max_bytes and self._size and self._size + len(data) > self.max_bytes)
+                    or record.created >= self._rollover_at
+            ):
+                stream = self._rotate(record.created)
+            stream.write(data)
+            stream.flush()
+            self._size += len(data)
+        except Exception:
+            self.handleError(record)
+
+    def _rotate(self, now: float) -> IO[bytes]:
+        self._rollover_at = self._next_rollover(now)
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename):
+            self.compressor.seal()
+        return self._open()
+
+    def rotate(self) -> None:
+        """
+        Rotate the active file now.
+        """
+        self.acquire()
+        try:
+            self._rotate(time.time())
+        finally:
+            self.release()
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if self._stream is not None:
+                self._stream.flush()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        """
+        Close the active file and wait for queued segments to be compressed.
+        """
+        self.acquire()
+        try:
+            try:
+                if self._stream is not None:
+                    self._stream.close()
+            finally:
+                self._stream = None
+                super().close()
+        finally:
+            self.release()
+        self.compressor.join()
@@ -0,0 +1,287 @@
+import enum
+import logging
+import random
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+from .config import Configuration
+from .context import LoggingContext
+from .utils import cancel_periodic_flush, flush_periodically
+
+
+class SamplingMode(enum.Enum):
+    """
+    Enum describing how sampling decisions are made.
+    """
+    UNIFORM = "uniform"
+    CONTEXT_KEY = "context_key"
+
+
+def _key_fraction(value: object) -> float:
+    """
+    Map a context value to a stable number in [0, 1).
+
+    crc32 is used instead of `hash` so the decision is the same in every process.
+    """
+    return zlib.crc32(str(value).encode("utf-8")) / 0x100000000
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Drops a fraction of records before they are formatted or redacted.
+
+    The rate is read from `Configuration.sample_rate` on every record, so
+    `update_sample_rate` takes effect immediately. Per-level rates override it,
+    and records at or above `keep_level` are always kept. In `CONTEXT_KEY` mode
+    the decision is derived from a context value such as `request_id`, so every
+    record of one request is either kept or dropped together; records without
+    the key fall back to uniform sampling.
+
+    Random decisions are stored on the record per configuration, so filters of
+    the same configuration (such as the console and file handlers built from it)
+    keep or drop a record together, while filters of other configurations decide
+    on their own. A record whose attribute is set to True is always kept.
+    """
+
+    RECORD_ATTRIBUTE = "_loghelpers_sampled"
+
+    def __init__(
+            self,
+            config: Configuration,
+            mode: SamplingMode = SamplingMode.UNIFORM,
+            key: str = "request_id",
+            level_rates: Optional[Dict[int, float]] = None,
+            keep_level: int = logging.ERROR,
+    ):
+        """
+        Initialize the sampling filter.
+
+        Args:
+            config: Configuration providing the base `sample_rate`.
+            mode: How to make sampling decisions.
+            key: The context key used in `CONTEXT_KEY` mode.
+            level_rates: Optional sample rates per level number.
+            keep_level: Records at or above this level are never sampled away.
+        """
+        super().__init__()
+        self.config = config
+        self.mode = SamplingMode(mode)
+        self.key = key
+        self.level_rates: Dict[int, float] = dict(level_rates or {})
+        self.keep_level = keep_level
+
+    def rate_for(self, levelno: int) -> float:
+        """
+        Get the sample rate that applies to a level.
+
+        Args:
+            levelno: The level number of the record.
+
+        Returns:
+            float: The fraction of records to keep.
+        """
+        if levelno >= self.keep_level:
+            return 1.0
+        rate = self.level_rates.get(levelno)
+        return self.config.sample_rate if rate is None else rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        decisions = record.__dict__.get(self.RECORD_ATTRIBUTE)
+        if decisions is True:
+            return True
+        key = id(self.config)
+        if decisions is not None:
+            decision = decisions.get(key)
+            if decision is not None:
+                return decision
+        decision = self._decide(record)
+        # Only random decisions are shared; fixed rates may differ per level and filter
+        if 0.0 < self.rate_for(record.levelno) < 1.0:
+            if decisions is None:
+                decisions = record.__dict__[self.RECORD_ATTRIBUTE] = {}
+            decisions[key] = decision
+        return decision
+
+    def _decide(self, record: logging.LogRecord) -> bool:
+        rate = self.rate_for(record.levelno)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        if self.mode is SamplingMode.CONTEXT_KEY:
+            context = getattr(record, LoggingContext.RECORD_ATTRIBUTE, None)
+            if context is None:
+                context = LoggingContext._active()
+            value = context.get(self.key)
+            if value is not None:
+                return _key_fraction(value) < rate
+        return random.random() < rate
+
+
+class AdaptiveSamplingFilter(SamplingFilter):
+    """
+    Sampling filter that scales the configured sample rates towards a target throughput.
+
+    Every `window` seconds the controller compares the number of offered records
+    with `target_rate` (records per second) and the depth of the watched handler
+    queues, then adjusts an adaptive factor that is applied on top of
+    `Configuration.sample_rate` and the per-level rates. The configured rates are
+    never changed, and the effective rate never exceeds them. Storms lower the
+    factor immediately; recovery is smoothed so the rate does not oscillate.
+    Suppressed records are summarized by one WARNING record per logger whose
+    records were dropped, handled by that logger so it reaches the same handlers,
+    at most every `summary_interval` seconds and once more on `close`.
+
+    Counters are updated without a lock, so under heavy contention they are
+    approximate; that is sufficient for rate estimation.
+    """
+
+    def __init__(
+            self,
+            config: Configuration,
+            target_rate: float,
+            window: float = 1.0,
+            min_rate: float = 0.001,
+            max_rate: Optional[float] = None,
+            queue_high_watermark: float = 0.5,
+            recovery: float = 0.5,
+            summary_interval: float = 10.0,
+            **kwargs,
+    ):
+        """
+        Initialize the adaptive sampling filter.
+
+        Args:
+            config: Configuration providing the static `sample_rate`.
+            target_rate: Target number of records per second.
+            window: Seconds between rate adjustments.
+            min_rate: Lowest effective sample rate the controller will set.
+            max_rate: Highest effective sample rate the controller will set. Defaults to,
+                and is always capped at, `config.sample_rate`.
+            queue_high_watermark: Queue fill ratio above which the rate is cut further.
+            recovery: Fraction of the gap closed per window when raising the rate.
+            summary_interval: Minimum seconds between suppression summaries.
+            **kwargs: Passed on to `SamplingFilter`.
+        """
+        super().__init__(config, **kwargs)
+        if target_rate <= 0:
+            raise ValueError("Target rate must be positive.")
+        self.target_rate = target_rate
+        self.window = window
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.queue_high_watermark = queue_high_watermark
+        self.recovery = recovery
+        self.summary_interval = summary_interval
+        self.factor = 1.0
+        self.queues = []
+        self._adjust_lock = threading.Lock()
+        self._offered = 0
+        self._suppressed: Dict[str, int] = {}
+        self._window_start = self._last_summary = time.monotonic()
+        flush_periodically(self, summary_interval)
+
+    def watch(self, handler: logging.Handler) -> None:
+        """
+        Include the queue of a handler in backpressure decisions.
+
+        Args:
+            handler: A handler exposing a bounded `queue`, such as AsyncPipelineHandler.
+        """
+        queue = getattr(handler, "queue", None)
+        if queue is not None and queue.maxsize > 0:
+            self.queues.append(queue)
+
+    def queue_fill(self) -> float:
+        """
+        Get the fill ratio of the fullest watched queue.
+
+        Returns:
+            float: A number between 0.0 and 1.0.
+        """
+        return max((q.qsize() / q.maxsize for q in self.queues), default=0.0)
+
+    def rate_for(self, levelno: int) -> float:
+        rate = super().rate_for(levelno)
+        if levelno >= self.keep_level:
+            return rate
+        return rate * self.factor
+
+    def _decide(self, record: logging.LogRecord) -> bool:
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._adjust(now)
+        self._offered += 1
+        decision = super()._decide(record)
+        if not decision:
+            self._suppressed[record.name] = self._suppressed.get(record.name, 0) + 1
+        return decision
+
+    def _adjust(self, now: float) -> None:
+        if not self._adjust_lock.acquire(blocking=False):
+            return
+        try:
+            elapsed = now - self._window_start
+            if elapsed < self.window:
+                return
+            observed = self._offered / elapsed
+            self._offered = 0
+            self._window_start = now
+
+            static = self.config.sample_rate
+            if static > 0.0:
+                self.factor = self._next_factor(static, observed)
+
+            if now - self._last_summary >= self.summary_interval:
+                self._flush_summary(now)
+        finally:
+            self._adjust_lock.release()
+
+    def _next_factor(self, static: float, observed: float) -> float:
+        highest = static if self.max_rate is None else min(self.max_rate, static)
+        desired = highest if observed <= 0 else min(highest, self.target_rate / observed)
+        fill = self.queue_fill()
+        if fill > self.queue_high_watermark:
+            desired *= max(0.0, 1.0 - fill) / (1.0 - self.queue_high_watermark)
+
+        current = static * self.factor
+        if desired > current:
+            desired = current + (desired - current) * self.recovery
+        desired = min(highest, max(self.min_rate, desired))
+        return min(1.0, desired / static)
+
+    def _periodic_flush(self) -> None:
+        with self._adjust_lock:
+            now = time.monotonic()
+            if now - self._last_summary >= self.summary_interval:
+                self._flush_summary(now)
+
+    def close(self) -> None:
+        """
+        Stop the periodic summaries and emit the summary of records suppressed since the last one.
+        """
+        cancel_periodic_flush(self)
+        with self._adjust_lock:
+            self._flush_summary(time.monotonic())
+
+    def _flush_summary(self, now: float) -> None:
+        suppressed, self._suppressed = self._suppressed, {}
+        for name, count in suppressed.items():
+            self._emit_summary(name, count, now - self._last_summary)
+        self._last_summary = now
+
+    def _emit_summary(self, name: str, suppressed: int, period: float) -> None:
+        logger = logging.getLogger(name)
+        record = logger.makeRecord(
+            logger.name,
+            logging.WARNING,
+            __file__,
+            0,
+            "%d records suppressed by sampling in the last %.1fs (sample rate %.3f)",
+            (suppressed, period, self.config.sample_rate * self.factor),
+            None,
+        )
+        record.__dict__[self.RECORD_ATTRIBUTE] = True
+        logger.handle(record)
@@ -0,0 +1,577 @@
+# loghelpers/shm.py
+import argparse
+import itertools
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .aggregation import (
+    FRAME_HEADER, RawFormatter, RawRecord, add_sink_arguments, sink_configuration
+)
+from .pipeline import OverflowPolicy
+from .utils import reinit_after_fork
+
+# Header layout. Head and tail live on separate cache lines so the producer and
+# the consumer never write to the same line.
+_U64 = struct.Struct("<Q")
+_CHECK = struct.Struct("<I")
+_HEAD = 0
+_DROPPED = 8
+_CAPACITY = 16
+_CLOSED = 24
+_TAIL = 64
+HEADER_SIZE = 128
+
+_SHM_DIR = "/dev/shm"
+_ring_ids = itertools.count()
+
+
+# Attaching swaps out the process-wide resource_tracker.register, so attaching
+# and creating segments must not run concurrently.
+_tracker_lock = threading.Lock()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Attaching must not register the segment with the resource tracker, which
+    # would unlink it when the consumer exits. Only the creator unlinks it.
+    from multiprocessing import resource_tracker
+    with _tracker_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def _untrack(shm: shared_memory.SharedMemory) -> None:
+    # Hand the segment over to the collector: the creator's resource tracker must
+    # not unlink it when the creating process exits.
+    if os.name == "posix":
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+
+
+def _unlink_attached(shm: shared_memory.SharedMemory) -> None:
+    # Before 3.13 unlink() always unregisters the name, so register it first to
+    # keep the books of the resource tracker balanced.
+    if os.name == "posix" and sys.version_info < (3, 13):
+        from multiprocessing import resource_tracker
+        resource_tracker.register(shm._name, "shared_memory")  # type: ignore[attr-defined]
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+        return
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _checksum(offset: int, frame: bytes) -> int:
+    return zlib.crc32(frame, zlib.crc32(_U64.pack(offset)))
+
+
+class SharedMemoryRing:
+    """
+    Single-producer, single-consumer byte ring in a named shared memory segment.
+
+    The producer only ever advances `head` and the consumer only ever advances
+    `tail`, both as monotonically increasing byte offsets, so no lock is needed.
+    This relies on aligned 8-byte stores not tearing, which holds on the
+    platforms CPython supports for shared memory.
+
+    Python has no memory fences, so on weakly ordered CPUs such as ARM the
+    consumer may see a new `head` before the frame bytes it covers. Every frame
+    is therefore preceded by a CRC32 of its bytes and its absolute offset; a
+    frame whose checksum does not match yet is left in the ring and read again
+    on the next call. The offset makes a stale frame from an earlier lap fail
+    the check as well. The tail is only stored after the checksum was compared,
+    so the producer cannot reuse space the consumer is still reading.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self._buf = shm.buf
+        self.name = shm.name
+        self.owner = owner
+        self.capacity = _U64.unpack_from(self._buf, _CAPACITY)[0]
+        self._head = _U64.unpack_from(self._buf, _HEAD)[0]
+        self._tail = _U64.unpack_from(self._buf, _TAIL)[0]
+
+    @classmethod
+    def create(cls, name: str, capacity: int) -> "SharedMemoryRing":
+        """
+        Create a new ring. The creator is its producer.
+
+        Args:
+            name: Name of the shared memory segment.
+            capacity: Size of the data area in bytes.
+
+        Returns:
+            SharedMemoryRing: The new ring.
+        """
+        with _tracker_lock:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE + capacity)
+        shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        _U64.pack_into(shm.buf, _CAPACITY, capacity)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedMemoryRing":
+        """
+        Attach to an existing ring as its consumer.
+
+        Args:
+            name: Name of the shared memory segment.
+
+        Returns:
+            SharedMemoryRing: The attached ring.
+        """
+        return cls(_attach(name), owner=False)
+
+    @property
+    def dropped(self) -> int:
+        """
+        Get the number of frames the producer could not write.
+
+        Returns:
+            int: The dropped frame count.
+        """
+        return _U64.unpack_from(self._buf, _DROPPED)[0]
+
+    @property
+    def closed(self) -> bool:
+        """
+        Check whether the producer has closed the ring.
+
+        Returns:
+            bool: True once the producer will not write anymore.
+        """
+        return bool(_U64.unpack_from(self._buf, _CLOSED)[0])
+
+    @property
+    def empty(self) -> bool:
+        """
+        Check whether every written frame has been consumed.
+
+        Returns:
+            bool: True if the consumer has caught up with the producer.
+        """
+        return _U64.unpack_from(self._buf, _HEAD)[0] == _U64.unpack_from(self._buf, _TAIL)[0]
+
+    def count_drop(self) -> None:
+        """
+        Increment the dropped frame count. Producer only.
+        """
+        _U64.pack_into(self._buf, _DROPPED, self.dropped + 1)
+
+    def fits(self, frame: bytes) -> bool:
+        """
+        Check whether a frame fits into an empty ring.
+
+        Args:
+            frame: The frame to write.
+
+        Returns:
+            bool: False if the frame is larger than the ring.
+        """
+        return _CHECK.size + len(frame) <= self.capacity
+
+    def write(self, frame: bytes) -> bool:
+        """
+        Append a frame if it fits. Producer only.
+
+        Args:
+            frame: The bytes to append.
+
+        Returns:
+            bool: False if the ring does not have room for the frame.
+        """
+        size = _CHECK.size + len(frame)
+        head = self._head
+        tail = _U64.unpack_from(self._buf, _TAIL)[0]
+        if self.capacity - (head - tail) < size:
+            return False
+        self._copy_in(head % self.capacity, _CHECK.pack(_checksum(head, frame)) + frame)
+        head += size
+        _U64.pack_into(self._buf, _HEAD, head)
+        self._head = head
+        return True
+
+    def read(self) -> Iterator[Tuple[bytes, int]]:
+        """
+        Yield every complete frame written so far. Consumer only.
+
+        The tail is published once the frames have been consumed.
+
+        Yields:
+            Tuple of the payload bytes and the level number of each frame.
+        """
+        head = _U64.unpack_from(self._buf, _HEAD)[0]
+        tail = self._tail
+        prefix_size = _CHECK.size + FRAME_HEADER.size
+        try:
+            while head - tail >= prefix_size:
+                prefix = self._copy_out(tail % self.capacity, prefix_size)
+                length, levelno = FRAME_HEADER.unpack_from(prefix, _CHECK.size)
+                size = prefix_size + length
+                if size > head - tail:
+                    break
+                frame = prefix[_CHECK.size:] + self._copy_out((tail + prefix_size) % self.capacity, length)
+                if _CHECK.unpack_from(prefix)[0] != _checksum(tail, frame):
+                    # Not all bytes of the frame are visible yet
+                    break
+                yield frame[FRAME_HEADER.size:], levelno
+                tail += size
+        finally:
+            self._tail = tail
+            _U64.pack_into(self._buf, _TAIL, tail)
+
+    def _copy_in(self, offset: int, data: bytes) -> None:
+        start = HEADER_SIZE + offset
+        first = min(len(data), self.capacity - offset)
+        self._buf[start:start + first] = data[:first]
+        if first < len(data):
+            self._buf[HEADER_SIZE:HEADER_SIZE + len(data) - first] = data[first:]
+
+    def _copy_out(self, offset: int, size: int) -> bytes:
+        start = HEADER_SIZE + offset
+        first = min(size, self.capacity - offset)
+        data = bytes(self._buf[start:start + first])
+        if first < size:
+            data += bytes(self._buf[HEADER_SIZE:HEADER_SIZE + size - first])
+        return data
+
+    def close(self) -> None:
+        """
+        Detach from the ring.
+
+        The producer also marks it closed. An empty ring is unlinked right away;
+        one with unread frames is left to the collector, which unlinks it once it
+        has drained it, so records of a process that exits before the collector
+        found its ring are not lost.
+        """
+        if self._buf is None:
+            return
+        unlink = self.owner and self.empty
+        if self.owner:
+            if not unlink:
+                _untrack(self._shm)
+            _U64.pack_into(self._buf, _CLOSED, 1)
+        self._buf.release()
+        self._buf = None
+        self._shm.close()
+        if unlink:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def unlink(self) -> None:
+        """
+        Remove the name of a ring whose producer has closed it. Consumer only.
+        """
+        _unlink_attached(self._shm)
+
+
+class SharedMemoryHandler(logging.Handler):
+    """
+    Writes formatted records into a per-process shared memory ring.
+
+    Each handler creates its own ring named `<prefix>_<pid>_<n>`, so it is the
+    only producer of that ring; a `SharedMemoryCollector` drains every ring with
+    the same prefix into one sink. Records use the same frames as
+    `AggregatingHandler`.
+
+    When the ring is full the `DROP_NEWEST` policy drops the record, and the
+    `BLOCK` policy waits up to `block_timeout` seconds for the collector before
+    dropping it. Drops are counted in the ring header, where the collector
+    reports them. Forked children create a ring of their own on first use.
+    """
+
+    terminator = b"\n"
+
+    def __init__(
+            self,
+            prefix: str = "loghelpers",
+            size: int = 1024 * 1024,
+            overflow_policy: OverflowPolicy = OverflowPolicy.DROP_NEWEST,
+            block_timeout: float = 0.1,
+            encoding: str = "utf-8",
+    ):
+        """
+        Initialize the handler. The ring is created on the first record.
+
+        Args:
+            prefix: Prefix of the ring name, shared with the collector.
+            size: Data capacity of the ring in bytes.
+            overflow_policy: `DROP_NEWEST` or `BLOCK`.
+            block_timeout: Seconds the `BLOCK` policy waits for free space.
+            encoding: Encoding used for formatters without `format_bytes`.
+        """
+        super().__init__()
+        overflow_policy = OverflowPolicy(overflow_policy)
+        if overflow_policy not in (OverflowPolicy.DROP_NEWEST, OverflowPolicy.BLOCK):
+            raise ValueError(f"Unsupported overflow policy for shared memory rings: {overflow_policy}")
+        self.prefix = prefix
+        self.size = size
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.encoding = encoding
+        self._ring: Optional[SharedMemoryRing] = None
+        reinit_after_fork(self)
+
+    def _after_fork(self) -> None:
+        # The parent's ring must keep a single producer
+        self.createLock()
+        self._ring = None
+
+    @property
+    def ring(self) -> SharedMemoryRing:
+        """
+        Get the ring of the current process, creating it if needed.
+
+        Returns:
+            SharedMemoryRing: The ring this handler writes to.
+        """
+        if self._ring is None:
+            name = f"{self.prefix}_{os.getpid()}_{next(_ring_ids)}"
+            self._ring = SharedMemoryRing.create(name, self.size)
+        return self._ring
+
+    @property
+    def dropped(self) -> int:
+        """
+        Get the number of records dropped because the ring was full.
+
+        Returns:
+            int: The dropped record count.
+        """
+        return self._ring.dropped if self._ring is not None else 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            format_bytes = getattr(self.formatter, "format_bytes", None)
+            if format_bytes is not None:
+                payload = format_bytes(record)
+            else:
+                payload = self.format(record).encode(self.encoding) + self.terminator
+            frame = FRAME_HEADER.pack(len(payload), min(record.levelno, 255)) + payload
+            ring = self.ring
+            if ring.write(frame):
+                return
+            if self.overflow_policy is OverflowPolicy.BLOCK and ring.fits(frame):
+                deadline = time.monotonic() + self.block_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(0.0005)
+                    if ring.write(frame):
+                        return
+            ring.count_drop()
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        """
+        Mark the ring closed and release it. An attached collector drains what is left.
+        """
+        self.acquire()
+        try:
+            if self._ring is not None:
+                self._ring.close()
+                self._ring = None
+            super().close()
+        finally:
+            self.release()
+
+
+def _owner_exited(name: str) -> bool:
+    # Rings are named <prefix>_<pid>_<n> by SharedMemoryHandler
+    parts = name.rsplit("_", 2)
+    if len(parts) != 3 or not parts[1].isdigit():
+        return False
+    try:
+        os.kill(int(parts[1]), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False
+    return False
+
+
+class SharedMemoryCollector:
+    """
+    Drains every shared memory ring with a given prefix into a single sink.
+
+    Rings are discovered by listing `/dev/shm` (Linux) and can also be given by
+    name. New drops reported by producers are logged as a WARNING on the
+    "loghelpers.shm" logger. Rings closed by their producer, and rings whose
+    producer process no longer exists (for example after a crash), are unlinked
+    once they are drained.
+    """
+
+    def __init__(
+            self,
+            handler: logging.Handler,
+            prefix: Optional[str] = "loghelpers",
+            names: Iterable[str] = (),
+            poll_interval: float = 0.005,
+            flush_interval: float = 1.0,
+            summary_logger: Optional[logging.Logger] = None,
+    ):
+        """
+        Initialize the collector.
+
+        Args:
+            handler: The sink handler that owns the log file.
+            prefix: Prefix of the rings to discover, or None to only use `names`.
+            names: Ring names to attach to in addition to discovered ones.
+            poll_interval: Seconds to sleep when no ring had data.
+            flush_interval: Seconds of idleness after which the sink is flushed.
+            summary_logger: Logger for drop reports.
+        """
+        self.handler = handler
+        self.handler.setFormatter(RawFormatter())
+        self.prefix = prefix
+        self.names = list(names)
+        self.poll_interval = poll_interval
+        self.flush_interval = flush_interval
+        self.summary_logger = summary_logger or logging.getLogger("loghelpers.shm")
+        self.dropped: Dict[str, int] = {}
+        self._rings: Dict[str, SharedMemoryRing] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def discover(self) -> None:
+        """
+        Attach to rings that are not attached yet.
+        """
+        names: List[str] = list(self.names)
+        if self.prefix is not None and os.path.isdir(_SHM_DIR):
+            marker = f"{self.prefix}_"
+            names.extend(name for name in os.listdir(_SHM_DIR) if name.startswith(marker))
+        for name in names:
+            if name in self._rings:
+                continue
+            try:
+                self._rings[name] = SharedMemoryRing.attach(name)
+            except (FileNotFoundError, ValueError):
+                continue
+
+    def drain(self) -> int:
+        """
+        Write every available record of every attached ring to the sink.
+
+        Returns:
+            int: The number of records written.
+        """
+        written = 0
+        handle = self.handler.handle
+        for name, ring in list(self._rings.items()):
+            # Checked before reading, so every frame of a finished producer is read
+            closed = ring.closed or _owner_exited(name)
+            for payload, levelno in ring.read():
+                handle(RawRecord(payload, levelno))  # type: ignore[arg-type]
+                written += 1
+            self._report_drops(name, ring.dropped)
+            if closed:
+                # The producer is gone, so the collector removes the drained ring
+                if not ring.empty:
+                    self.summary_logger.warning(
+                        "shared memory ring %s of an exited producer had unreadable frames", name
+                    )
+                ring.close()
+                ring.unlink()
+                del self._rings[name]
+        return written
+
+    def _report_drops(self, name: str, dropped: int) -> None:
+        previous = self.dropped.get(name, 0)
+        if dropped > previous:
+            self.dropped[name] = dropped
+            self.summary_logger.warning(
+                "shared memory ring %s dropped %d records (%d total)",
+                name, dropped - previous, dropped,
+            )
+
+    def serve_forever(self) -> None:
+        """
+        Discover and drain rings until `stop` is called.
+        """
+        last_discovery = last_write = time.monotonic()
+        self.discover()
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                if now - last_discovery >= self.flush_interval:
+                    self.discover()
+                    last_discovery = now
+                if self.drain():
+                    last_write = now
+                    continue
+                if now - last_write >= self.flush_interval:
+                    self.handler.flush()
+                    last_write = now
+                self._stop.wait(self.poll_interval)
+        finally:
+            self.discover()
+            self.drain()
+            for ring in self._rings.values():
+                ring.close()
+            self._rings.clear()
+            self.handler.close()
+
+    def start(self) -> None:
+        """
+        Collect on a daemon thread.
+        """
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="loghelpers-shm-collector", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop collecting after a final drain and close the sink.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Run a collector that owns the file sink described by the command line.
+    """
+    from .handlers import create_file_sink
+
+    parser = argparse.ArgumentParser(
+        prog="python -m loghelpers.shm",
+        description="Write records from SharedMemoryHandler rings to a single log file.",
+    )
+    parser.add_argument("--prefix", default="loghelpers", help="Prefix of the rings to collect.")
+    add_sink_arguments(parser)
+    args = parser.parse_args(argv)
+
+    config = sink_configuration(args)
+    collector = SharedMemoryCollector(
+        create_file_sink(config), prefix=args.prefix, flush_interval=config.flush_interval
+    )
+    try:
+        collector.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+import enum
+import logging
+import mmap
+import os
+import time
+from typing import Callable, Optional, Tuple
+
+from .rotation import Compression, SegmentCompressor
+from .utils import cancel_periodic_flush, flush_periodically, reinit_after_fork
+
+
+class FsyncPolicy(enum.Enum):
+    """
+    Enum describing when buffered sinks force written data to stable storage.
+    """
+    NEVER = "never"
+    BATCH = "batch"
+    INTERVAL = "interval"
+
+
+class BufferedFileHandler(logging.Handler):
+    """
+    File handler that coalesces formatted lines into a single write per batch.
+
+    Lines are appended to a reusable bytearray and written with one `os.write`
+    when the buffer reaches `buffer_size`, when a record at or above
+    `flush_level` arrives, or when the buffered data is `flush_interval` seconds
+    old. The age is also checked by a background flusher, so lines are written
+    even if no further record arrives. The fsync policy controls durability
+    independently of batching; the `INTERVAL` policy is applied by the same
+    flusher after a burst.
+
+    Formatters providing `format_bytes` (such as JsonFormatter) are used
+    directly, skipping the str encode step.
+    """
+
+    terminator = b"\n"
+
+    def __init__(
+            self,
+            filename: str,
+            buffer_size: int = 64 * 1024,
+            flush_interval: float = 1.0,
+            flush_level: int = logging.ERROR,
+            fsync_policy: FsyncPolicy = FsyncPolicy.NEVER,
+            fsync_interval: float = 1.0,
+            encoding: str = "utf-8",
+            delay: bool = True,
+    ):
+        """
+        Initialize the buffered file handler.
+
+        Args:
+            filename: Path of the log file. The file is opened in append mode.
+            buffer_size: Number of buffered bytes that triggers a write.
+            flush_interval: Maximum age in seconds of buffered data before a write.
+            flush_level: Records at or above this level are written immediately.
+            fsync_policy: When to fsync the file after writing.
+            fsync_interval: Minimum seconds between fsyncs for the `INTERVAL` policy.
+            encoding: Encoding used for formatted lines.
+            delay: If True, the file is opened on the first write.
+        """
+        super().__init__()
+        self.baseFilename = os.path.abspath(filename)
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        self.fsync_policy = FsyncPolicy(fsync_policy)
+        self.fsync_interval = fsync_interval
+        self.encoding = encoding
+        self._buffer = bytearray()
+        self._fd: Optional[int] = None
+        self._last_flush = time.monotonic()
+        self._last_fsync = self._last_flush
+        self._unsynced = False
+        if not delay:
+            self._open()
+        reinit_after_fork(self)
+        interval = flush_interval
+        if self.fsync_policy is FsyncPolicy.INTERVAL:
+            interval = min(interval, fsync_interval)
+        flush_periodically(self, interval)
+
+    def _after_fork(self) -> None:
+        # Lines buffered before the fork are written by the parent
+        self.createLock()
+        self._buffer = bytearray()
+
+    def _open(self) -> int:
+        self._fd = os.open(self.baseFilename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        return self._fd
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            format_bytes = getattr(self.formatter, "format_bytes", None)
+            if format_bytes is not None:
+                self._buffer += format_bytes(record)
+            else:
+                self._buffer += self.format(record).encode(self.encoding)
+                self._buffer += self.terminator
+            now = time.monotonic()
+            if (
+                    len(self._buffer) >= self.buffer_size
+                    or record.levelno >= self.flush_level
+                    or now - self._last_flush >= self.flush_interval
+            ):
+                self._write_buffer(now)
+        except Exception:
+            self.handleError(record)
+
+    def _write_buffer(self, now: float) -> None:
+        self._last_flush = now
+        if not self._buffer:
+            return
+        fd = self._fd if self._fd is not None else self._open()
+        written = os.write(fd, self._buffer)
+        while written < len(self._buffer):
+            written += os.write(fd, bytes(self._buffer[written:]))
+        self._buffer.clear()
+
+        if self.fsync_policy is FsyncPolicy.BATCH or (
+                self.fsync_policy is FsyncPolicy.INTERVAL
+                and now - self._last_fsync >= self.fsync_interval
+        ):
+            os.fsync(fd)
+            self._last_fsync = now
+            self._unsynced = False
+        else:
+            self._unsynced = True
+
+    def _periodic_flush(self) -> None:
+        self.acquire()
+        try:
+            now = time.monotonic()
+            if self._buffer and now - self._last_flush >= self.flush_interval:
+                self._write_buffer(now)
+            elif (
+                    self._unsynced
+                    and self.fsync_policy is FsyncPolicy.INTERVAL
+                    and self._fd is not None
+                    and now - self._last_fsync >= self.fsync_interval
+            ):
+                os.fsync(self._fd)
+                self._last_fsync = now
+                self._unsynced = False
+        finally:
+            self.release()
+
+    def flush(self) -> None:
+        """
+        Write any buffered lines to the file.
+        """
+        self.acquire()
+        try:
+            self._write_buffer(time.monotonic())
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        """
+        Write any buffered lines, fsync unless the policy is `NEVER`, and close the file.
+        """
+        cancel_periodic_flush(self)
+        self.acquire()
+        try:
+            try:
+                self._write_buffer(time.monotonic())
+                if self._fd is not None:
+                    if self.fsync_policy is not FsyncPolicy.NEVER:
+                        os.fsync(self._fd)
+                    os.close(self._fd)
+            finally:
+                self._fd = None
+                super().close()
+        finally:
+            self.release()
+
+
+class MmapSegmentHandler(logging.Handler):
+    """
+    File handler that writes records into preallocated, memory-mapped segments.
+
+    The active segment (the log file itself) is preallocated to `segment_size`
+    bytes and mapped, so a record costs one memory copy instead of a write
+    syscall. When a record no longer fits, the segment is sealed: unmapped,
+    truncated to its used length and renamed to a timestamped segment that a
+    `SegmentCompressor` compresses and prunes in the background.
+
+    Unused space is zero-filled. On start the active segment is recovered by
+    treating the first NUL byte as its end and dropping a trailing partial line,
+    so records written before a crash are kept. Formatters must therefore not
+    emit NUL bytes, which JsonFormatter never does. Data in the map survives a
+    process crash; call `sync` to force it to disk as well.
+
+    The mapping is shared with forked children, so a child cannot append to
+    it without overwriting the parent's records. Handlers inherited across
+    `os.fork` drop the mapping and discard records in the child; create a new
+    handler for another file there instead.
+    """
+
+    terminator = b"\n"
+
+    def __init__(
+            self,
+            filename: str,
+            segment_size: int = 64 * 1024 * 1024,
+            backup_count: int = 0,
+            compression: Compression = Compression.NONE,
+            max_total_bytes: Optional[int] = None,
+            encoding: str = "utf-8",
+            on_segment: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        Initialize the handler and recover or create the active segment.
+
+        Args:
+            filename: Path of the active segment.
+            segment_size: Preallocated size of a segment in bytes.
+            backup_count: Maximum number of sealed segments kept, or 0 for no limit.
+            compression: Compression applied to sealed segments in the background.
+            max_total_bytes: Maximum total size of sealed segments, or None for no limit.
+            encoding: Encoding used for formatters without `format_bytes`.
+            on_segment: Called in the background with every finished segment.
+        """
+        super().__init__()
+        if segment_size <= 0:
+            raise ValueError("Segment size must be a positive integer.")
+        self.baseFilename = os.path.abspath(filename)
+        self.segment_size = segment_size
+        self.encoding = encoding
+        self.compressor = SegmentCompressor(
+            self.baseFilename, compression, backup_count, max_total_bytes, on_segment
+        )
+        self._fd: Optional[int] = None
+        self._map: Optional[mmap.mmap] = None
+        self._pos = 0
+        self._forked = False
+        self._open()
+        reinit_after_fork(self)
+
+    def _after_fork(self) -> None:
+        # The parent keeps writing at the same offsets; truncating or writing here would corrupt them
+        self.createLock()
+        self._forked = True
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _open(self, min_size: int = 0) -> None:
+        fd = os.open(self.baseFilename, os.O_RDWR | os.O_CREAT, 0o644)
+        length = os.fstat(fd).st_size
+        used, end = self._recover(fd, length) if length else (0, 0)
+        if used and used + min_size > max(self.segment_size, length):
+            os.ftruncate(fd, used)
+            os.close(fd)
+            self.compressor.seal()
+            self._open(min_size)
+            return
+
+        size = max(self.segment_size, min_size, length)
+        if length < size:
+            _preallocate(fd, length, size)
+        self._map = mmap.mmap(fd, size)
+        if end > used:
+            self._map[used:end] = bytes(end - used)
+        self._fd = fd
+        self._pos = used
+
+    @staticmethod
+    def _recover(fd: int, length: int) -> Tuple[int, int]:
+        with mmap.mmap(fd, length, access=mmap.ACCESS_READ) as existing:
+            end = existing.find(b"\0")
+            if end < 0:
+                end = length
+            return existing.rfind(b"\n", 0, end) + 1, end
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._forked:
+            return
+        try:
+            format_bytes = getattr(self.formatter, "format_bytes", None)
+            if format_bytes is not None:
+                data = format_bytes(record)
+            else:
+                data = self.format(record).encode(self.encoding) + self.terminator
+            if self._map is None:
+                self._open(len(data))
+            end = self._pos + len(data)
+            if end > len(self._map):
+                self._release()
+                self.compressor.seal()
+                self._open(len(data))
+                end = len(data)
+            self._map[self._pos:end] = data
+            self._pos = end
+        except Exception:
+            self.handleError(record)
+
+    def _release(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._fd is not None:
+            os.ftruncate(self._fd, self._pos)
+            os.close(self._fd)
+            self._fd = None
+
+    def sync(self) -> None:
+        """
+        Force the used part of the active segment to disk.
+        """
+        self.acquire()
+        try:
+            if self._map is not None:
+                self._map.flush()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        """
+        Truncate the active segment to its used length and close it.
+
+        The segment stays active, so the next handler continues appending to it.
+        """
+        self.acquire()
+        try:
+            try:
+                self._release()
+            finally:
+                super().close()
+        finally:
+            self.release()
+        self.compressor.join()
+
+
+def _preallocate(fd: int, length: int, size: int) -> None:
+    try:
+        os.posix_fallocate(fd, length, size - length)
+    except (AttributeError, OSError):
+        os.ftruncate(fd, size)
@@ -1,6 +1,13 @@
 # loghelpers/utils.py
+import os
 import re
+import threading
+import time
+import weakref
 from enum import Enum
+from typing import Any, List, Optional, Tuple
+
+_FORK_REINIT: "weakref.WeakSet[Any]" = weakref.WeakSet()
 
 
 def get_root_path() -> str:
@@ -10,10 +17,125 @@ def get_root_path() -> str:
     Returns:
         str: The root path of the project.
     """
-    import os
     return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
+def reinit_after_fork(obj: Any) -> None:
+    """
+    Register an object whose `_after_fork` method is called in forked children.
+
+    Used by handlers that own threads, sockets or buffers which must not be
+    shared with the parent process. Objects are held weakly.
+
+    Args:
+        obj: The object to reinitialize after `os.fork`.
+    """
+    _FORK_REINIT.add(obj)
+
+
+def _run_after_fork() -> None:
+    for obj in list(_FORK_REINIT):
+        try:
+            obj._after_fork()
+        except Exception:
+            pass
+
+
+class _PeriodicFlusher:
+    """
+    Single daemon thread that calls `_periodic_flush` on registered objects.
+    """
+
+    def __init__(self):
+        self._entries: "weakref.WeakKeyDictionary[Any, List[float]]" = weakref.WeakKeyDictionary()
+        self._after_fork()
+
+    def _after_fork(self) -> None:
+        self._condition = threading.Condition(threading.Lock())
+        self._thread: Optional[threading.Thread] = None
+        if len(self._entries):
+            self._start()
+
+    def _start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="loghelpers-flusher", daemon=True)
+            self._thread.start()
+
+    def add(self, obj: Any, interval: float) -> None:
+        with self._condition:
+            self._entries[obj] = [interval, time.monotonic() + interval]
+            self._start()
+            self._condition.notify()
+
+    def discard(self, obj: Any) -> None:
+        with self._condition:
+            self._entries.pop(obj, None)
+
+    def _run(self) -> None:
+        while True:
+            due = self._wait()
+            while due:
+                obj = due.pop()
+                try:
+                    obj._periodic_flush()
+                except Exception:
+                    pass
+                # Do not keep the object alive while waiting
+                del obj
+
+    def _wait(self) -> List[Any]:
+        with self._condition:
+            while True:
+                due, next_due = self._collect(time.monotonic())
+                if due:
+                    return due
+                self._condition.wait(None if next_due is None else next_due - time.monotonic())
+
+    def _collect(self, now: float) -> Tuple[List[Any], Optional[float]]:
+        due = []
+        next_due = None
+        for obj, entry in list(self._entries.items()):
+            if entry[1] <= now:
+                entry[1] = now + entry[0]
+                due.append(obj)
+            if next_due is None or entry[1] < next_due:
+                next_due = entry[1]
+        return due, next_due
+
+
+_FLUSHER = _PeriodicFlusher()
+
+
+def flush_periodically(obj: Any, interval: float) -> None:
+    """
+    Register an object whose `_periodic_flush` method is called every `interval` seconds.
+
+    Used by buffering handlers and filters whose pending output must not wait for
+    the next record. All objects share one daemon thread, which survives forks.
+    Objects are held weakly.
+
+    Args:
+        obj: The object to flush periodically.
+        interval: Seconds between calls.
+    """
+    _FLUSHER.add(obj, interval)
+
+
+def cancel_periodic_flush(obj: Any) -> None:
+    """
+    Stop calling `_periodic_flush` on an object registered with `flush_periodically`.
+
+    Args:
+        obj: The registered object.
+    """
+    _FLUSHER.discard(obj)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_run_after_fork)
+    os.register_at_fork(after_in_child=_FLUSHER._after_fork)
+
+
 class BatchForegroundColors(Enum):
     WHITE = "\033[37m"
     CYAN = "\033[36m"
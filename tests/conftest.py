@@ -0,0 +1,18 @@
+import logging
+
+import pytest
+
+
+@pytest.fixture
+def make_record():
+    """
+    Factory for log records as a logger would create them, with every field optional.
+    """
+    def factory(msg="msg", level=logging.INFO, args=(), exc_info=None, name="test_logger", lineno=10,
+                created=None):
+        record = logging.LogRecord(name, level, __file__, lineno, msg, args, exc_info)
+        if created is not None:
+            record.created = created
+        return record
+
+    return factory
@@ -0,0 +1,167 @@
+import gzip
+import json
+import logging
+import socket
+import time
+
+import pytest
+
+from loghelpers import Configuration, JsonFormatter
+from loghelpers.aggregation import FRAME_HEADER, AggregatingHandler, LogAggregator, RawRecord
+from loghelpers.handlers import create_file_handler, create_file_sink
+from loghelpers.query import log_files
+from loghelpers.rotation import SegmentRotatingFileHandler
+from loghelpers.pipeline import AsyncPipelineHandler
+from loghelpers.sinks import BufferedFileHandler
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="requires Unix sockets")
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def frame(payload, levelno=logging.INFO):
+    return FRAME_HEADER.pack(len(payload), levelno) + payload
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_feed_writes_complete_frames_and_keeps_partial_ones(tmp_path):
+    sink = ListHandler()
+    aggregator = LogAggregator(str(tmp_path / "agg.sock"), sink)
+    buffer = bytearray(frame(b"one\n") + frame(b"two\n", logging.ERROR))
+    partial = frame(b"three\n")
+    buffer += partial[:5]
+    assert aggregator.feed(buffer)
+    assert [r.payload for r in sink.records] == [b"one\n", b"two\n"]
+    assert sink.records[1].levelno == logging.ERROR
+    assert bytes(buffer) == partial[:5]
+    aggregator.stop()
+
+
+def test_raw_record_is_written_unchanged_by_file_sinks(tmp_path):
+    path = tmp_path / "app.log"
+    aggregator = LogAggregator(str(tmp_path / "agg.sock"), BufferedFileHandler(str(path)))
+    aggregator.handler.handle(RawRecord(b'{"message":"hi"}\n', logging.INFO))
+    aggregator.handler.close()
+    assert path.read_bytes() == b'{"message":"hi"}\n'
+
+
+def test_records_from_workers_reach_the_aggregator_sink(tmp_path, make_record):
+    address = str(tmp_path / "agg.sock")
+    path = tmp_path / "app.log"
+    aggregator = LogAggregator(address, BufferedFileHandler(str(path)), flush_interval=0.05)
+    aggregator.start()
+
+    config = Configuration(log_file=str(path), aggregator_socket=address)
+    handler = create_file_handler(config)
+    assert isinstance(handler, AggregatingHandler)
+    for i in range(3):
+        handler.handle(make_record(f"line {i}"))
+    handler.flush()
+    assert wait_for(lambda: path.exists() and len(path.read_bytes().splitlines()) == 3)
+    handler.close()
+    aggregator.stop()
+
+    messages = [json.loads(line)["message"] for line in path.read_bytes().splitlines()]
+    assert messages == ["line 0", "line 1", "line 2"]
+
+
+def test_aggregator_writes_to_a_compressing_rotating_sink(tmp_path, make_record):
+    address = str(tmp_path / "agg.sock")
+    path = tmp_path / "app.log"
+    sink_config = Configuration(log_file=str(path), rotation_max_bytes=200, rotation_compression="gzip",
+                                rotation_backup_count=0)
+    sink = create_file_sink(sink_config)
+    assert isinstance(sink, SegmentRotatingFileHandler)
+    aggregator = LogAggregator(address, sink, flush_interval=0.05)
+    aggregator.start()
+
+    handler = create_file_handler(Configuration(log_file=str(path), aggregator_socket=address))
+    for i in range(20):
+        handler.handle(make_record(f"line {i}"))
+    handler.close()
+    assert wait_for(lambda: len(sink.compressor.segments()) >= 2 and all(
+        s.endswith(".gz") for s in sink.compressor.segments()
+    ))
+    aggregator.stop()
+    sink.compressor.join()
+
+    lines = []
+    for segment in log_files([str(path)]):
+        opener = gzip.open if segment.endswith(".gz") else open
+        with opener(segment, "rb") as source:
+            lines.extend(source.read().splitlines())
+    assert [json.loads(line)["message"] for line in lines] == [f"line {i}" for i in range(20)]
+
+
+def test_batch_is_sent_after_silence(tmp_path, make_record):
+    address = str(tmp_path / "agg.sock")
+    sink = ListHandler()
+    aggregator = LogAggregator(address, sink, flush_interval=0.05)
+    aggregator.start()
+    handler = AggregatingHandler(address, flush_interval=0.05)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler.handle(make_record("connect", logging.ERROR))
+    handler.handle(make_record("last"))
+    assert wait_for(lambda: len(sink.records) == 2)
+    handler.close()
+    aggregator.stop()
+
+
+def test_stop_without_start_removes_the_socket(tmp_path):
+    address = tmp_path / "agg.sock"
+    sink = ListHandler()
+    aggregator = LogAggregator(str(address), sink)
+    assert address.exists()
+    aggregator.stop()
+    assert not address.exists()
+    aggregator.stop()
+
+
+def test_unreachable_aggregator_drops_batches(tmp_path, make_record):
+    handler = AggregatingHandler(str(tmp_path / "missing.sock"))
+    handler.setFormatter(JsonFormatter(Configuration()))
+    handler.handle(make_record("lost", logging.ERROR))
+    assert handler.dropped == 1
+    handler.close()
+
+
+def test_after_fork_discards_parent_batch_and_connection(tmp_path, make_record):
+    address = str(tmp_path / "agg.sock")
+    aggregator = LogAggregator(address, ListHandler())
+    handler = AggregatingHandler(address, flush_interval=60)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler.handle(make_record("parent"))
+    handler.handle(make_record("connect", logging.ERROR))
+    handler.handle(make_record("pending"))
+    assert handler._sock is not None
+
+    handler._after_fork()
+    assert handler._sock is None
+    assert not handler._buffer
+    handler.close()
+    aggregator.stop()
+
+
+def test_pipeline_restarts_writer_after_fork(make_record):
+    sink = ListHandler()
+    pipeline = AsyncPipelineHandler([sink])
+    old_thread = pipeline._thread
+    pipeline._after_fork()
+    assert pipeline._thread is not old_thread and pipeline._thread.is_alive()
+    pipeline.handle(make_record("child"))
+    pipeline.flush()
+    assert [r.getMessage() for r in sink.records] == ["child"]
+    pipeline.close()
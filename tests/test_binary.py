@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import sys
+
+import pytest
+
+from loghelpers import Configuration
+from loghelpers.binary import MAGIC, BinaryFileHandler, BinaryFormatter, decode, main
+from loghelpers.context import LoggingContext
+from loghelpers.handlers import create_file_handler
+
+
+def test_records_round_trip_with_context(make_record):
+    formatter = BinaryFormatter(Configuration(log_format="%(message)s"))
+    with LoggingContext.context(request_id="abc", attempt=2):
+        data = formatter.format_bytes(make_record("user %s took %d ms", args=("alice", 12)))
+    assert data.startswith(MAGIC)
+
+    payload = next(decode(data, epoch_ns=True))
+    assert payload["logger"] == "test_logger"
+    assert payload["level"] == "INFO"
+    assert payload["message"] == "user alice took 12 ms"
+    assert payload["request_id"] == "abc"
+    assert payload["attempt"] == 2
+    assert isinstance(payload["timestamp"], int)
+
+
+def test_repeated_records_only_encode_their_arguments(make_record):
+    formatter = BinaryFormatter(Configuration(log_format="%(message)s"))
+    first = formatter.format_bytes(make_record("user %s logged in", args=("alice",)))
+    second = formatter.format_bytes(make_record("user %s logged in", args=("bob",)))
+    assert len(second) < len(first)
+    assert b"logged in" not in second
+    messages = [p["message"] for p in decode(first + second)]
+    assert messages == ["user alice logged in", "user bob logged in"]
+
+
+def test_redacted_messages_are_stored_rendered(make_record):
+    config = Configuration(log_format="%(message)s")
+    config.redactor.redact_patterns = [r"hunter2"]
+    formatter = BinaryFormatter(config)
+    data = formatter.format_bytes(make_record("password=%s", args=("hunter2",)))
+    assert b"hunter2" not in data
+    assert next(decode(data))["message"] == "password=<redacted>"
+
+
+def test_exception_and_repeat_count_are_decoded():
+    formatter = BinaryFormatter(Configuration(log_format="%(message)s"))
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord("test_logger", logging.ERROR, __file__, 10, "failed", (), sys.exc_info())
+    record.repeat_count = 3
+    payload = next(decode(formatter.format_bytes(record)))
+    assert payload["repeat_count"] == 3
+    assert "ValueError: boom" in payload["exception"]
+
+
+def test_truncated_stream_decodes_complete_records(make_record):
+    formatter = BinaryFormatter(Configuration(log_format="%(message)s"))
+    data = formatter.format_bytes(make_record("one")) + formatter.format_bytes(make_record("two"))
+    payloads = list(decode(data[:-3]))
+    assert [p["message"] for p in payloads] == ["one"]
+
+
+def test_undefined_string_id_is_reported_or_skipped_to_next_stream(make_record):
+    formatter = BinaryFormatter(Configuration(log_format="%(message)s"))
+    formatter.format_bytes(make_record("one"))
+    # Only a RECORD frame, referencing strings interned by the previous record
+    repeated = formatter.format_bytes(make_record("one"))
+    formatter.reset()
+    data = MAGIC + repeated + formatter.format_bytes(make_record("three"))
+
+    with pytest.raises(ValueError, match="offset 4"):
+        list(decode(data))
+    assert [p["message"] for p in decode(data, skip_corrupt=True)] == ["three"]
+
+
+def test_file_handler_appends_streams_and_cli_converts(tmp_path, capsysbinary, make_record):
+    path = tmp_path / "app.lhb"
+    for message in ("first run", "second run"):
+        handler = BinaryFileHandler(str(path), Configuration(log_format="%(message)s"))
+        handler.handle(make_record(message))
+        handler.close()
+
+    main([str(path), "--epoch-ns"])
+    lines = capsysbinary.readouterr().out.splitlines()
+    assert [json.loads(line)["message"] for line in lines] == ["first run", "second run"]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_forked_child_writes_its_own_stream(tmp_path, make_record):
+    path = tmp_path / "app.lhb"
+    handler = BinaryFileHandler(str(path), Configuration(log_format="%(message)s"))
+    handler.handle(make_record("parent says %s", args=(1,)))
+    handler.flush()
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            handler.handle(make_record("child says %s", args=(4,)))
+            handler.close()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    handler.handle(make_record("parent says %s", args=(2,)))
+    handler.close()
+
+    assert [p["message"] for p in decode(path.read_bytes())] == ["parent says 1", "parent says 2"]
+    child = tmp_path / f"app.{pid}.lhb"
+    assert [p["message"] for p in decode(child.read_bytes())] == ["child says 4"]
+
+
+def test_create_file_handler_with_binary_sink(tmp_path, make_record):
+    path = tmp_path / "app.lhb"
+    handler = create_file_handler(Configuration(log_file=str(path), file_sink="binary"))
+    assert isinstance(handler, BinaryFileHandler)
+    assert isinstance(handler.formatter, BinaryFormatter)
+    handler.handle(make_record("hello %s", args=("world",)))
+    handler.close()
+    assert [p["message"] for p in decode(path.read_bytes())] == ["hello world"]
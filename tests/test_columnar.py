@@ -0,0 +1,81 @@
+import gzip
+import json
+import logging
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from loghelpers.columnar import MISSING_TIME, LogTable, export, main, read_file  # noqa: E402
+from loghelpers.query import log_files  # noqa: E402
+
+
+def write_lines(path, payloads, opener=open):
+    with opener(path, "ab") as output:
+        for payload in payloads:
+            output.write(json.dumps(payload).encode() + b"\n")
+
+
+def payload(level, timestamp, logger="app", **context):
+    return {"timestamp": timestamp, "logger": logger, "level": level, "message": "hi", **context}
+
+
+def test_read_file_dictionary_encodes_columns(tmp_path):
+    path = tmp_path / "app.log"
+    write_lines(path, [
+        payload("INFO", "2024-01-01 12:00:00", request_id="a"),
+        payload("ERROR", 1704110400123456789, logger="db", attempt=2),
+        payload("INFO", "not a time"),
+    ])
+    table = read_file(str(path))
+    assert len(table) == 3
+    assert table.levelno.tolist() == [logging.INFO, logging.ERROR, logging.INFO]
+    assert table.timestamp[1] == 1704110400123456789
+    assert table.timestamp[2] == MISSING_TIME
+    assert table["logger"].values == ["app", "db"]
+    assert table["request_id"].to_list() == ["a", None, None]
+    assert table["attempt"].to_list() == [None, "2", None]
+
+
+def test_string_timestamps_keep_their_milliseconds(tmp_path):
+    path = tmp_path / "app.log"
+    write_lines(path, [payload("INFO", "2024-01-01 12:00:00"), payload("INFO", "2024-01-01 12:00:00.250")])
+    table = read_file(str(path))
+    assert int(table.timestamp[1]) - int(table.timestamp[0]) == 250_000_000
+
+
+def test_count_by_level_per_bucket(tmp_path):
+    path = tmp_path / "app.log"
+    write_lines(path, [
+        payload("INFO", 0), payload("INFO", 30 * 10 ** 9), payload("ERROR", 59 * 10 ** 9),
+        payload("INFO", 60 * 10 ** 9),
+    ])
+    table = read_file(str(path))
+    assert table.count_by("level", bucket=60) == [
+        (0.0, "INFO", 2), (0.0, "ERROR", 1), (60.0, "INFO", 1),
+    ]
+    assert table.count_by("logger") == [(None, "app", 4)]
+    errors = table.select(table["level"].equals("ERROR") & table.between(since=0, until=59))
+    assert len(errors) == 1
+
+
+def test_export_merges_segments_and_round_trips(tmp_path):
+    path = tmp_path / "app.log"
+    write_lines(str(path) + ".20240101-000000-000000.gz", [payload("INFO", 0, logger="old")], gzip.open)
+    write_lines(path, [payload("WARNING", 1, logger="new"), payload("INFO", 2, logger="old")])
+    table = export(log_files([str(path)]), processes=1)
+    assert table["logger"].to_list() == ["old", "new", "old"]
+
+    saved = tmp_path / "table.npz"
+    table.save(str(saved))
+    loaded = LogTable.load(str(saved))
+    assert loaded["logger"].to_list() == ["old", "new", "old"]
+    assert np.array_equal(loaded.timestamp, table.timestamp)
+
+
+def test_cli_counts_per_logger(tmp_path, capsysbinary):
+    path = tmp_path / "app.log"
+    write_lines(path, [payload("INFO", 0), payload("INFO", 1, logger="db"), payload("INFO", 2)])
+    main([str(path), "--count-by", "logger", "--processes", "1"])
+    rows = [json.loads(line) for line in capsysbinary.readouterr().out.splitlines()]
+    assert rows == [{"bucket": None, "logger": "app", "count": 2}, {"bucket": None, "logger": "db", "count": 1}]
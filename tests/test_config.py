@@ -53,6 +53,11 @@ def test_validate_raises_exception_for_invalid_sample_rate(default_config):
     with pytest.raises(ValueError):
         default_config.validate()
 
+def test_validate_raises_exception_for_invalid_flush_level(default_config):
+    default_config.flush_level = "LOUD"
+    with pytest.raises(ValueError):
+        default_config.validate()
+
 def test_validate_raises_exception_for_invalid_sensitive_keys(default_config):
     with pytest.raises(ValueError):
         default_config.update_sensitive_keys(["not_a_set"])
@@ -0,0 +1,100 @@
+import pytest
+
+from loghelpers import Configuration
+from loghelpers.context import LoggingContext, ContextProviders, CachePolicy, cache_policy
+from loghelpers.context.cache import ProviderCache
+
+
+class CountingProvider:
+    def __init__(self, **attrs):
+        self.calls = 0
+        for key, value in attrs.items():
+            setattr(self, key, value)
+
+    def __call__(self):
+        self.calls += 1
+        return {"count_" + str(id(self)): str(self.calls)}
+
+
+def test_static_provider_is_invoked_once():
+    provider = CountingProvider(cache_policy=CachePolicy.STATIC)
+    with ContextProviders.temporary_provider("counting", provider):
+        for _ in range(5):
+            LoggingContext().resolve_context(Configuration())
+    assert provider.calls == 1
+
+
+def test_uncached_provider_is_invoked_per_resolution():
+    provider = CountingProvider()
+    with ContextProviders.temporary_provider("counting", provider):
+        for _ in range(3):
+            LoggingContext().resolve_context(Configuration())
+    assert provider.calls == 3
+
+
+def test_per_context_provider_reruns_when_context_changes():
+    provider = CountingProvider(cache_policy=CachePolicy.PER_CONTEXT)
+    with ContextProviders.temporary_provider("counting", provider):
+        LoggingContext.set_context(request_id="a")
+        LoggingContext().resolve_context(Configuration())
+        LoggingContext().resolve_context(Configuration())
+        LoggingContext.set_context(request_id="b")
+        LoggingContext().resolve_context(Configuration())
+    LoggingContext.clear_context()
+    assert provider.calls == 2
+
+
+def test_per_context_results_survive_alternating_contexts():
+    provider = CountingProvider(cache_policy=CachePolicy.PER_CONTEXT)
+    cache = ProviderCache()
+    first, second = object(), object()
+    for _ in range(3):
+        for context in (first, second):
+            cache.resolve(1, "p", provider, CachePolicy.PER_CONTEXT, 0, context)
+    assert provider.calls == 2
+
+
+def test_per_context_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(ProviderCache, "CONTEXT_CACHE_SIZE", 2)
+    provider = CountingProvider(cache_policy=CachePolicy.PER_CONTEXT)
+    cache = ProviderCache()
+    a, b, c = object(), object(), object()
+    for context in (a, b, a, c, a, b):
+        cache.resolve(1, "p", provider, CachePolicy.PER_CONTEXT, 0, context)
+    assert provider.calls == 4
+
+
+def test_ttl_provider_expires(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("loghelpers.context.cache.time.monotonic", lambda: clock[0])
+    provider = CountingProvider(cache_policy=CachePolicy.TTL, cache_ttl=5)
+    cache = ProviderCache()
+    cache.resolve(1, "p", provider, CachePolicy.TTL, 5, None)
+    clock[0] += 4
+    cache.resolve(1, "p", provider, CachePolicy.TTL, 5, None)
+    assert provider.calls == 1
+    clock[0] += 2
+    cache.resolve(1, "p", provider, CachePolicy.TTL, 5, None)
+    assert provider.calls == 2
+
+
+def test_new_snapshot_version_invalidates_cache():
+    provider = CountingProvider()
+    cache = ProviderCache()
+    cache.resolve(1, "p", provider, CachePolicy.STATIC, 0, None)
+    cache.resolve(2, "p", provider, CachePolicy.STATIC, 0, None)
+    assert provider.calls == 2
+
+
+def test_cache_policy_decorator_sets_attributes():
+    @cache_policy(CachePolicy.TTL, ttl=2.5)
+    def provider():
+        return {}
+
+    assert provider.cache_policy is CachePolicy.TTL
+    assert provider.cache_ttl == 2.5
+
+
+def test_cache_policy_decorator_requires_ttl():
+    with pytest.raises(ValueError):
+        cache_policy(CachePolicy.TTL)
@@ -0,0 +1,61 @@
+from loghelpers.context import LoggingContext
+from loghelpers.context.context_map import EMPTY_CONTEXT, MAX_DEPTH, ContextMap
+
+
+def test_new_child_shadows_parent_without_mutating_it():
+    parent = ContextMap({"user": "Alice", "action": "login"})
+    child = parent.new_child({"action": "logout"})
+    assert child["action"] == "logout"
+    assert child["user"] == "Alice"
+    assert parent["action"] == "login"
+    assert child == {"user": "Alice", "action": "logout"}
+
+
+def test_new_child_with_no_values_returns_same_map():
+    assert EMPTY_CONTEXT.new_child({}) is EMPTY_CONTEXT
+
+
+def test_copy_returns_independent_dict():
+    context = ContextMap({"user": "Alice"}).new_child({"action": "login"})
+    copied = context.copy()
+    copied["user"] = "Bob"
+    assert type(copied) is dict
+    assert context["user"] == "Alice"
+
+
+def test_deep_chains_are_collapsed():
+    context = EMPTY_CONTEXT
+    for i in range(MAX_DEPTH * 3):
+        context = context.new_child({f"k{i}": str(i)})
+    assert context._depth <= MAX_DEPTH
+    assert len(context) == MAX_DEPTH * 3
+    assert context["k0"] == "0"
+
+
+def test_nested_context_blocks_share_structure():
+    LoggingContext.clear_context()
+    LoggingContext.set_context(user="Alice")
+    outer = LoggingContext._active()
+    with LoggingContext.context(action="login"):
+        inner = LoggingContext._active()
+        assert inner._parent is outer
+        assert dict(inner) == {"user": "Alice", "action": "login"}
+    assert LoggingContext._active() is outer
+
+
+def test_get_context_returns_a_mutable_copy():
+    LoggingContext.clear_context()
+    LoggingContext.set_context(user="Alice")
+    context = LoggingContext.get_context()
+    assert type(context) is dict
+    context["user"] = "Bob"
+    assert LoggingContext.get_context() == {"user": "Alice"}
+
+
+def test_overlay_is_reused_for_the_same_values():
+    context = ContextMap({"user": "Alice"}).new_child({"action": "login"})
+    first = context.overlay(1, {"thread": "main"})
+    assert context.overlay(1, {"thread": "main"}) is first
+    assert context.overlay(2, {"thread": "main"}) is not first
+    assert context.overlay(2, {"thread": "worker"})["thread"] == "worker"
+    assert context.overlay(1, {}) is context
@@ -63,4 +63,19 @@ def test_temporary_provider_registers_and_restores_previous_state():
     with ContextProviders.temporary_provider("temp", temporary_provider):
         assert ContextProviders.get("temp") is temporary_provider
     assert ContextProviders.get("temp") is original_provider
-    ContextProviders.unregister("temp")
\ No newline at end of file
+    ContextProviders.unregister("temp")
+
+def test_snapshot_version_increases_on_mutation():
+    before = ContextProviders.snapshot()
+    ContextProviders.register("versioned", MockProvider())
+    after = ContextProviders.snapshot()
+    assert after.version > before.version
+    assert "versioned" in after.providers
+    assert "versioned" not in before.providers
+    ContextProviders.unregister("versioned")
+    assert "versioned" not in ContextProviders.snapshot().providers
+
+
+def test_snapshot_is_immutable():
+    with pytest.raises(TypeError):
+        ContextProviders.snapshot().providers["new"] = MockProvider()
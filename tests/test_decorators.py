@@ -1,40 +1,93 @@
 import pytest
 import logging
+import threading
 
-from loghelpers import temporary_level, log_calls
+from loghelpers import Configuration, temporary_level, log_calls
+from loghelpers.decorators import LazyMessage
+from loghelpers.handlers import SensitiveDataFilter
 
-def test_temporary_level_sets_logger_and_handler_levels():
-    logger = logging.getLogger("test_logger")
-    handler = logging.StreamHandler()
+class ListHandler(logging.Handler):
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_temporary_level_overrides_without_mutating_levels():
+    logger = logging.getLogger("test_temporary_level")
+    logger.setLevel(logging.WARNING)
+    handler = ListHandler(logging.WARNING)
     logger.addHandler(handler)
-    original_level = logger.level
-    handler.setLevel(logging.WARNING)
 
-    with temporary_level(logging.DEBUG, "test_logger"):
-        assert logger.level == logging.DEBUG
-        assert all(h.level == logging.DEBUG for h in logger.handlers)
+    with temporary_level(logging.DEBUG, "test_temporary_level"):
+        assert logger.level == logging.WARNING
+        assert handler.level == logging.WARNING
+        assert logger.isEnabledFor(logging.DEBUG)
+        assert logging.getLogger("test_temporary_level.child").isEnabledFor(logging.DEBUG)
+        assert not logging.getLogger("unrelated").isEnabledFor(logging.DEBUG)
+        logger.debug("inside")
 
-    assert logger.level == original_level
-    assert handler.level == logging.WARNING
+    logger.debug("outside")
+    assert not logger.isEnabledFor(logging.DEBUG)
+    assert [r.getMessage() for r in handler.records] == ["inside"]
+    logger.removeHandler(handler)
 
 
 def test_temporary_level_restores_levels_on_exception():
-    logger = logging.getLogger("test_logger")
-    handler = logging.StreamHandler()
-    logger.addHandler(handler)
-    original_level = logger.level
-    handler.setLevel(logging.WARNING)
+    logger = logging.getLogger("test_temporary_level")
+    logger.setLevel(logging.WARNING)
 
-    try:
-        with temporary_level(logging.DEBUG, "test_logger"):
-            assert logger.level == logging.DEBUG
-            assert all(h.level == logging.DEBUG for h in logger.handlers)
+    with pytest.raises(ValueError):
+        with temporary_level(logging.DEBUG):
+            assert logger.isEnabledFor(logging.DEBUG)
             raise ValueError("Test exception")
-    except ValueError:
-        pass
 
-    assert logger.level == original_level
-    assert handler.level == logging.WARNING
+    assert logger.level == logging.WARNING
+    assert not logger.isEnabledFor(logging.DEBUG)
+
+
+def test_temporary_level_does_not_leak_to_other_threads():
+    logger = logging.getLogger("test_temporary_level")
+    logger.setLevel(logging.WARNING)
+    seen = []
+
+    @temporary_level(logging.DEBUG, "test_temporary_level")
+    def check():
+        seen.append(logger.isEnabledFor(logging.DEBUG))
+        thread = threading.Thread(target=lambda: seen.append(logger.isEnabledFor(logging.DEBUG)))
+        thread.start()
+        thread.join()
+
+    check()
+    assert seen == [True, False]
+
+
+def test_temporary_level_does_not_lower_ancestor_handlers():
+    logger = logging.getLogger("test_temporary_level.scoped")
+    local = ListHandler(logging.WARNING)
+    alerts = ListHandler(logging.ERROR)
+    logger.addHandler(local)
+    logging.getLogger().addHandler(alerts)
+    try:
+        with temporary_level(logging.DEBUG, "test_temporary_level.scoped"):
+            logger.debug("debug")
+            logger.error("error")
+    finally:
+        logger.removeHandler(local)
+        logging.getLogger().removeHandler(alerts)
+    assert [r.getMessage() for r in local.records] == ["debug", "error"]
+    assert [r.getMessage() for r in alerts.records] == ["error"]
+
+
+def test_temporary_level_patches_logger_only_while_active():
+    original = logging.Logger.isEnabledFor
+    with temporary_level(logging.DEBUG, "test_temporary_level"):
+        with temporary_level(logging.INFO, "test_temporary_level.child"):
+            assert logging.Logger.isEnabledFor is not original
+        assert logging.Logger.isEnabledFor is not original
+    assert logging.Logger.isEnabledFor is original
 
 
 def test_log_calls_logs_entry_and_exit():
@@ -54,8 +107,8 @@ def test_log_calls_logs_entry_and_exit():
     result = sample_function(2, 3)
     assert result == 5
     assert len(log_output) == 2
-    assert "→ Enter sample_function" in log_output[0][1]
-    assert "← Exit sample_function" in log_output[1][1]
+    assert "→ Enter sample_function" in str(log_output[0][1])
+    assert "← Exit sample_function" in str(log_output[1][1])
 
 
 def test_log_calls_logs_exceptions():
@@ -80,5 +133,104 @@ def test_log_calls_logs_exceptions():
 
     print("",log_output,"", sep="\n")  # For debugging purposes
     assert len(log_output) >= 2
-    assert "→ Enter sample_function" in log_output[0][1]
-    assert "‼ Exception in sample_function" in log_output[1][1]
\ No newline at end of file
+    assert "→ Enter sample_function" in str(log_output[0][1])
+    assert "‼ Exception in sample_function" in log_output[1][1]
+
+class ExplodingRepr:
+    def __repr__(self):
+        raise AssertionError("repr should not be computed")
+
+
+def capture_logger(name, level):
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    log_output = []
+    logger.log = lambda lvl, msg: log_output.append((lvl, msg))
+    return logger, log_output
+
+
+def test_log_calls_skips_rendering_when_level_disabled():
+    logger, log_output = capture_logger("test_lazy_disabled", logging.WARNING)
+
+    @log_calls(level=logging.DEBUG, injected_logger=logger)
+    def sample_function(payload):
+        return payload
+
+    sample_function(ExplodingRepr())
+    assert log_output == []
+
+
+def test_log_calls_logs_exceptions_when_level_disabled():
+    logger = logging.getLogger("test_disabled_exception")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = ListHandler()
+    logger.addHandler(handler)
+
+    @log_calls(level=logging.DEBUG, injected_logger=logger)
+    def sample_function():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        sample_function()
+    logger.removeHandler(handler)
+    assert [r.getMessage() for r in handler.records] == ["‼ Exception in sample_function"]
+    assert handler.records[0].exc_info[0] is ValueError
+
+
+def test_log_calls_renders_lazily():
+    logger, log_output = capture_logger("test_lazy_render", logging.DEBUG)
+
+    @log_calls(level=logging.INFO, injected_logger=logger)
+    def sample_function(payload):
+        return None
+
+    sample_function(ExplodingRepr())
+    assert isinstance(log_output[0][1], LazyMessage)
+    with pytest.raises(AssertionError):
+        str(log_output[0][1])
+
+
+def test_log_calls_truncates_argument_reprs():
+    logger, log_output = capture_logger("test_lazy_truncate", logging.DEBUG)
+
+    @log_calls(level=logging.INFO, injected_logger=logger, max_repr=10)
+    def sample_function(text):
+        return text
+
+    sample_function("x" * 1000)
+    assert len(str(log_output[0][1])) < 80
+    assert len(str(log_output[1][1])) < 80
+
+
+def test_log_calls_only_logs_allowed_arguments():
+    logger, log_output = capture_logger("test_lazy_allowlist", logging.DEBUG)
+
+    @log_calls(level=logging.INFO, injected_logger=logger, include_args=["user_id"])
+    def sample_function(user_id, password):
+        return True
+
+    sample_function(42, password="hunter2")
+    message = str(log_output[0][1])
+    assert "user_id=42" in message
+    assert "hunter2" not in message
+
+
+def test_log_calls_reports_timing():
+    logger, log_output = capture_logger("test_lazy_timing", logging.DEBUG)
+
+    @log_calls(level=logging.INFO, injected_logger=logger, timing=True)
+    def sample_function():
+        return 1
+
+    sample_function()
+    assert str(log_output[1][1]).endswith("ms")
+
+
+def test_sensitive_data_filter_redacts_lazy_messages():
+    config = Configuration(log_format="%(message)s")
+    config.redactor.redact_patterns = [r"hunter2"]
+    record = logging.LogRecord("test", logging.INFO, __file__, 1,
+                               LazyMessage(lambda: "password=hunter2"), (), None)
+    SensitiveDataFilter(config).filter(record)
+    assert record.getMessage() == "password=<redacted>"
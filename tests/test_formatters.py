@@ -1,10 +1,12 @@
 import logging
+import time
 
+import orjson
 import pytest
 
 from loghelpers import ColorFormatter, JsonFormatter
 from loghelpers import Configuration
-from loghelpers.context import LoggingContext, ContextProviders
+from loghelpers.context import LoggingContext, ContextProviders, CachePolicy, cache_policy
 from loghelpers.utils import BatchForegroundColors
 
 
@@ -82,4 +84,82 @@ def test_color_formatter_adds_ansi_colors_based_on_level(default_config):
     formatted = formatter.format(record)
     assert BatchForegroundColors.RED.value in formatted
     assert BatchForegroundColors.GREY.value in formatted
-    assert "Error occurred" in formatted
\ No newline at end of file
+    assert "Error occurred" in formatted
+
+
+def test_json_formatter_fast_path_matches_regular_output(default_config, make_record):
+    slow = JsonFormatter(default_config, fast_path=False)
+    fast = JsonFormatter(default_config, fast_path=True)
+    with LoggingContext.context(request_id="abc", password="hunter2"):
+        record = make_record()
+        assert orjson.loads(fast.format(record)) == orjson.loads(slow.format(record))
+        assert orjson.loads(fast.format(record))["password"] == "<redacted>"
+
+
+def test_json_formatter_format_bytes_appends_newline(default_config, make_record):
+    for fast_path in (False, True):
+        formatter = JsonFormatter(default_config, fast_path=fast_path)
+        formatted = formatter.format_bytes(make_record())
+        assert formatted.endswith(b"}\n")
+        assert orjson.loads(formatted)["message"] == "msg"
+
+
+def test_json_formatter_fast_path_handles_reserved_context_keys(default_config, make_record):
+    formatter = JsonFormatter(default_config, fast_path=True)
+    with LoggingContext.context(level="custom"):
+        payload = orjson.loads(formatter.format(make_record()))
+    assert payload["level"] == "custom"
+
+
+def test_json_formatter_fast_path_refreshes_static_fragment(default_config, make_record):
+    formatter = JsonFormatter(default_config, fast_path=True)
+    formatter.format(make_record())
+
+    @cache_policy(CachePolicy.STATIC)
+    def region_provider():
+        return {"region": "eu-north-1"}
+
+    with ContextProviders.temporary_provider("region", region_provider):
+        payload = orjson.loads(formatter.format(make_record()))
+    assert payload["region"] == "eu-north-1"
+    assert "region" not in orjson.loads(formatter.format(make_record()))
+
+
+@pytest.mark.parametrize("datefmt", [None, "%Y-%m-%d %H:%M:%S"])
+def test_cached_format_time_matches_stdlib(datefmt, make_record):
+    formatter = ColorFormatter("%(message)s")
+    reference = logging.Formatter("%(message)s")
+    record = make_record()
+    for _ in range(2):
+        assert formatter.formatTime(record, datefmt) == reference.formatTime(record, datefmt)
+
+
+def test_cached_format_time_calls_strftime_once_per_second(default_config, monkeypatch, make_record):
+    calls = []
+    original = time.strftime
+    monkeypatch.setattr("loghelpers.formatters.time.strftime",
+                        lambda *args: calls.append(args) or original(*args))
+    formatter = JsonFormatter(default_config)
+    record = make_record()
+    for offset in (0.1, 0.2, 0.3):
+        record.created = 1700000000 + offset
+        formatter.formatTime(record, formatter.datefmt)
+    record.created = 1700000001.5
+    formatter.formatTime(record, formatter.datefmt)
+    assert len(calls) == 2
+
+
+def test_json_formatter_epoch_ns_timestamp(default_config, make_record):
+    default_config.timestamp_format = "epoch_ns"
+    record = make_record()
+    for fast_path in (False, True):
+        payload = orjson.loads(JsonFormatter(default_config, fast_path=fast_path).format(record))
+        assert payload["timestamp"] == int(record.created * 1_000_000_000)
+
+
+def test_json_formatter_appends_milliseconds(default_config, make_record):
+    default_config.timestamp_msecs = True
+    record = make_record()
+    record.created, record.msecs = 1700000000.25, 250.0
+    payload = orjson.loads(JsonFormatter(default_config).format(record))
+    assert payload["timestamp"].endswith(".250")
@@ -0,0 +1,117 @@
+import logging
+import sys
+import threading
+
+import pytest
+
+import loghelpers
+from loghelpers import Configuration, get_logger, reconfigure
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    yield
+    for _, handlers, names in loghelpers._handler_sets.values():
+        for name in names:
+            logging.getLogger(name).handlers.clear()
+        for handler in handlers:
+            handler.close()
+    loghelpers._handler_sets.clear()
+    loghelpers._loggers.clear()
+
+
+def lines(path):
+    with open(path, encoding="utf-8") as log_file:
+        return log_file.read().splitlines()
+
+
+def test_repeated_calls_do_not_add_handlers(tmp_path):
+    config = Configuration(log_file=str(tmp_path / "app.log"), log_format="%(message)s")
+    first = get_logger(name="cached.a", config=config)
+    assert get_logger(name="cached.a", config=config) is first
+    assert len(first.handlers) == 2
+
+    first.info("once")
+    first.handlers[1].flush()
+    assert len(lines(tmp_path / "app.log")) == 1
+
+
+def test_loggers_share_handlers_of_a_configuration(tmp_path):
+    config = Configuration(log_file=None)
+    first = get_logger(name="shared.a", config=config)
+    second = get_logger(name="shared.b", config=config, level=logging.DEBUG)
+    assert first.handlers == second.handlers
+    assert first.level == logging.INFO
+    assert second.level == logging.DEBUG
+
+
+def test_default_configuration_is_created_once():
+    logger = get_logger(name="default.a")
+    assert get_logger(name="default.b").handlers == logger.handlers
+    assert logger.level == logging.getLevelName(loghelpers._default_config.log_level)
+
+
+def test_rebinding_a_name_replaces_and_closes_handlers(tmp_path):
+    first = Configuration(log_file=str(tmp_path / "first.log"))
+    second = Configuration(log_file=None)
+    logger = get_logger(name="rebind", config=first)
+    old = list(logger.handlers)
+    assert get_logger(name="rebind", config=second) is logger
+    assert not any(handler in logger.handlers for handler in old)
+    assert old[1].stream is None
+    assert id(first) not in loghelpers._handler_sets
+
+
+def test_reconfigure_swaps_handlers_without_duplicate_writes(tmp_path):
+    config = Configuration(log_file=str(tmp_path / "app.log"), log_format="%(message)s")
+    logger = get_logger(name="swap", config=config)
+    logger.addHandler(logging.NullHandler())
+    old = list(logger.handlers)
+    done = threading.Event()
+
+    def produce():
+        for i in range(300):
+            logger.warning("line %d", i)
+        done.set()
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    while not done.is_set():
+        reconfigure(config)
+    producer.join()
+    reconfigure(config)
+
+    assert isinstance(logger.handlers[0], logging.NullHandler)
+    assert len(logger.handlers) == 3 and not set(logger.handlers[1:]) & set(old)
+    assert len(lines(tmp_path / "app.log")) == 300
+
+
+def test_reconfigure_rebuilds_shared_filters():
+    config = Configuration(log_file=None, rate_limit=1.0)
+    logger = get_logger(name="filters", config=config)
+    assert logger.handlers[0].filters[1].rate == 1.0
+    config.rate_limit = 1000.0
+    reconfigure(config)
+    assert logger.handlers[0].filters[1].rate == 1000.0
+
+
+def test_late_records_on_replaced_handlers_go_to_replacements(tmp_path):
+    config = Configuration(log_file=str(tmp_path / "app.log"), log_format="%(message)s")
+    logger = get_logger(name="late", config=config)
+    old_file = logger.handlers[1]
+    reconfigure(config)
+
+    record = logger.makeRecord("late", logging.WARNING, __file__, 1, "late", (), None)
+    old_file.handle(record)
+    old_file.emit(record)
+    assert old_file.stream is None
+    logger.handlers[1].flush()
+    assert len(lines(tmp_path / "app.log")) == 2
+
+
+def test_console_uses_configured_format(capsys):
+    config = Configuration(log_file=None, log_format="%(name)s|%(levelname)s|%(message)s")
+    logger = get_logger(name="console", config=config)
+    logger.handlers[0].stream = sys.stderr
+    logger.warning("hello %s", "there")
+    assert "console|WARNING|hello there" in capsys.readouterr().err
@@ -0,0 +1,111 @@
+import io
+import logging
+import urllib.request
+
+import pytest
+
+from loghelpers import Configuration, JsonFormatter
+from loghelpers.handlers import SensitiveDataFilter
+from loghelpers.metrics import METRICS, disable_metrics, enable_metrics, start_metrics_server
+from loghelpers.pipeline import AsyncPipelineHandler
+from loghelpers.ratelimit import RateLimitFilter
+
+
+@pytest.fixture
+def metrics():
+    METRICS.reset()
+    registry = enable_metrics()
+    yield registry
+    disable_metrics()
+    METRICS.reset()
+
+
+def make_logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.filters = []
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def json_handler(name="json"):
+    config = Configuration(log_format="%(message)s")
+    handler = logging.StreamHandler(io.StringIO())
+    handler.set_name(name)
+    handler.setFormatter(JsonFormatter(config))
+    handler.addFilter(SensitiveDataFilter(config))
+    return handler
+
+
+def values(snapshot, name):
+    return {tuple(sorted(entry["labels"].items())): entry for entry in snapshot.get(name, [])}
+
+
+def test_pipeline_stages_are_measured(metrics):
+    handler = json_handler()
+    logger = make_logger("metrics.stages", handler)
+    for i in range(5):
+        logger.info("hello %s", i)
+
+    snapshot = metrics.snapshot()
+    labels = (("handler", "json"),)
+    assert values(snapshot, "records_emitted_total")[labels]["value"] == 5
+    assert values(snapshot, "bytes_written_total")[labels]["value"] == len(handler.stream.getvalue())
+    assert values(snapshot, "io_seconds")[labels]["count"] == 5
+    assert values(snapshot, "serialization_seconds")[(("formatter", "JsonFormatter"),)]["count"] == 5
+    assert values(snapshot, "filter_seconds")[(("filter", "SensitiveDataFilter"),)]["count"] == 5
+    assert snapshot["record_seconds"][0]["count"] == 5
+    assert snapshot["context_seconds"][0]["count"] >= 5
+
+
+def test_bytes_written_counts_encoded_bytes(metrics):
+    handler = json_handler("unicode")
+    make_logger("metrics.bytes", handler).info("grüße 😀")
+    snapshot = metrics.snapshot()
+    written = values(snapshot, "bytes_written_total")[(("handler", "unicode"),)]["value"]
+    assert written == len(handler.stream.getvalue().encode("utf-8"))
+    assert written > len(handler.stream.getvalue())
+
+
+def test_rejected_records_are_counted(metrics):
+    logger = make_logger("metrics.filtered", json_handler())
+    logger.addFilter(RateLimitFilter(rate=0.001, burst=1))
+    for _ in range(3):
+        logger.info("same call site")
+    snapshot = metrics.snapshot()
+    assert values(snapshot, "records_filtered_total")[(("filter", "RateLimitFilter"),)]["value"] == 2
+
+
+def test_queue_depth_and_handler_drops_are_reported(metrics):
+    pipeline = AsyncPipelineHandler([json_handler()], overflow_policy="drop_newest", queue_size=1)
+    pipeline.dropped = 3
+    make_logger("metrics.async", pipeline).info("queued")
+    snapshot = metrics.snapshot()
+    labels = (("handler", "AsyncPipelineHandler"),)
+    assert values(snapshot, "handler_dropped_records_total")[labels]["value"] == 3
+    assert labels in values(snapshot, "queue_depth")
+    pipeline.close()
+
+
+def test_disable_restores_unwrapped_methods():
+    original = logging.Handler.handle
+    enable_metrics()
+    assert logging.Handler.handle is not original
+    disable_metrics()
+    assert logging.Handler.handle is original
+
+
+def test_prometheus_endpoint(metrics):
+    make_logger("metrics.http", json_handler('we "quote"')).info("scraped")
+    server = start_metrics_server(port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            body = response.read().decode("utf-8")
+            assert response.headers["Content-Type"].startswith("text/plain")
+    finally:
+        server.shutdown()
+    assert "# TYPE loghelpers_io_seconds histogram" in body
+    assert 'loghelpers_records_emitted_total{handler="we \\"quote\\""} 1' in body
+    assert 'loghelpers_record_seconds_bucket{le="+Inf"} 1' in body
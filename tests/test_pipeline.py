@@ -0,0 +1,104 @@
+import logging
+import threading
+
+import orjson
+import pytest
+
+from loghelpers import Configuration, JsonFormatter
+from loghelpers.context import LoggingContext
+from loghelpers.handlers import create_file_handler
+from loghelpers.pipeline import AsyncPipelineHandler, OverflowPolicy
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self, gate=None):
+        super().__init__()
+        self.gate = gate
+        self.records = []
+        self.threads = set()
+
+    def emit(self, record):
+        if self.gate is not None:
+            self.gate.wait()
+        self.threads.add(threading.current_thread().name)
+        self.records.append(record)
+
+
+def test_records_are_written_on_writer_thread(make_record):
+    sink = CollectingHandler()
+    handler = AsyncPipelineHandler([sink])
+    handler.handle(make_record("hello"))
+    handler.flush()
+    assert [r.msg for r in sink.records] == ["hello"]
+    assert sink.threads == {"loghelpers-writer"}
+    handler.close()
+
+
+def test_drop_newest_counts_dropped_records(make_record):
+    gate = threading.Event()
+    sink = CollectingHandler(gate)
+    handler = AsyncPipelineHandler([sink], queue_size=2, overflow_policy=OverflowPolicy.DROP_NEWEST)
+    for i in range(10):
+        handler.handle(make_record(f"msg {i}"))
+    gate.set()
+    handler.close()
+    assert handler.dropped > 0
+    assert len(sink.records) + handler.dropped == 10
+
+
+def test_drop_newest_keeps_priority_records(make_record):
+    gate = threading.Event()
+    sink = CollectingHandler(gate)
+    handler = AsyncPipelineHandler([sink], queue_size=2, overflow_policy=OverflowPolicy.DROP_NEWEST)
+    for i in range(5):
+        handler.handle(make_record(f"msg {i}"))
+    handler.handle(make_record("boom", logging.ERROR))
+    gate.set()
+    handler.close()
+    assert sink.records[-1].msg == "boom"
+
+
+def test_drop_oldest_keeps_latest_records(make_record):
+    gate = threading.Event()
+    sink = CollectingHandler(gate)
+    handler = AsyncPipelineHandler([sink], queue_size=3, overflow_policy=OverflowPolicy.DROP_OLDEST)
+    for i in range(20):
+        handler.handle(make_record(f"msg {i}"))
+    gate.set()
+    handler.close()
+    assert sink.records[-1].msg == "msg 19"
+    assert len(sink.records) + handler.dropped == 20
+
+
+def test_close_flushes_pending_records(make_record):
+    sink = CollectingHandler()
+    handler = AsyncPipelineHandler([sink], overflow_policy=OverflowPolicy.BLOCK)
+    for i in range(100):
+        handler.handle(make_record(f"msg {i}"))
+    handler.close()
+    assert len(sink.records) == 100
+
+
+def test_json_output_uses_producer_context(tmp_path, make_record):
+    config = Configuration(log_file=str(tmp_path / "app.log"), log_format="%(message)s")
+    sink = CollectingHandler()
+    sink.setFormatter(JsonFormatter(config))
+    handler = AsyncPipelineHandler([sink])
+    with LoggingContext.context(request_id="abc"):
+        handler.handle(make_record("hello"))
+    handler.close()
+    payload = orjson.loads(sink.format(sink.records[0]))
+    assert payload["request_id"] == "abc"
+
+
+def test_create_file_handler_wraps_sink_when_async_enabled(tmp_path):
+    config = Configuration(log_file=str(tmp_path / "app.log"), async_logging=True)
+    handler = create_file_handler(config)
+    assert isinstance(handler, AsyncPipelineHandler)
+    assert handler.handlers[0].baseFilename == config.log_file
+    handler.close()
+
+
+def test_invalid_queue_size_raises():
+    with pytest.raises(ValueError):
+        AsyncPipelineHandler([], queue_size=0)
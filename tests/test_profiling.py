@@ -0,0 +1,155 @@
+import logging
+import sys
+import threading
+import tracemalloc
+
+import pytest
+
+from loghelpers.profiling import Histogram, ProfileRegistry, ProfileReporter, profile_calls
+
+
+def test_histogram_percentiles_are_within_one_bucket():
+    histogram = Histogram()
+    for value in range(1, 1001):
+        histogram.record(value / 1000)
+    assert histogram.count == 1000
+    assert histogram.percentile(50) == pytest.approx(0.5, rel=0.1)
+    assert histogram.percentile(99) == pytest.approx(0.99, rel=0.1)
+    assert histogram.percentile(100) == pytest.approx(1.0)
+
+
+def test_histogram_cumulative_counts():
+    histogram = Histogram()
+    for value in (0.5e-6, 2e-3, 0.2, 5.0):
+        histogram.record(value)
+    assert histogram.cumulative([1e-6, 1e-2, 1.0]) == [1, 2, 3]
+
+
+def test_empty_histogram_summary():
+    assert Histogram().summary()["p99"] == 0.0
+
+
+def test_profile_calls_decorator_records_each_call():
+    registry = ProfileRegistry()
+
+    @profile_calls(name="work", registry=registry)
+    def work():
+        return sum(range(100))
+
+    for _ in range(5):
+        work()
+    stats = registry.snapshot()["work"]
+    assert stats["wall"]["count"] == 5
+    assert stats["cpu"]["count"] == 5
+
+
+def test_profile_calls_context_manager_records_block():
+    registry = ProfileRegistry()
+    with profile_calls("block", registry=registry):
+        pass
+    assert registry.snapshot()["block"]["wall"]["count"] == 1
+
+
+def test_profile_calls_context_manager_requires_name():
+    with pytest.raises(ValueError):
+        with profile_calls():
+            pass
+
+
+def test_profile_calls_traces_allocations():
+    registry = ProfileRegistry()
+    keep = []
+    tracemalloc.start()
+    try:
+        with profile_calls("alloc", registry=registry, trace_allocations=True):
+            keep.append(bytearray(100000))
+    finally:
+        tracemalloc.stop()
+    assert registry.snapshot()["alloc"]["allocated"] >= 100000
+
+
+def test_profile_calls_does_not_start_tracemalloc():
+    registry = ProfileRegistry()
+    with profile_calls("alloc", registry=registry, trace_allocations=True):
+        pass
+    assert not tracemalloc.is_tracing()
+    assert registry.snapshot()["alloc"]["allocated"] == 0
+
+
+def test_profile_calls_context_manager_is_reentrant_across_threads():
+    registry = ProfileRegistry()
+    block = profile_calls("shared", registry=registry)
+    entered = threading.Barrier(2)
+
+    def work():
+        with block:
+            entered.wait()
+            with block:
+                pass
+
+    threads = [threading.Thread(target=work) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry.snapshot()["shared"]["wall"]["count"] == 4
+
+
+def test_registry_merges_thread_shards():
+    registry = ProfileRegistry()
+
+    def worker():
+        for _ in range(100):
+            registry.record("shared", 0.001, 0.001)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry.snapshot(reset=True)["shared"]["wall"]["count"] == 400
+    assert registry.snapshot() == {}
+
+
+def test_reset_while_recording_counts_every_call_once():
+    registry = ProfileRegistry()
+
+    def count(snapshot):
+        return snapshot["shared"]["wall"]["count"] if "shared" in snapshot else 0
+
+    def worker():
+        for _ in range(2000):
+            registry.record("shared", 0.001, 0.001)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        counts = []
+        while any(thread.is_alive() for thread in threads):
+            counts.append(count(registry.snapshot(reset=True)))
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    counts.append(count(registry.snapshot(reset=True)))
+    assert sum(counts) == 8000
+
+
+def test_reporter_logs_one_summary_per_name():
+    registry = ProfileRegistry()
+    registry.record("a", 0.002, 0.001)
+    registry.record("b", 0.004, 0.001)
+    logger = logging.getLogger("test_profile_reporter")
+    logger.setLevel(logging.INFO)
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger.addHandler(handler)
+    ProfileReporter(registry, logger).report()
+    logger.removeHandler(handler)
+    messages = [record.getMessage() for record in records]
+    assert len(messages) == 2
+    assert messages[0].startswith("profile a count=1")
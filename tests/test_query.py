@@ -0,0 +1,119 @@
+import gzip
+import json
+import logging
+import os
+import time
+
+from loghelpers import Configuration
+from loghelpers.handlers import create_file_handler
+from loghelpers.query import INDEX_SUFFIX, Query, build_index, load_index, log_files, main, search, search_file
+
+
+def write_lines(path, payloads, opener=open):
+    with opener(path, "ab") as output:
+        for payload in payloads:
+            output.write(json.dumps(payload, separators=(",", ":")).encode() + b"\n")
+
+
+def payload(i, request_id, level="INFO", timestamp="2024-01-01 12:00:00"):
+    return {"timestamp": timestamp, "logger": "app", "level": level,
+            "message": f"line {i}", "request_id": request_id}
+
+
+def test_index_maps_key_values_to_blocks(tmp_path):
+    path = tmp_path / "app.log"
+    write_lines(path, [payload(i, f"r{i % 5}") for i in range(200)])
+    index = build_index(str(path), keys=["request_id"], block_size=512)
+    assert len(index["blocks"]) > 5
+    assert set(index["values"]["request_id"]) == {f"r{i}" for i in range(5)}
+    assert load_index(str(path)) == index
+    assert os.path.exists(str(path) + INDEX_SUFFIX)
+
+
+def test_search_only_scans_candidate_blocks(tmp_path):
+    path = tmp_path / "app.log"
+    write_lines(path, [payload(i, "common") for i in range(100)])
+    write_lines(path, [payload(100, "needle")])
+    write_lines(path, [payload(i, "common") for i in range(101, 200)])
+    index = build_index(str(path), keys=["request_id"], block_size=1024)
+    assert len(index["values"]["request_id"]["needle"]) == 1
+
+    matches = search_file(str(path), Query(where={"request_id": "needle"}))
+    assert [json.loads(line)["message"] for line in matches] == ["line 100"]
+
+
+def test_index_is_extended_when_the_file_grows(tmp_path):
+    path = tmp_path / "app.log"
+    write_lines(path, [payload(0, "a")])
+    first = build_index(str(path), keys=["request_id"])
+    with open(path, "ab") as output:
+        output.write(b'{"level":"INFO","request_id":"b"}\n{"level":"INFO","request_')
+    second = build_index(str(path))
+    assert second["size"] > first["size"]
+    assert set(second["values"]["request_id"]) == {"a", "b"}
+    assert second["size"] < os.path.getsize(path)
+
+
+def test_level_and_time_filters(tmp_path):
+    path = tmp_path / "app.log"
+    write_lines(path, [
+        payload(0, "a", "INFO", "2024-01-01 10:00:00"),
+        payload(1, "a", "ERROR", "2024-01-01 11:00:00"),
+        payload(2, "a", "ERROR", "2024-01-01 12:00:00.250"),
+    ])
+    since = time.mktime(time.strptime("2024-01-01 11:30:00", "%Y-%m-%d %H:%M:%S"))
+    errors = search_file(str(path), Query(level=logging.ERROR))
+    assert [json.loads(line)["message"] for line in errors] == ["line 1", "line 2"]
+    recent = search_file(str(path), Query(since=since))
+    assert [json.loads(line)["message"] for line in recent] == ["line 2"]
+
+
+def test_search_covers_compressed_segments_in_order(tmp_path):
+    path = tmp_path / "app.log"
+    write_lines(str(path) + ".20240101-000000-000000.gz", [payload(0, "x")], gzip.open)
+    write_lines(str(path) + ".20240101-010000-000000", [payload(1, "x")])
+    write_lines(path, [payload(2, "x"), payload(3, "y")])
+    files = log_files([str(path)])
+    assert files[-1] == str(path) and len(files) == 3
+
+    for processes in (1, 2):
+        matches = list(search(files, Query(where={"request_id": "x"}), processes=processes))
+        assert [json.loads(line)["message"] for line in matches] == ["line 0", "line 1", "line 2"]
+
+
+def test_log_files_orders_numbered_backups_oldest_first(tmp_path):
+    path = tmp_path / "app.log"
+    for name in ("app.log.10", "app.log.2", "app.log.1.gz", "app.log", "app.log.x", "other.log.1"):
+        (tmp_path / name).write_bytes(b"")
+    assert [os.path.basename(f) for f in log_files([str(path)])] == [
+        "app.log.10", "app.log.2", "app.log.1.gz", "app.log"
+    ]
+
+
+def test_mmap_padding_is_not_indexed(tmp_path):
+    path = tmp_path / "app.log"
+    write_lines(path, [payload(0, "a")])
+    with open(path, "ab") as output:
+        output.write(b"\0" * 4096)
+    index = build_index(str(path))
+    assert index["size"] == os.path.getsize(path) - 4096
+    assert len(search_file(str(path), Query())) == 1
+
+
+def test_rotated_segments_are_indexed_in_the_background(tmp_path):
+    path = tmp_path / "app.log"
+    config = Configuration(log_file=str(path), rotation_index_keys=["request_id"])
+    handler = create_file_handler(config)
+    handler.handle(logging.makeLogRecord({"msg": "hello", "levelno": logging.INFO, "levelname": "INFO"}))
+    handler.rotate()
+    handler.close()
+    segment = log_files([str(path)])[0]
+    assert load_index(segment)["keys"] == ["request_id"]
+
+
+def test_cli_writes_matching_lines(tmp_path, capsysbinary):
+    path = tmp_path / "app.log"
+    write_lines(path, [payload(0, "a"), payload(1, "b", "WARNING")])
+    main([str(path), "--where", "request_id=b", "--level", "warning", "--processes", "1"])
+    lines = capsysbinary.readouterr().out.splitlines()
+    assert [json.loads(line)["message"] for line in lines] == ["line 1"]
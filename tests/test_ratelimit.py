@@ -0,0 +1,137 @@
+import logging
+
+import pytest
+
+from loghelpers import Configuration, JsonFormatter, log_calls
+from loghelpers.handlers import create_file_handler
+from loghelpers.ratelimit import RateLimitFilter
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("loghelpers.ratelimit.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_burst_is_allowed_then_repeats_are_suppressed(clock, make_record):
+    limiter = RateLimitFilter(rate=1, burst=3)
+    decisions = [limiter.filter(make_record()) for _ in range(10)]
+    assert decisions == [True] * 3 + [False] * 7
+
+
+def test_next_allowed_record_carries_repeat_count(clock, make_record):
+    limiter = RateLimitFilter(rate=1, burst=1)
+    limiter.filter(make_record())
+    for _ in range(4):
+        limiter.filter(make_record())
+    clock[0] += 1.0
+    record = make_record()
+    assert limiter.filter(record)
+    assert record.repeat_count == 4
+
+
+def test_call_sites_are_limited_independently(clock, make_record):
+    limiter = RateLimitFilter(rate=1, burst=1)
+    assert limiter.filter(make_record(lineno=1))
+    assert limiter.filter(make_record(lineno=2))
+    assert not limiter.filter(make_record(lineno=1))
+
+
+def test_log_calls_functions_are_limited_independently(clock):
+    logger = logging.getLogger("ratelimit.decorated")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = ListHandler()
+    handler.addFilter(RateLimitFilter(rate=1, burst=2))
+    logger.addHandler(handler)
+
+    @log_calls(logging.INFO, logger)
+    def hot():
+        return None
+
+    @log_calls(logging.INFO, logger)
+    def rare():
+        return None
+
+    try:
+        hot()
+        hot()
+        rare()
+    finally:
+        logger.removeHandler(handler)
+    messages = [r.getMessage() for r in handler.records]
+    assert [m.split()[:2] for m in messages if "rare" in m] == [["→", "Enter"], ["←", "Exit"]]
+
+
+def test_bookkeeping_is_bounded(clock, make_record):
+    limiter = RateLimitFilter(rate=1, burst=1, max_keys=5)
+    for lineno in range(100):
+        limiter.filter(make_record(lineno=lineno))
+    assert len(limiter) == 5
+
+
+def test_record_spends_one_token_across_filters(clock, make_record):
+    limiter = RateLimitFilter(rate=1, burst=1)
+    record = make_record()
+    assert limiter.filter(record)
+    assert limiter.filter(record)
+
+
+def test_storm_then_silence_reports_pending_repeats(clock):
+    logger = logging.getLogger("test_ratelimit_storm")
+    handler = ListHandler()
+    logger.addHandler(handler)
+    limiter = RateLimitFilter(rate=1, burst=1)
+    handler.addFilter(limiter)
+    try:
+        for i in range(5):
+            logger.warning("Disk almost full %d", i)
+        limiter._periodic_flush()
+        assert [r.getMessage() for r in handler.records] == ["Disk almost full 0"]
+        clock[0] += 1.0
+        limiter._periodic_flush()
+        limiter._periodic_flush()
+    finally:
+        logger.removeHandler(handler)
+    assert [r.getMessage() for r in handler.records] == ["Disk almost full 0", "Disk almost full 4"]
+    assert handler.records[1].repeat_count == 3
+
+
+def test_evicted_call_site_reports_pending_repeats(clock):
+    logger = logging.getLogger("test_ratelimit_evict")
+    handler = ListHandler()
+    logger.addHandler(handler)
+    limiter = RateLimitFilter(rate=1, burst=1, max_keys=1)
+    handler.addFilter(limiter)
+    try:
+        for _ in range(3):
+            logger.warning("first")
+        logger.warning("second")
+    finally:
+        logger.removeHandler(handler)
+    assert [r.getMessage() for r in handler.records] == ["first", "first", "second"]
+    assert handler.records[1].repeat_count == 1
+
+
+def test_json_formatter_reports_repeat_count(make_record):
+    config = Configuration(log_format="%(message)s")
+    record = make_record()
+    record.repeat_count = 7
+    assert '"repeat_count":7' in JsonFormatter(config).format(record)
+
+
+def test_file_handler_shares_rate_limit_filter(tmp_path):
+    config = Configuration(log_file=str(tmp_path / "app.log"), rate_limit=5)
+    first, second = create_file_handler(config), create_file_handler(config)
+    shared = [f for f in first.filters if isinstance(f, RateLimitFilter)]
+    assert shared and shared[0] in second.filters
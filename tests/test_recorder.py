@@ -0,0 +1,121 @@
+import json
+import logging
+
+import pytest
+
+from loghelpers import Configuration, get_logger
+from loghelpers.context import LoggingContext
+from loghelpers.handlers import create_file_handler
+from loghelpers.recorder import FlightRecorderHandler
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def messages(handler):
+    return [r.getMessage() for r in handler.records]
+
+
+def test_history_is_written_only_on_error(make_record):
+    target = ListHandler(logging.INFO)
+    recorder = FlightRecorderHandler(target, capacity=10)
+    recorder.handle(make_record("debug 1", logging.DEBUG))
+    recorder.handle(make_record("info", logging.INFO))
+    recorder.handle(make_record("debug 2", logging.DEBUG))
+    assert messages(target) == ["info"]
+    recorder.handle(make_record("boom", logging.ERROR))
+    assert messages(target) == ["info", "debug 1", "debug 2", "boom"]
+
+
+def test_ring_keeps_only_last_records(make_record):
+    target = ListHandler()
+    recorder = FlightRecorderHandler(target, capacity=3)
+    for i in range(5):
+        recorder.handle(make_record(f"debug {i}", logging.DEBUG))
+    recorder.dump()
+    assert messages(target) == ["debug 2", "debug 3", "debug 4"]
+
+
+def test_exception_dumps_only_its_own_context(make_record):
+    target = ListHandler()
+    recorder = FlightRecorderHandler(target, capacity=10)
+    with LoggingContext.context(request_id="a"):
+        recorder.handle(make_record("a debug", logging.DEBUG))
+    with LoggingContext.context(request_id="b"):
+        recorder.handle(make_record("b debug", logging.DEBUG))
+        try:
+            raise ValueError("failed")
+        except ValueError as e:
+            recorder.handle(make_record("b failed", logging.WARNING, exc_info=(type(e), e, e.__traceback__)))
+    assert messages(target) == ["b debug", "b failed"]
+
+
+def test_least_recently_used_context_is_evicted(make_record):
+    target = ListHandler()
+    recorder = FlightRecorderHandler(target, capacity=10, max_contexts=2)
+    for key in ("a", "b", "c"):
+        with LoggingContext.context(request_id=key):
+            recorder.handle(make_record(f"{key} debug", logging.DEBUG))
+    with LoggingContext.context(request_id="a"):
+        recorder.handle(make_record("a error", logging.ERROR))
+    assert messages(target) == ["a error"]
+
+
+def test_invalid_capacity_raises():
+    with pytest.raises(ValueError):
+        FlightRecorderHandler(ListHandler(), capacity=0)
+
+
+def test_create_file_handler_dumps_history_through_json_sink(tmp_path, make_record):
+    config = Configuration(log_file=str(tmp_path / "app.log"), flight_recorder_size=50)
+    handler = create_file_handler(config)
+    assert isinstance(handler, FlightRecorderHandler)
+    handler.handle(make_record("hidden", logging.DEBUG))
+    handler.handle(make_record("boom", logging.ERROR))
+    handler.close()
+    lines = [json.loads(line) for line in (tmp_path / "app.log").read_text().splitlines()]
+    assert [(line["level"], line["message"]) for line in lines] == [("DEBUG", "hidden"), ("ERROR", "boom")]
+
+
+def test_get_logger_feeds_debug_history_to_the_recorder(tmp_path):
+    config = Configuration(log_file=str(tmp_path / "app.log"), flight_recorder_size=10)
+    logger = get_logger(name="recorder.history", config=config)
+    try:
+        assert logger.isEnabledFor(logging.DEBUG)
+        logger.debug("kept")
+        logger.info("passed")
+        logger.error("boom")
+    finally:
+        for handler in logger.handlers:
+            handler.close()
+    lines = [json.loads(line) for line in (tmp_path / "app.log").read_text().splitlines()]
+    assert [line["message"] for line in lines] == ["passed", "kept", "boom"]
+
+
+def test_trace_records_are_kept_as_history(tmp_path):
+    config = Configuration(log_file=str(tmp_path / "app.log"), flight_recorder_size=10)
+    logger = get_logger(name="recorder.trace", config=config)
+    try:
+        logger.trace("traced")
+        logger.error("boom")
+    finally:
+        for handler in logger.handlers:
+            handler.close()
+    lines = [json.loads(line) for line in (tmp_path / "app.log").read_text().splitlines()]
+    assert [(line["level"], line["message"]) for line in lines] == [("TRACE", "traced"), ("ERROR", "boom")]
+
+
+def test_flight_recorder_level_limits_history(tmp_path):
+    config = Configuration(log_file=str(tmp_path / "app.log"), flight_recorder_size=10,
+                           flight_recorder_level="DEBUG")
+    handler = create_file_handler(config)
+    assert handler.level == logging.DEBUG
+    handler.close()
+    with pytest.raises(ValueError):
+        Configuration(flight_recorder_level="LOUD").validate()
@@ -1,6 +1,6 @@
 import pytest
 
-from loghelpers.redaction import Redactor
+from loghelpers.redaction import Redactor, Sensitive
 
 
 def test_redact_sensitive_keys_in_dict():
@@ -52,3 +52,122 @@ def test_redact_raises_error_for_invalid_redaction_token():
     with pytest.raises(ValueError):
         redactor = Redactor(sensitive_keys=set())
         redactor.redaction_token = 123
+
+
+def test_compile_combines_patterns_into_single_scanner():
+    redactor = Redactor(sensitive_keys=set(), redact_value_patterns=[r"\d{4}-\d{4}", r"secret"])
+    plan = redactor.compile()
+    assert plan.scanner is not None
+    assert redactor.redact("secret 1234-5678") == "<redacted> <redacted>"
+
+
+def test_compile_falls_back_for_backreferences():
+    redactor = Redactor(sensitive_keys=set(), redact_value_patterns=[r"(ab)\1", r"secret"])
+    plan = redactor.compile()
+    assert plan.scanner is None
+    assert redactor.redact("abab secret") == "<redacted> <redacted>"
+
+
+def test_compile_skips_strings_without_required_digits():
+    redactor = Redactor(sensitive_keys=set(), redact_value_patterns=[r"\d{4}-\d{4}"])
+    plan = redactor.compile()
+    assert plan.needs_digit
+    assert plan.min_length == 9
+    assert redactor.redact("short") == "short"
+
+
+def test_compile_is_invalidated_when_keys_change():
+    redactor = Redactor(sensitive_keys={"password"})
+    assert redactor.redact({"token": "abc"}) == {"token": "abc"}
+    redactor.add_sensitive_key("Token")
+    assert redactor.redact({"token": "abc"}) == {"token": "<redacted>"}
+    redactor.sensitive_keys.add("api_key")
+    assert redactor.redact({"API_KEY": "abc"}) == {"API_KEY": "<redacted>"}
+
+
+def test_compile_is_invalidated_when_keys_are_swapped_in_place():
+    redactor = Redactor(sensitive_keys={"password"})
+    assert redactor.redact({"token": "abc"}) == {"token": "abc"}
+    redactor.sensitive_keys.discard("password")
+    redactor.sensitive_keys.add("token")
+    assert redactor.redact({"token": "abc", "password": "x"}) == {"token": "<redacted>", "password": "x"}
+    redactor.remove_sensitive_key("TOKEN")
+    assert redactor.redact({"token": "abc"}) == {"token": "abc"}
+
+
+def test_sensitive_key_decisions_are_memoized():
+    redactor = Redactor(sensitive_keys={"password"})
+    plan = redactor.compile()
+    assert plan.is_sensitive_key("Password")
+    assert not plan.is_sensitive_key(1)
+    assert plan._key_cache == {"Password": True, 1: False}
+
+
+def test_only_strings_without_matches_are_remembered():
+    redactor = Redactor(sensitive_keys=set(), redact_value_patterns=[r"\d{4}-\d{4}"])
+    plan = redactor.compile()
+    assert redactor.redact({"card": "card 1234-5678", "id": "order 4242"}) == {
+        "card": "card <redacted>", "id": "order 4242"
+    }
+    assert plan._clean_strings == {"order 4242"}
+    assert redactor.redact("card 1234-5678") == "card <redacted>"
+
+
+def test_anchored_patterns_are_only_tried_at_the_start():
+    redactor = Redactor(sensitive_keys=set(), redact_value_patterns=[r"^Bearer \S+"])
+    plan = redactor.compile()
+    assert plan.anchored
+    assert redactor.redact("Bearer abc") == "<redacted>"
+    assert redactor.redact("sent Bearer abc") == "sent Bearer abc"
+
+
+def test_register_custom_type_handler():
+    class Point:
+        def __init__(self, x, secret):
+            self.x = x
+            self.secret = secret
+
+    redactor = Redactor(sensitive_keys={"secret"})
+
+    @redactor.register(Point)
+    def redact_point(r, value):
+        return r.redact({"x": value.x, "secret": value.secret})
+
+    assert redactor.redact([Point(1, "s")]) == [{"x": 1, "secret": "<redacted>"}]
+
+
+def test_registered_handler_applies_to_subclasses():
+    class Base:
+        pass
+
+    class Child(Base):
+        pass
+
+    redactor = Redactor(sensitive_keys=set())
+    redactor.register(Base, lambda r, value: "base")
+    assert redactor.redact(Child()) == "base"
+
+
+def test_objects_with_redact_method_use_it():
+    class Card:
+        def __redact__(self):
+            return "****"
+
+    redactor = Redactor(sensitive_keys=set())
+    assert redactor.redact({"card": Card()}) == {"card": "****"}
+
+
+def test_sensitive_uses_configured_redaction_token():
+    redactor = Redactor(sensitive_keys=set(), redaction_token="***")
+    assert redactor.redact(Sensitive("value")) == "***"
+
+
+def test_register_rejects_non_types():
+    redactor = Redactor(sensitive_keys=set())
+    with pytest.raises(ValueError):
+        redactor.register("not a type", lambda r, value: value)
+
+
+def test_scalars_pass_through_unchanged():
+    redactor = Redactor(sensitive_keys=set(), redact_value_patterns=[r"\d+"])
+    assert redactor.redact([1, 2.5, True, None, b"123"]) == [1, 2.5, True, None, b"123"]
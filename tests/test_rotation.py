@@ -0,0 +1,92 @@
+import gzip
+import logging
+import lzma
+import os
+
+import pytest
+
+from loghelpers import Configuration
+from loghelpers.handlers import create_file_handler
+from loghelpers.rotation import Compression, SegmentRotatingFileHandler
+
+
+def make_handler(path, **kwargs):
+    handler = SegmentRotatingFileHandler(str(path), **kwargs)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    return handler
+
+
+def test_size_rotation_renames_to_timestamped_segment(tmp_path, make_record):
+    path = tmp_path / "app.log"
+    handler = make_handler(path, max_bytes=20)
+    handler.handle(make_record("a" * 15))
+    handler.handle(make_record("b" * 15))
+    handler.close()
+    segments = handler.compressor.segments()
+    assert len(segments) == 1
+    assert open(segments[0]).read() == "a" * 15 + "\n"
+    assert path.read_text() == "b" * 15 + "\n"
+
+
+def test_time_rotation(tmp_path, make_record):
+    path = tmp_path / "app.log"
+    handler = make_handler(path, max_bytes=0, interval=60)
+    start = handler._rollover_at
+    handler.handle(make_record("first", created=start - 1))
+    handler.handle(make_record("second", created=start + 1))
+    handler.close()
+    assert len(handler.compressor.segments()) == 1
+    assert path.read_text() == "second\n"
+
+
+@pytest.mark.parametrize("compression, opener, suffix", [
+    (Compression.GZIP, gzip.open, ".gz"),
+    (Compression.LZMA, lzma.open, ".xz"),
+])
+def test_segments_are_compressed_in_background(tmp_path, compression, opener, suffix, make_record):
+    handler = make_handler(tmp_path / "app.log", max_bytes=10, compression=compression)
+    handler.handle(make_record("first line"))
+    handler.handle(make_record("second line"))
+    handler.close()
+    segments = handler.compressor.segments()
+    assert len(segments) == 1 and segments[0].endswith(suffix)
+    with opener(segments[0], "rt") as f:
+        assert f.read() == "first line\n"
+
+
+def test_retention_limits_segment_count_and_total_size(tmp_path, make_record):
+    handler = make_handler(tmp_path / "app.log", max_bytes=10, backup_count=2)
+    for i in range(5):
+        handler.handle(make_record(f"line {i:05d}"))
+    handler.close()
+    assert len(handler.compressor.segments()) == 2
+
+    handler = make_handler(tmp_path / "other.log", max_bytes=10, backup_count=0, max_total_bytes=25)
+    for i in range(5):
+        handler.handle(make_record(f"line {i:05d}"))
+    handler.close()
+    segments = handler.compressor.segments()
+    assert sum(os.path.getsize(s) for s in segments) <= 25
+    assert open(segments[-1]).read() == "line 00003\n"
+
+
+def test_uncompressed_segments_left_behind_are_compressed_on_start(tmp_path):
+    leftover = tmp_path / "app.log.20240101-000000-000000"
+    leftover.write_text("old\n")
+    handler = make_handler(tmp_path / "app.log", compression=Compression.GZIP)
+    handler.close()
+    assert not leftover.exists()
+    assert gzip.open(str(leftover) + ".gz", "rt").read() == "old\n"
+
+
+def test_create_file_handler_selects_segment_handler_when_compressing(tmp_path):
+    config = Configuration(log_file=str(tmp_path / "app.log"), rotation_compression="bz2")
+    handler = create_file_handler(config)
+    assert isinstance(handler, SegmentRotatingFileHandler)
+    assert handler.compressor.compression is Compression.BZ2
+    handler.close()
+
+
+def test_invalid_rotation_compression_is_rejected():
+    with pytest.raises(ValueError):
+        Configuration(rotation_compression="zip").validate()
@@ -0,0 +1,221 @@
+import logging
+
+import pytest
+
+from loghelpers import Configuration
+from loghelpers.context import LoggingContext
+from loghelpers.handlers import create_console_handler, create_sampling_filter
+from loghelpers.pipeline import AsyncPipelineHandler
+from loghelpers.sampling import AdaptiveSamplingFilter, SamplingFilter, SamplingMode
+
+
+@pytest.fixture
+def default_config():
+    return Configuration(
+        log_level="INFO",
+        log_file="test.log",
+        log_format="%(message)s"
+    )
+
+
+def test_full_rate_keeps_everything(default_config, make_record):
+    sampler = SamplingFilter(default_config)
+    assert all(sampler.filter(make_record()) for _ in range(100))
+
+
+def test_zero_rate_drops_everything_below_keep_level(default_config, make_record):
+    default_config.update_sample_rate(0.0)
+    sampler = SamplingFilter(default_config)
+    assert not any(sampler.filter(make_record()) for _ in range(100))
+    assert sampler.filter(make_record(level=logging.ERROR))
+
+
+def test_uniform_rate_keeps_roughly_the_configured_fraction(default_config, make_record):
+    default_config.update_sample_rate(0.5)
+    sampler = SamplingFilter(default_config)
+    kept = sum(sampler.filter(make_record()) for _ in range(4000))
+    assert 1600 < kept < 2400
+
+
+def test_level_rates_override_base_rate(default_config, make_record):
+    default_config.update_sample_rate(1.0)
+    sampler = SamplingFilter(default_config, level_rates={logging.DEBUG: 0.0})
+    assert not sampler.filter(make_record(level=logging.DEBUG))
+    assert sampler.filter(make_record(level=logging.INFO))
+
+
+def test_context_key_mode_is_consistent_per_request(default_config, make_record):
+    default_config.update_sample_rate(0.5)
+    sampler = SamplingFilter(default_config, mode=SamplingMode.CONTEXT_KEY)
+    outcomes = {}
+    for request_id in map(str, range(50)):
+        with LoggingContext.context(request_id=request_id):
+            decisions = {sampler.filter(make_record()) for _ in range(10)}
+        assert len(decisions) == 1
+        outcomes[request_id] = decisions.pop()
+    assert True in outcomes.values() and False in outcomes.values()
+
+
+def test_decision_is_shared_between_filters(default_config, make_record):
+    default_config.update_sample_rate(0.5)
+    first, second = SamplingFilter(default_config), SamplingFilter(default_config)
+    for _ in range(50):
+        record = make_record()
+        assert first.filter(record) == second.filter(record)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_handlers_with_different_rates_decide_independently():
+    drop_all = Configuration(log_format="%(message)s", sample_rate=0.0)
+    keep_all = Configuration(log_format="%(message)s", sample_rate=1.0)
+    half = Configuration(log_format="%(message)s", sample_rate=0.5)
+    parent, child = logging.getLogger("sampling.parent"), logging.getLogger("sampling.parent.child")
+    dropped, kept, sampled = ListHandler(), ListHandler(), ListHandler()
+    dropped.addFilter(SamplingFilter(drop_all))
+    kept.addFilter(SamplingFilter(keep_all))
+    sampled.addFilter(SamplingFilter(half))
+    child.addHandler(dropped)
+    child.addHandler(sampled)
+    parent.addHandler(kept)
+    parent.setLevel(logging.INFO)
+    try:
+        for _ in range(200):
+            child.info("msg")
+    finally:
+        child.handlers.clear()
+        parent.handlers.clear()
+    assert not dropped.records
+    assert len(kept.records) == 200
+    assert 0 < len(sampled.records) < 200
+
+
+def test_handler_factories_sample_before_redaction(default_config):
+    handler = create_console_handler(default_config)
+    assert isinstance(handler.filters[0], SamplingFilter)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr("loghelpers.sampling.time.monotonic", fake)
+    return fake
+
+
+def test_adaptive_filter_lowers_rate_during_storm(default_config, clock, make_record):
+    sampler = AdaptiveSamplingFilter(default_config, target_rate=100)
+    for _ in range(1000):
+        sampler.filter(make_record())
+    clock.now += 1.0
+    sampler.filter(make_record())
+    assert sampler.rate_for(logging.INFO) == pytest.approx(0.1)
+    assert default_config.sample_rate == 1.0
+
+
+def test_adaptive_filter_recovers_gradually(default_config, clock, make_record):
+    sampler = AdaptiveSamplingFilter(default_config, target_rate=100)
+    sampler.factor = 0.1
+    sampler.filter(make_record())
+    clock.now += 1.0
+    sampler.filter(make_record())
+    assert 0.1 < sampler.rate_for(logging.INFO) < 1.0
+
+
+def test_adaptive_filter_never_exceeds_static_rate(default_config, clock, make_record):
+    default_config.update_sample_rate(0.5)
+    sampler = AdaptiveSamplingFilter(default_config, target_rate=100)
+    sampler.filter(make_record())
+    clock.now += 1.0
+    sampler.filter(make_record())
+    assert sampler.rate_for(logging.INFO) == pytest.approx(0.5)
+    assert default_config.sample_rate == 0.5
+
+
+def test_adaptive_filter_cuts_rate_when_queue_is_full(default_config, clock, make_record):
+    queue_handler = AsyncPipelineHandler([], queue_size=10)
+    sampler = AdaptiveSamplingFilter(default_config, target_rate=1000, min_rate=0.01)
+    sampler.watch(queue_handler)
+    queue_handler.close()
+    for _ in range(10):
+        queue_handler.queue.put_nowait(make_record())
+    sampler.filter(make_record())
+    clock.now += 1.0
+    sampler.filter(make_record())
+    assert sampler.rate_for(logging.INFO) == pytest.approx(0.01)
+
+
+def test_adaptive_filter_emits_suppression_summary(default_config, clock, make_record):
+    default_config.update_sample_rate(0.0)
+    sampler = AdaptiveSamplingFilter(default_config, target_rate=1, summary_interval=1.0,
+                                     min_rate=0.0)
+    summaries = []
+    logger = logging.getLogger("test_logger")
+    logger.handle = summaries.append
+    try:
+        for _ in range(5):
+            sampler.filter(make_record())
+        clock.now += 1.0
+        sampler.filter(make_record())
+    finally:
+        del logger.handle
+    assert len(summaries) == 1
+    assert summaries[0].getMessage().startswith("5 records suppressed")
+
+
+def test_adaptive_filter_flushes_summary_after_storm(default_config, clock, make_record):
+    default_config.update_sample_rate(0.0)
+    sampler = AdaptiveSamplingFilter(default_config, target_rate=1, summary_interval=1.0,
+                                     min_rate=0.0)
+    summaries = []
+    logger = logging.getLogger("test_logger")
+    logger.handle = summaries.append
+    try:
+        for _ in range(3):
+            sampler.filter(make_record())
+        sampler._periodic_flush()
+        assert summaries == []
+        clock.now += 1.0
+        sampler._periodic_flush()
+        sampler.filter(make_record())
+        sampler.close()
+    finally:
+        del logger.handle
+    assert [s.getMessage().split(" records")[0] for s in summaries] == ["3", "1"]
+
+
+def test_adaptive_filter_summary_reaches_the_sampled_handler(default_config, clock):
+    default_config.update_sample_rate(0.0)
+    sampler = AdaptiveSamplingFilter(default_config, target_rate=1, min_rate=0.0)
+    logger = logging.getLogger("sampling.summarized")
+    logger.propagate = False
+    handler = ListHandler()
+    handler.addFilter(sampler)
+    logger.addHandler(handler)
+    try:
+        for _ in range(4):
+            logger.warning("dropped")
+        sampler.close()
+    finally:
+        logger.removeHandler(handler)
+    assert [r.getMessage().split(" records")[0] for r in handler.records] == ["4"]
+    assert handler.records[0].name == "sampling.summarized"
+
+
+def test_adaptive_filter_is_shared_per_configuration(default_config):
+    default_config.target_lines_per_second = 500
+    assert create_sampling_filter(default_config) is create_sampling_filter(default_config)
@@ -0,0 +1,148 @@
+import logging
+import os
+import subprocess
+import sys
+import uuid
+
+import pytest
+
+from loghelpers.aggregation import FRAME_HEADER
+from loghelpers.handlers import load_handler
+from loghelpers.pipeline import OverflowPolicy
+from loghelpers.shm import HEADER_SIZE, SharedMemoryCollector, SharedMemoryHandler, SharedMemoryRing
+
+pytestmark = pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="requires /dev/shm")
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def frame(payload, levelno=logging.INFO):
+    return FRAME_HEADER.pack(len(payload), levelno) + payload
+
+
+@pytest.fixture
+def prefix():
+    prefix = f"lhtest{uuid.uuid4().hex[:8]}"
+    yield prefix
+    assert not [name for name in os.listdir("/dev/shm") if name.startswith(prefix)]
+
+
+def test_ring_wraps_around(prefix):
+    ring = SharedMemoryRing.create(f"{prefix}_ring", 32)
+    consumer = SharedMemoryRing.attach(ring.name)
+    for i in range(10):
+        payload = f"record {i}\n".encode()
+        assert ring.write(frame(payload))
+        assert list(consumer.read()) == [(payload, logging.INFO)]
+    consumer.close()
+    ring.close()
+
+
+def test_full_ring_rejects_frames_until_drained(prefix):
+    ring = SharedMemoryRing.create(f"{prefix}_ring", 32)
+    consumer = SharedMemoryRing.attach(ring.name)
+    assert ring.write(frame(b"x" * 20))
+    assert not ring.write(frame(b"y" * 20))
+    assert [p for p, _ in consumer.read()] == [b"x" * 20]
+    assert ring.write(frame(b"y" * 20))
+    assert [p for p, _ in consumer.read()] == [b"y" * 20]
+    consumer.close()
+    ring.close()
+
+
+def test_collector_drains_handler_rings_and_reports_drops(prefix, caplog, make_record):
+    handler = SharedMemoryHandler(prefix=prefix, size=64)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    sink = ListHandler()
+    collector = SharedMemoryCollector(sink, prefix=prefix)
+    handler.handle(make_record("first"))
+    collector.discover()
+    handler.handle(make_record("second", logging.ERROR))
+    for _ in range(10):
+        handler.handle(make_record("overflow" * 4))
+    assert handler.dropped > 0
+
+    with caplog.at_level(logging.WARNING, logger="loghelpers.shm"):
+        collector.drain()
+    assert [r.getMessage() for r in sink.records][:2] == ["first", "second"]
+    assert sink.records[1].levelno == logging.ERROR
+    assert collector.dropped[handler.ring.name] == handler.dropped
+    assert "dropped" in caplog.text
+
+    name = handler.ring.name
+    handler.close()
+    collector.drain()
+    assert name not in collector._rings
+
+
+def test_rings_of_exited_producers_are_drained_then_unlinked(prefix, make_record):
+    handler = SharedMemoryHandler(prefix=prefix)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler.handle(make_record("before discovery"))
+    name = handler.ring.name
+    handler.close()
+    assert os.path.exists(os.path.join("/dev/shm", name))
+
+    sink = ListHandler()
+    collector = SharedMemoryCollector(sink, prefix=prefix)
+    collector.discover()
+    collector.drain()
+    assert [r.getMessage() for r in sink.records] == ["before discovery"]
+    assert not os.path.exists(os.path.join("/dev/shm", name))
+
+
+def test_rings_of_crashed_producers_are_drained_then_unlinked(prefix):
+    child = subprocess.Popen([sys.executable, "-c", "pass"])
+    child.wait()
+    ring = SharedMemoryRing.create(f"{prefix}_{child.pid}_0", 64)
+    assert ring.write(frame(b"last words\n"))
+    # Simulate a crash: detach without marking the ring closed
+    ring._buf.release()
+    ring._shm.close()
+
+    sink = ListHandler()
+    collector = SharedMemoryCollector(sink, prefix=prefix)
+    collector.discover()
+    collector.drain()
+    assert [r.getMessage() for r in sink.records] == ["last words"]
+    assert not os.path.exists(os.path.join("/dev/shm", ring.name))
+
+
+def test_frames_are_not_read_until_their_checksum_matches(prefix):
+    ring = SharedMemoryRing.create(f"{prefix}_ring", 64)
+    consumer = SharedMemoryRing.attach(ring.name)
+    assert ring.write(frame(b"payload\n"))
+    offset = HEADER_SIZE + 4 + FRAME_HEADER.size
+    ring._buf[offset] ^= 0xFF
+    assert list(consumer.read()) == []
+    ring._buf[offset] ^= 0xFF
+    assert list(consumer.read()) == [(b"payload\n", logging.INFO)]
+    consumer.close()
+    ring.close()
+
+
+def test_block_policy_drops_after_timeout(prefix, make_record):
+    handler = SharedMemoryHandler(
+        prefix=prefix, size=20, overflow_policy=OverflowPolicy.BLOCK, block_timeout=0.01
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler.handle(make_record("0123456789"))
+    handler.handle(make_record("0123456789"))
+    assert handler.dropped == 1
+    handler.close()
+    collector = SharedMemoryCollector(ListHandler(), prefix=prefix)
+    collector.discover()
+    collector.drain()
+
+
+def test_load_handler_builds_shared_memory_handler(prefix):
+    handler = load_handler("SharedMemoryHandler", prefix=prefix)
+    assert isinstance(handler, SharedMemoryHandler)
+    handler.close()
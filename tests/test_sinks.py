@@ -0,0 +1,146 @@
+import logging
+import time
+from unittest import mock
+
+from loghelpers import Configuration, JsonFormatter
+from loghelpers.handlers import create_file_handler
+from loghelpers.sinks import BufferedFileHandler, FsyncPolicy, MmapSegmentHandler
+
+
+def make_handler(path, **kwargs):
+    handler = BufferedFileHandler(str(path), **kwargs)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    return handler
+
+
+def test_lines_are_buffered_until_size_threshold(tmp_path, make_record):
+    path = tmp_path / "app.log"
+    handler = make_handler(path, buffer_size=1024, flush_interval=60)
+    handler.handle(make_record("first"))
+    assert not path.exists() or path.read_bytes() == b""
+    handler.handle(make_record("x" * 1024))
+    assert path.read_bytes().startswith(b"first\n")
+    handler.close()
+
+
+def test_flush_level_writes_immediately(tmp_path, make_record):
+    path = tmp_path / "app.log"
+    handler = make_handler(path, buffer_size=1024, flush_interval=60)
+    handler.handle(make_record("info"))
+    handler.handle(make_record("boom", logging.ERROR))
+    assert path.read_bytes() == b"info\nboom\n"
+    handler.close()
+
+
+def test_close_writes_pending_lines(tmp_path, make_record):
+    path = tmp_path / "app.log"
+    handler = make_handler(path, buffer_size=1024, flush_interval=60)
+    for i in range(3):
+        handler.handle(make_record(f"line {i}"))
+    handler.close()
+    assert path.read_text().splitlines() == ["line 0", "line 1", "line 2"]
+
+
+def test_buffered_lines_are_written_after_silence(tmp_path, make_record):
+    path = tmp_path / "app.log"
+    handler = make_handler(path, buffer_size=1024, flush_interval=0.05)
+    handler.handle(make_record("last"))
+    for _ in range(100):
+        if path.exists() and path.read_bytes():
+            break
+        time.sleep(0.01)
+    assert path.read_bytes() == b"last\n"
+    handler.close()
+
+
+def test_batch_fsync_policy_fsyncs_every_write(tmp_path, make_record):
+    handler = make_handler(tmp_path / "app.log", fsync_policy=FsyncPolicy.BATCH)
+    with mock.patch("loghelpers.sinks.os.fsync") as fsync:
+        handler.handle(make_record("boom", logging.ERROR))
+        handler.flush()
+    assert fsync.call_count == 1
+    handler.close()
+
+
+def test_never_fsync_policy_skips_fsync(tmp_path, make_record):
+    handler = make_handler(tmp_path / "app.log", fsync_policy=FsyncPolicy.NEVER)
+    with mock.patch("loghelpers.sinks.os.fsync") as fsync:
+        handler.handle(make_record("boom", logging.ERROR))
+        handler.close()
+    fsync.assert_not_called()
+
+
+def test_create_file_handler_builds_buffered_sink(tmp_path):
+    config = Configuration(log_file=str(tmp_path / "app.log"), file_sink="buffered")
+    handler = create_file_handler(config)
+    assert isinstance(handler, BufferedFileHandler)
+    assert isinstance(handler.formatter, JsonFormatter)
+    assert handler.flush_level == logging.ERROR
+    handler.close()
+
+
+def test_buffered_sink_writes_format_bytes_output(tmp_path, make_record):
+    config = Configuration(log_file=str(tmp_path / "app.log"), json_fast_path=True)
+    handler = BufferedFileHandler(config.log_file)
+    handler.setFormatter(JsonFormatter(config))
+    handler.handle(make_record("hello"))
+    handler.close()
+    lines = (tmp_path / "app.log").read_bytes().splitlines()
+    assert len(lines) == 1 and b'"message":"hello"' in lines[0]
+
+
+def make_mmap_handler(path, **kwargs):
+    handler = MmapSegmentHandler(str(path), **kwargs)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    return handler
+
+
+def test_mmap_segment_is_preallocated_and_truncated_on_close(tmp_path, make_record):
+    path = tmp_path / "app.log"
+    handler = make_mmap_handler(path, segment_size=4096)
+    assert path.stat().st_size == 4096
+    handler.handle(make_record("one"))
+    handler.handle(make_record("two"))
+    handler.close()
+    assert path.read_bytes() == b"one\ntwo\n"
+
+
+def test_full_mmap_segment_is_sealed(tmp_path, make_record):
+    path = tmp_path / "app.log"
+    handler = make_mmap_handler(path, segment_size=16)
+    for i in range(5):
+        handler.handle(make_record(f"line {i}"))
+    handler.close()
+    segments = handler.compressor.segments()
+    assert [open(s, "rb").read() for s in segments] == [b"line 0\nline 1\n", b"line 2\nline 3\n"]
+    assert path.read_bytes() == b"line 4\n"
+
+
+def test_mmap_recovery_drops_partial_line_after_crash(tmp_path, make_record):
+    path = tmp_path / "app.log"
+    path.write_bytes(b"kept\npart" + bytes(100))
+    handler = make_mmap_handler(path, segment_size=4096)
+    handler.handle(make_record("next"))
+    handler.close()
+    assert path.read_bytes() == b"kept\nnext\n"
+
+
+def test_mmap_handler_leaves_the_parent_segment_alone_after_fork(tmp_path, make_record):
+    path = tmp_path / "app.log"
+    handler = make_mmap_handler(path, segment_size=4096)
+    handler.handle(make_record("parent"))
+    handler._after_fork()
+    handler.handle(make_record("child"))
+    handler.close()
+    data = path.read_bytes()
+    assert len(data) == 4096
+    assert data.rstrip(b"\0") == b"parent\n"
+
+
+def test_create_file_handler_builds_mmap_sink(tmp_path, make_record):
+    config = Configuration(log_file=str(tmp_path / "app.log"), file_sink="mmap", mmap_segment_size=4096)
+    handler = create_file_handler(config)
+    assert isinstance(handler, MmapSegmentHandler)
+    handler.handle(make_record("hello"))
+    handler.close()
+    assert b'"message":"hello"' in (tmp_path / "app.log").read_bytes()